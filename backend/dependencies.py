@@ -2,6 +2,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
 
+from services.search import INCIDENT_TEXT_INDEX, VEHICLE_TEXT_INDEX, create_text_index
+
 load_dotenv()
 
 # Global database client
@@ -24,30 +26,78 @@ async def get_database():
     
     return database
 
-async def create_indexes():
+# Compound indexes matched to the service query shapes: equality filters
+# first, then the sort keys, so filtered lists are served in index order.
+# A filter on several fields uses the index of its most selective field
+# and checks the rest while fetching; no query needs a collection scan or
+# an in-memory sort. `verify_indexes.py` checks this against explain().
+KEYSET_KEYS = [("timestamp", -1), ("id", -1)]
+INCIDENT_INDEXES = [
+    KEYSET_KEYS,
+    [("status", 1)] + KEYSET_KEYS,
+    [("type", 1)] + KEYSET_KEYS,
+    [("priority", 1)] + KEYSET_KEYS,
+    [("status", 1), ("priority", 1)] + KEYSET_KEYS,   # dashboard: open critical incidents
+]
+VEHICLE_INDEXES = [
+    [("call_sign", 1)],
+    [("status", 1), ("call_sign", 1)],
+    [("type", 1), ("call_sign", 1)],
+    [("status", 1), ("type", 1), ("call_sign", 1)],   # available units of a type
+    [("current_incident", 1)],
+    [("fuel", 1)],                                   # maintenance query ($or branches)
+    [("maintenance_due", 1)],
+]
+
+# Single-field indexes superseded by the compound ones above
+OBSOLETE_INDEXES = {
+    "incidents": ["status_1", "type_1", "priority_1", "timestamp_1"],
+    "incidents_archive": ["status_1", "type_1", "priority_1"],
+    "vehicles": ["status_1", "type_1"],
+}
+
+async def drop_obsolete_indexes(db):
+    """Drop superseded indexes left behind by earlier versions"""
+    for collection_name, index_names in OBSOLETE_INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        for index_name in index_names:
+            if index_name in existing:
+                await collection.drop_index(index_name)
+
+async def create_indexes(db=None):
     """Create database indexes for better query performance"""
-    if database is None:
+    db = db if db is not None else database
+    if db is None:
         return
-        
-    # Incident indexes
-    await database.incidents.create_index("id", unique=True)
-    await database.incidents.create_index("status")
-    await database.incidents.create_index("type")
-    await database.incidents.create_index("priority")
-    await database.incidents.create_index("timestamp")
-    await database.incidents.create_index([("location.coordinates", "2dsphere")])
+    
+    # Incident indexes (the archive serves the same query shapes)
+    for collection in (db.incidents, db.incidents_archive):
+        await collection.create_index("id", unique=True)
+        for keys in INCIDENT_INDEXES:
+            await collection.create_index(keys)
+        await create_text_index(collection, INCIDENT_TEXT_INDEX)
+    await db.incidents.create_index([("location.coordinates", "2dsphere")])
+    
+    # Archiver: closed incidents by age
+    await db.incidents.create_index([("status", 1), ("last_update", 1)])
     
     # Vehicle indexes
-    await database.vehicles.create_index("id", unique=True)
-    await database.vehicles.create_index("status")
-    await database.vehicles.create_index("type")
-    await database.vehicles.create_index("current_incident")
-    await database.vehicles.create_index([("location.coordinates", "2dsphere")])
+    await db.vehicles.create_index("id", unique=True)
+    for keys in VEHICLE_INDEXES:
+        await db.vehicles.create_index(keys)
+    await db.vehicles.create_index([("location.coordinates", "2dsphere")])
+    await create_text_index(db.vehicles, VEHICLE_TEXT_INDEX)
+    
+    # Response-time transition events (replayed on startup)
+    await db.response_events.create_index("at")
     
     # Notification indexes
-    await database.notifications.create_index("timestamp")
-    await database.notifications.create_index("read")
-    await database.notifications.create_index("priority")
+    await db.notifications.create_index("timestamp")
+    await db.notifications.create_index("read")
+    await db.notifications.create_index("priority")
+    
+    await drop_obsolete_indexes(db)
 
 def get_db():
     """Dependency to get database in route handlers"""
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import os
+import sys
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.import_service import (
+    ImportCheckpoint, ImportProgress, ImportService, IMPORT_CHUNK_SIZE, detect_format
+)
+
+# Load environment
+load_dotenv()
+
+def print_progress(progress: ImportProgress):
+    print(
+        f"   - {progress.processed:>9} records read, {progress.inserted:>9} inserted, "
+        f"{progress.duplicates} duplicates, {progress.conflicts} conflicts, {progress.invalid} invalid "
+        f"({progress.rate:,.0f} docs/s)",
+        flush=True
+    )
+
+async def import_incidents(args: argparse.Namespace) -> bool:
+    """Bulk import incidents from a CSV or NDJSON file"""
+    mongo_url = os.environ.get('MONGO_URL')
+    db_name = os.environ.get('DB_NAME', 'emergency_routing')
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+    import_format = args.format or detect_format(args.path)
+
+    print(f"Importing {args.path} ({import_format}) into database: {db_name}")
+
+    checkpoint_path = None if args.no_checkpoint else (args.checkpoint or f"{args.path}.checkpoint")
+    checkpoint = ImportCheckpoint(checkpoint_path, os.path.abspath(args.path))
+
+    try:
+        with open(args.path, newline="", encoding="utf-8") as stream:
+            summary = await ImportService(db).import_stream(
+                stream,
+                import_format,
+                chunk_size=args.chunk_size,
+                checkpoint=checkpoint,
+                on_progress=print_progress
+            )
+
+        print("✅ Import finished")
+        print(f"   - {summary['inserted']} inserted in {summary['elapsed_seconds']}s "
+              f"({summary['documents_per_second']:,.0f} docs/s)")
+        print(f"   - {summary['duplicates']} duplicates skipped")
+        print(f"   - {summary['conflicts']} conflicting records (ID already used by a different incident)")
+        for incident_id in summary["conflicting_ids"][:10]:
+            print(f"     {incident_id}")
+        print(f"   - {summary['invalid']} invalid records")
+        for error in summary["errors"][:10]:
+            print(f"     record {error['record']}: {error['error']}")
+
+        # A completed import needs no checkpoint; a re-run starts from scratch
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return True
+
+    except Exception as e:
+        print(f"❌ Import failed: {e}")
+        if checkpoint_path:
+            print(f"   Re-run the same command to resume from {checkpoint_path}")
+        return False
+
+    finally:
+        client.close()
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk import historical incidents (CAD exports, backfills)")
+    parser.add_argument("path", help="CSV or NDJSON file to import")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="input format (default: from the file extension)")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="records validated and inserted per batch")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <path>.checkpoint)")
+    parser.add_argument("--no-checkpoint", action="store_true", help="do not read or write a checkpoint")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(import_incidents(parse_args())) else 1)
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from typing import List
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.assignment_service import AssignmentError, AssignmentService
+from services.response_analytics import MILLISECOND_BIN_EDGES, StreamingHistogram
+
+# Load environment
+load_dotenv()
+
+VEHICLE_COUNT = 50
+INCIDENT_COUNT = 200
+CONCURRENT_ASSIGNS = 1000
+
+def make_incident(index: int) -> dict:
+    now = datetime.utcnow()
+    return {
+        "id": f"LT-INC-{index:05d}",
+        "type": "fire",
+        "priority": "high",
+        "location": {
+            "address": f"{index} Broadway, Manhattan, NY 10018",
+            "coordinates": [40.75, -73.98],
+            "district": "Midtown Manhattan"
+        },
+        "description": "Load test incident",
+        "timestamp": now,
+        "status": "active",
+        "assigned_vehicles": [],
+        "reported_by": "loadtest",
+        "last_update": now
+    }
+
+def make_vehicle(index: int) -> dict:
+    return {
+        "id": f"LT-ENGINE-{index:03d}",
+        "call_sign": f"Load Test {index}",
+        "type": "fire",
+        "status": "available",
+        "location": {"address": "Station", "coordinates": [40.75, -73.98], "district": "Midtown"},
+        "crew": [],
+        "current_incident": None,
+        "equipment": ["Hose"],
+        "last_update": datetime.utcnow()
+    }
+
+async def run_assigns(service: AssignmentService, pairs: List[tuple]):
+    """Fire every (incident, vehicle) assignment at once and time each one"""
+    latency_ms = StreamingHistogram(MILLISECOND_BIN_EDGES)
+    outcomes = Counter()
+
+    async def assign(incident_id: str, vehicle_id: str):
+        start = time.perf_counter()
+        try:
+            await service.assign(incident_id, vehicle_id)
+            outcomes["assigned"] += 1
+        except AssignmentError as e:
+            outcomes[e.reason] += 1
+        latency_ms.add((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(assign(incident_id, vehicle_id) for incident_id, vehicle_id in pairs))
+    return outcomes, latency_ms, (time.perf_counter() - start) * 1000
+
+async def load_test():
+    """Race concurrent assignments for a small fleet and check no unit is double-booked"""
+    mongo_url = os.environ.get('MONGO_URL')
+    db_name = os.environ.get('DB_NAME', 'emergency_routing') + "_loadtest"
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+    print(f"Connecting to scratch database: {db_name}")
+
+    try:
+        await client.drop_database(db_name)
+        await db.incidents.create_index("id", unique=True)
+        await db.vehicles.create_index("id", unique=True)
+        await db.incidents.insert_many([make_incident(i) for i in range(INCIDENT_COUNT)])
+        await db.vehicles.insert_many([make_vehicle(i) for i in range(VEHICLE_COUNT)])
+
+        random.seed(7)
+        pairs = [
+            (f"LT-INC-{random.randrange(INCIDENT_COUNT):05d}", f"LT-ENGINE-{random.randrange(VEHICLE_COUNT):03d}")
+            for _ in range(CONCURRENT_ASSIGNS)
+        ]
+        outcomes, latency_ms, elapsed_ms = await run_assigns(AssignmentService(db), pairs)
+
+        # Every vehicle must be assigned at most once, and both sides must agree
+        assigned_vehicles = Counter()
+        async for incident in db.incidents.find({}, {"_id": 0, "id": 1, "assigned_vehicles": 1}):
+            for vehicle_id in incident["assigned_vehicles"]:
+                assigned_vehicles[vehicle_id] += 1
+        double_booked = [vehicle_id for vehicle_id, count in assigned_vehicles.items() if count > 1]
+        mismatched = 0
+        async for vehicle in db.vehicles.find({"status": "dispatched"}, {"_id": 0, "id": 1, "current_incident": 1}):
+            incident = await db.incidents.find_one({"id": vehicle["current_incident"]}, {"_id": 0, "assigned_vehicles": 1})
+            if incident is None or vehicle["id"] not in incident["assigned_vehicles"]:
+                mismatched += 1
+
+        summary = latency_ms.summary()
+        print(f"{CONCURRENT_ASSIGNS} concurrent assigns for {VEHICLE_COUNT} vehicles in {elapsed_ms:.0f} ms")
+        for outcome, count in sorted(outcomes.items()):
+            print(f"   - {outcome}: {count}")
+        print(f"   - latency p50: {summary['p50']:.1f} ms, p90: {summary['p90']:.1f} ms")
+        print(f"   - double-booked vehicles: {len(double_booked)}")
+        print(f"   - vehicle/incident mismatches: {mismatched}")
+
+        if double_booked or mismatched or outcomes["assigned"] != VEHICLE_COUNT:
+            print("❌ Assignment load test failed")
+        else:
+            print("✅ Every vehicle was assigned exactly once")
+
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(load_test())
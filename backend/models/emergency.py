@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 from enum import Enum
 
@@ -44,6 +44,13 @@ class CrewMember(BaseModel):
     role: str
     id: Optional[str] = None
 
+class DuplicateReport(BaseModel):
+    """A probable duplicate call merged into an existing incident"""
+    reported_by: str
+    description: str
+    location: Location
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
 class Incident(BaseModel):
     id: Optional[str] = None
     type: EmergencyType
@@ -56,8 +63,42 @@ class Incident(BaseModel):
     reported_by: str
     estimated_arrival: Optional[str] = None
     last_update: datetime = Field(default_factory=datetime.utcnow)
+    dispatched_at: Optional[datetime] = None
+    on_scene_at: Optional[datetime] = None
     resolved_at: Optional[datetime] = None
     notes: Optional[str] = None
+    report_count: int = 1
+    duplicate_reports: List[DuplicateReport] = Field(default_factory=list)
+
+class LocationProjection(BaseModel):
+    address: Optional[str] = None
+    coordinates: Optional[List[float]] = None
+    district: Optional[str] = None
+    heading: Optional[float] = None
+
+class IncidentProjection(BaseModel):
+    """Sparse incident returned when a list request selects `fields`"""
+    id: Optional[str] = None
+    type: Optional[EmergencyType] = None
+    priority: Optional[Priority] = None
+    location: Optional[LocationProjection] = None
+    description: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    status: Optional[IncidentStatus] = None
+    assigned_vehicles: Optional[List[str]] = None
+    reported_by: Optional[str] = None
+    estimated_arrival: Optional[str] = None
+    last_update: Optional[datetime] = None
+    dispatched_at: Optional[datetime] = None
+    on_scene_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
+    notes: Optional[str] = None
+    report_count: Optional[int] = None
+    duplicate_reports: Optional[List[DuplicateReport]] = None
+
+class IncidentPage(BaseModel):
+    items: List[Union[Incident, IncidentProjection]]
+    next_cursor: Optional[str] = None  # opaque token for the following page
 
 class IncidentCreate(BaseModel):
     type: EmergencyType
@@ -81,6 +122,22 @@ class Vehicle(BaseModel):
     last_update: datetime = Field(default_factory=datetime.utcnow)
     maintenance_due: Optional[datetime] = None
 
+class VehicleProjection(BaseModel):
+    """Sparse vehicle returned when a list request selects `fields`"""
+    id: Optional[str] = None
+    call_sign: Optional[str] = None
+    type: Optional[EmergencyType] = None
+    status: Optional[VehicleStatus] = None
+    location: Optional[LocationProjection] = None
+    crew: Optional[List[CrewMember]] = None
+    current_incident: Optional[str] = None
+    eta: Optional[str] = None
+    speed: Optional[float] = None
+    fuel: Optional[float] = None
+    equipment: Optional[List[str]] = None
+    last_update: Optional[datetime] = None
+    maintenance_due: Optional[datetime] = None
+
 class VehicleCreate(BaseModel):
     id: str
     call_sign: str
@@ -153,5 +210,7 @@ class SystemStats(BaseModel):
     available_vehicles: int
     dispatched_vehicles: int
     on_scene_vehicles: int
-    average_response_time: float
+    average_response_time: float  # minutes, creation to on-scene over the last 24h
+    response_time_p50: Optional[float] = None  # minutes
+    response_time_p90: Optional[float] = None  # minutes
     system_status: str = "operational"
\ No newline at end of file
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import Response
+from typing import Optional
+
+from models.emergency import EmergencyType
+from services.heatmap_service import heatmap_index, HEATMAP_ZOOMS, BIN_DEPTH, WINDOWS
+
+router = APIRouter(prefix="/heatmap", tags=["heatmap"])
+
+@router.get("/config")
+async def get_heatmap_config():
+    """Get the zoom levels and time windows tiles are available for"""
+    return {
+        "zooms": list(HEATMAP_ZOOMS),
+        "bins_per_tile_side": 1 << BIN_DEPTH,
+        "windows": list(WINDOWS),
+        "types": [emergency_type.value for emergency_type in EmergencyType]
+    }
+
+@router.get("/tiles/{z}/{x}/{y}")
+async def get_heatmap_tile(
+    z: int,
+    x: int,
+    y: int,
+    type: Optional[EmergencyType] = None,
+    window: str = "24h",
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get incident density bins for one slippy-map tile.
+
+    Served from in-memory aggregates. Send the returned ETag back in
+    `If-None-Match` to get a 304 while the tile is unchanged.
+    """
+    try:
+        etag, body = heatmap_index.tile(z, x, y, incident_type=type, window=window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
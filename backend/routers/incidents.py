@@ -1,14 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Union
+import io
 from datetime import datetime
 
 from models.emergency import (
     Incident, IncidentCreate, IncidentStatus, 
-    EmergencyType, Priority, SystemStats
+    EmergencyType, Priority, SystemStats, IncidentProjection, IncidentPage
 )
 from services.incident_service import IncidentService
 from services.vehicle_service import VehicleService
+from services.stats_service import StatsService
+from services.response_analytics import response_analytics, RESPONSE
+from services.dispatch_service import schedule_auto_dispatch
+from services.import_service import ImportService, detect_format
+from services.assignment_service import AssignmentError, AssignmentService, VEHICLE_UNAVAILABLE
 from services.websocket_service import websocket_service
+from services.serialization import (
+    trusted_response, parse_fields, encode_documents,
+    INCIDENT_FIELDS, INCIDENT_FIELD_PRESETS
+)
 from dependencies import get_db
 
 router = APIRouter(prefix="/incidents", tags=["incidents"])
@@ -17,13 +28,32 @@ router = APIRouter(prefix="/incidents", tags=["incidents"])
 async def create_incident(
     incident_data: IncidentCreate,
     background_tasks: BackgroundTasks,
+    dedupe: bool = True,
     db = Depends(get_db)
 ):
-    """Create a new emergency incident"""
+    """Create a new emergency incident.
+    
+    Probable duplicate calls (same type, nearby, recent and still open) are
+    merged into the existing incident unless `dedupe` is false; a more
+    urgent duplicate escalates the incident's priority and dispatch.
+    """
     incident_service = IncidentService(db)
     
     try:
-        incident = await incident_service.create_incident(incident_data)
+        incident, merged, escalated = await incident_service.create_incident(incident_data, dedupe=dedupe)
+        
+        if merged:
+            # Only tell clients the existing incident gained a report
+            background_tasks.add_task(
+                websocket_service.broadcast_incident_update,
+                incident.id,
+                "report_merged",
+                {"report_count": incident.report_count, "priority": incident.priority, "escalated": escalated}
+            )
+            if escalated:
+                # A more urgent call may need more units than were sent
+                schedule_auto_dispatch(db, incident, requested_at=datetime.utcnow())
+            return incident
         
         # Broadcast incident creation to WebSocket clients
         background_tasks.add_task(
@@ -45,36 +75,136 @@ async def create_incident(
             }
         )
         
+        # Pick, reserve and route units off the request path
+        schedule_auto_dispatch(db, incident)
+        
         return incident
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create incident: {str(e)}")
 
-@router.get("/", response_model=List[Incident])
+@router.get(
+    "/",
+    response_model=List[Union[Incident, IncidentProjection]],
+    response_model_exclude_unset=True
+)
 async def get_incidents(
     status: Optional[IncidentStatus] = None,
     type: Optional[EmergencyType] = None,
     priority: Optional[Priority] = None,
     limit: int = 100,
+    fields: Optional[str] = None,
+    include_history: bool = False,
     db = Depends(get_db)
 ):
-    """Retrieve incidents with optional filtering"""
+    """Retrieve incidents with optional filtering.
+    
+    `fields` takes a comma-separated list of fields (or the `map` preset)
+    and returns sparse incidents containing only those fields. Archived
+    incidents are only included with `include_history=true`.
+    """
     incident_service = IncidentService(db)
     
+    try:
+        selected_fields = parse_fields(fields, INCIDENT_FIELDS, INCIDENT_FIELD_PRESETS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         incidents = await incident_service.get_incidents(
-            status=status, type=type, priority=priority, limit=limit
+            status=status, type=type, priority=priority, limit=limit,
+            fields=selected_fields, trusted=True, include_history=include_history
+        )
+        return trusted_response(incidents)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve incidents: {str(e)}")
+
+@router.post("/import")
+async def import_incidents(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db = Depends(get_db)
+):
+    """Bulk import historical incidents from a CSV or NDJSON upload.
+    
+    Records are validated and inserted in chunks; records whose ID already
+    exists are skipped, so re-uploading a file is safe. For very large
+    files prefer the resumable `import_incidents.py` CLI. Reading and
+    validation run in a worker thread, off the event loop.
+    """
+    import_service = ImportService(db)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    
+    try:
+        return await import_service.import_stream(stream, format or detect_format(file.filename))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8 encoded")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+
+@router.get("/page", response_model=IncidentPage, response_model_exclude_unset=True)
+async def get_incidents_page(
+    status: Optional[IncidentStatus] = None,
+    type: Optional[EmergencyType] = None,
+    priority: Optional[Priority] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_history: bool = False,
+    db = Depends(get_db)
+):
+    """Retrieve incidents one keyset page at a time.
+    
+    Pass the returned `next_cursor` back as `cursor` to fetch the next page.
+    """
+    incident_service = IncidentService(db)
+    
+    try:
+        selected_fields = parse_fields(fields, INCIDENT_FIELDS, INCIDENT_FIELD_PRESETS)
+        page = await incident_service.get_incidents_page(
+            status=status, type=type, priority=priority, limit=limit,
+            cursor=cursor, fields=selected_fields, trusted=True,
+            include_history=include_history
         )
-        return incidents
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve incidents: {str(e)}")
+    
+    return trusted_response(page)
+
+@router.get("/export")
+async def export_incidents(
+    status: Optional[IncidentStatus] = None,
+    type: Optional[EmergencyType] = None,
+    priority: Optional[Priority] = None,
+    fields: Optional[str] = None,
+    include_history: bool = False,
+    db = Depends(get_db)
+):
+    """Stream matching incidents as NDJSON, one document per line"""
+    incident_service = IncidentService(db)
+    
+    try:
+        selected_fields = parse_fields(fields, INCIDENT_FIELDS, INCIDENT_FIELD_PRESETS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def stream_lines():
+        async for incident in incident_service.iter_incidents(
+            status=status, type=type, priority=priority, fields=selected_fields,
+            include_history=include_history
+        ):
+            yield encode_documents(incident) + b"\n"
+    
+    return StreamingResponse(stream_lines(), media_type="application/x-ndjson")
 
 @router.get("/{incident_id}", response_model=Incident)
-async def get_incident(incident_id: str, db = Depends(get_db)):
+async def get_incident(incident_id: str, include_history: bool = False, db = Depends(get_db)):
     """Get a specific incident by ID"""
     incident_service = IncidentService(db)
     
-    incident = await incident_service.get_incident_by_id(incident_id)
+    incident = await incident_service.get_incident_by_id(incident_id, include_history=include_history)
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
     
@@ -113,26 +243,14 @@ async def assign_vehicle_to_incident(
     background_tasks: BackgroundTasks,
     db = Depends(get_db)
 ):
-    """Assign a vehicle to an incident"""
-    incident_service = IncidentService(db)
-    vehicle_service = VehicleService(db)
-    
-    # Check if incident exists
-    incident = await incident_service.get_incident_by_id(incident_id)
-    if not incident:
-        raise HTTPException(status_code=404, detail="Incident not found")
-    
-    # Check if vehicle exists and is available
-    vehicle = await vehicle_service.get_vehicle_by_id(vehicle_id)
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
+    """Assign an available vehicle to an open incident"""
+    assignment_service = AssignmentService(db)
     
-    # Assign vehicle to incident
-    incident_assigned = await incident_service.assign_vehicle(incident_id, vehicle_id)
-    vehicle_assigned = await vehicle_service.assign_to_incident(vehicle_id, incident_id)
-    
-    if not (incident_assigned and vehicle_assigned):
-        raise HTTPException(status_code=500, detail="Failed to assign vehicle")
+    try:
+        incident, vehicle = await assignment_service.assign(incident_id, vehicle_id)
+    except AssignmentError as e:
+        status_code = 409 if e.reason == VEHICLE_UNAVAILABLE else 404
+        raise HTTPException(status_code=status_code, detail=str(e))
     
     # Broadcast assignment update
     background_tasks.add_task(
@@ -142,7 +260,11 @@ async def assign_vehicle_to_incident(
         {"vehicle_id": vehicle_id, "vehicle_call_sign": vehicle.call_sign}
     )
     
-    return {"message": f"Vehicle {vehicle.call_sign} assigned to incident {incident_id}"}
+    return {
+        "message": f"Vehicle {vehicle.call_sign} assigned to incident {incident_id}",
+        "incident": incident,
+        "vehicle": vehicle
+    }
 
 @router.delete("/{incident_id}/assign/{vehicle_id}")
 async def unassign_vehicle_from_incident(
@@ -197,45 +319,43 @@ async def update_incident_eta(
     return {"message": "ETA updated", "eta": eta}
 
 @router.get("/search/{query}")
-async def search_incidents(query: str, db = Depends(get_db)):
+async def search_incidents(query: str, include_history: bool = False, db = Depends(get_db)):
     """Search incidents by description, location, or ID"""
     incident_service = IncidentService(db)
     
     try:
-        incidents = await incident_service.search_incidents(query)
-        return incidents
+        incidents = await incident_service.search_incidents(
+            query, trusted=True, include_history=include_history
+        )
+        return trusted_response(incidents)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 @router.get("/stats/summary", response_model=SystemStats)
 async def get_incident_stats(db = Depends(get_db)):
-    """Get incident statistics summary"""
-    incident_service = IncidentService(db)
-    vehicle_service = VehicleService(db)
+    """Get incident statistics summary from the materialized counters"""
+    stats_service = StatsService(db)
     
     try:
-        # Get incident stats
-        total_incidents = await incident_service.get_incidents()
-        active_incidents = await incident_service.get_active_incidents_count()
-        critical_incidents = await incident_service.get_critical_incidents_count()
+        summary = await stats_service.get_summary()
         
-        # Get vehicle stats
-        vehicle_stats = await vehicle_service.get_vehicle_stats()
+        # Creation-to-on-scene times over the last 24 hours, in minutes
+        response_times = response_analytics.window_summary(RESPONSE, "24h")
         
-        # Calculate average response time (mock calculation)
-        import random
-        avg_response_time = round(random.uniform(3.5, 6.5), 1)
+        def to_minutes(seconds):
+            return round(seconds / 60, 1) if seconds is not None else None
         
         return SystemStats(
-            total_incidents=len(total_incidents),
-            active_incidents=active_incidents,
-            critical_incidents=critical_incidents,
-            total_vehicles=vehicle_stats.get("total", 0),
-            available_vehicles=vehicle_stats.get("available", 0),
-            dispatched_vehicles=vehicle_stats.get("dispatched", 0),
-            on_scene_vehicles=vehicle_stats.get("on-scene", 0),
-            average_response_time=avg_response_time
+            **summary,
+            average_response_time=to_minutes(response_times["mean"]) or 0.0,
+            response_time_p50=to_minutes(response_times["p50"]),
+            response_time_p90=to_minutes(response_times["p90"])
         )
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
+
+@router.get("/stats/response-times")
+async def get_response_time_stats():
+    """Get dispatch, response and resolution times (seconds) by window, type and district"""
+    return response_analytics.get_summary()
@@ -1,16 +1,30 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from typing import List, Optional
 from datetime import datetime
+import asyncio
 
 from models.emergency import RouteOptimization, VehicleRoute
 from services.route_service import RouteService
 from services.incident_service import IncidentService
 from services.vehicle_service import VehicleService
 from services.websocket_service import websocket_service
+from services.fleet_snapshot import fleet_snapshot
+from services.dispatch_service import dispatch_metrics
+from services.scheduler import SchedulerOverloaded, work_scheduler
 from dependencies import get_db
 
 router = APIRouter(prefix="/routes", tags=["routes"])
 
+@router.get("/dispatch/metrics")
+async def get_dispatch_metrics():
+    """Get auto-dispatch latency (incident creation to first unit assigned) and outcomes"""
+    return dispatch_metrics.get_stats()
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats():
+    """Get routing/dispatch work queue depth and wait times per priority"""
+    return work_scheduler.get_stats()
+
 @router.get("/{incident_id}", response_model=RouteOptimization)
 async def get_routes_for_incident(incident_id: str, db = Depends(get_db)):
     """Get optimized routes for all vehicles responding to an incident"""
@@ -27,8 +41,12 @@ async def get_routes_for_incident(incident_id: str, db = Depends(get_db)):
     vehicles = await vehicle_service.get_vehicles_by_incident(incident_id)
     
     try:
-        route_optimization = await route_service.optimize_routes_for_incident(incident, vehicles)
+        route_optimization = await work_scheduler.run(
+            incident.priority, route_service.optimize_routes_for_incident, incident, vehicles
+        )
         return route_optimization
+    except SchedulerOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get routes: {str(e)}")
 
@@ -55,53 +73,72 @@ async def optimize_routes(
                 if incident:
                     active_incidents.append(incident)
         
+        async def optimize_incident(incident) -> List[dict]:
+            vehicles = await vehicle_service.get_vehicles_by_incident(incident.id)
+            if not vehicles:
+                return []
+            route_optimization = await route_service.optimize_routes_for_incident(incident, vehicles)
+            
+            incident_routes = []
+            # Process each vehicle route
+            for vehicle_id, vehicle_route in route_optimization.vehicle_routes.items():
+                # Calculate new ETA
+                new_eta = route_service.format_eta_display(vehicle_route.duration)
+                
+                # Update vehicle ETA
+                await vehicle_service.update_vehicle_status(
+                    vehicle_id,
+                    type('StatusUpdate', (), {'status': 'dispatched', 'eta': new_eta, 'location': None, 'incident_id': None})()
+                )
+                
+                # Update incident ETA
+                await incident_service.update_eta(incident.id, new_eta)
+                
+                # Simulate time saved (random between 30-180 seconds)
+                import random
+                time_saved = random.randint(30, 180)
+                
+                incident_routes.append({
+                    "incident_id": incident.id,
+                    "vehicle_id": vehicle_id,
+                    "new_eta": new_eta,
+                    "time_saved": time_saved,
+                    "route": vehicle_route.route
+                })
+            return incident_routes
+        
+        # Each incident is optimized at its own priority; critical incidents go first
+        results = await asyncio.gather(
+            *(work_scheduler.run(incident.priority, optimize_incident, incident) for incident in active_incidents),
+            return_exceptions=True
+        )
+        
         optimized_routes = []
         total_time_saved = 0
-        
-        for incident in active_incidents:
-            vehicles = await vehicle_service.get_vehicles_by_incident(incident.id)
-            if vehicles:
-                route_optimization = await route_service.optimize_routes_for_incident(incident, vehicles)
+        skipped = 0
+        for result in results:
+            if isinstance(result, SchedulerOverloaded):
+                skipped += 1
+                continue
+            if isinstance(result, Exception):
+                raise result
+            
+            for route in result:
+                total_time_saved += route["time_saved"]
+                optimized_routes.append(route)
                 
-                # Process each vehicle route
-                for vehicle_id, vehicle_route in route_optimization.vehicle_routes.items():
-                    # Calculate new ETA
-                    new_eta = route_service.format_eta_display(vehicle_route.duration)
-                    
-                    # Update vehicle ETA
-                    await vehicle_service.update_vehicle_status(
-                        vehicle_id,
-                        type('StatusUpdate', (), {'status': 'dispatched', 'eta': new_eta, 'location': None, 'incident_id': None})()
+                # Broadcast route optimization update
+                if background_tasks:
+                    background_tasks.add_task(
+                        websocket_service.broadcast_route_optimization,
+                        route["incident_id"],
+                        route["vehicle_id"],
+                        {
+                            "new_eta": route["new_eta"],
+                            "time_saved": route["time_saved"],
+                            "route": route["route"]
+                        }
                     )
-                    
-                    # Update incident ETA
-                    await incident_service.update_eta(incident.id, new_eta)
-                    
-                    # Simulate time saved (random between 30-180 seconds)
-                    import random
-                    time_saved = random.randint(30, 180)
-                    total_time_saved += time_saved
-                    
-                    optimized_routes.append({
-                        "incident_id": incident.id,
-                        "vehicle_id": vehicle_id,
-                        "new_eta": new_eta,
-                        "time_saved": time_saved,
-                        "route": vehicle_route.route
-                    })
-                    
-                    # Broadcast route optimization update
-                    if background_tasks:
-                        background_tasks.add_task(
-                            websocket_service.broadcast_route_optimization,
-                            incident.id,
-                            vehicle_id,
-                            {
-                                "new_eta": new_eta,
-                                "time_saved": time_saved,
-                                "route": vehicle_route.route
-                            }
-                        )
         
         # Broadcast overall optimization notification
         if background_tasks and optimized_routes:
@@ -118,7 +155,8 @@ async def optimize_routes(
         return {
             "optimized_routes": optimized_routes,
             "total_time_saved": total_time_saved,
-            "message": f"Route optimization completed for {len(active_incidents)} incidents"
+            "message": f"Route optimization completed for {len(active_incidents) - skipped} incidents",
+            "skipped_incidents": skipped
         }
         
     except Exception as e:
@@ -147,7 +185,9 @@ async def get_current_route(vehicle_id: str, db = Depends(get_db)):
     
     try:
         # Calculate current route
-        vehicle_route = await route_service.calculate_route(vehicle, incident)
+        vehicle_route = await work_scheduler.run(
+            incident.priority, route_service.calculate_route, vehicle, incident
+        )
         return {
             "vehicle_id": vehicle_id,
             "incident_id": incident.id,
@@ -155,6 +195,8 @@ async def get_current_route(vehicle_id: str, db = Depends(get_db)):
             "current_location": vehicle.location.coordinates,
             "destination": incident.location.coordinates
         }
+    except SchedulerOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get current route: {str(e)}")
 
@@ -184,7 +226,9 @@ async def recalculate_vehicle_route(
     
     try:
         # Recalculate route and ETA
-        new_eta = await route_service.recalculate_eta(vehicle, incident)
+        new_eta = await work_scheduler.run(
+            incident.priority, route_service.recalculate_eta, vehicle, incident
+        )
         
         # Update vehicle ETA
         await vehicle_service.update_vehicle_status(
@@ -212,6 +256,8 @@ async def recalculate_vehicle_route(
             "new_eta": new_eta
         }
         
+    except SchedulerOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to recalculate route: {str(e)}")
 
@@ -256,13 +302,23 @@ async def find_nearest_vehicles(
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
     
-    # Get available vehicles
-    available_vehicles = await vehicle_service.get_available_vehicles()
-    
     try:
-        nearest_vehicles = await route_service.find_nearest_available_vehicles(
-            incident, available_vehicles, max_distance_km
-        )
+        if fleet_snapshot.loaded:
+            # Rank candidates on the columnar snapshot, then load only the winners
+            types = None if incident.priority == "critical" else [incident.type]
+            ranked = fleet_snapshot.nearest(
+                incident.location.coordinates,
+                types=types,
+                max_distance_m=max_distance_km * 1000
+            )
+            distances = dict(ranked)
+            vehicles = await vehicle_service.get_vehicles_by_ids([vehicle_id for vehicle_id, _ in ranked])
+            nearest_vehicles = [(vehicle, distances[vehicle.id]) for vehicle in vehicles]
+        else:
+            available_vehicles = await vehicle_service.get_available_vehicles()
+            nearest_vehicles = await route_service.find_nearest_available_vehicles(
+                incident, available_vehicles, max_distance_km
+            )
         
         # Format response with distance information
         result = []
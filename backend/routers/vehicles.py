@@ -1,13 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
 
 from models.emergency import (
     Vehicle, VehicleCreate, VehicleStatus, VehicleStatusUpdate,
-    EmergencyType, Location
+    EmergencyType, Location, VehicleProjection
 )
 from services.vehicle_service import VehicleService
+from services.fleet_snapshot import fleet_snapshot
 from services.websocket_service import websocket_service
+from services.serialization import (
+    trusted_response, parse_fields, VEHICLE_FIELDS, VEHICLE_FIELD_PRESETS
+)
 from dependencies import get_db
 
 router = APIRouter(prefix="/vehicles", tags=["vehicles"])
@@ -41,24 +45,51 @@ async def create_vehicle(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create vehicle: {str(e)}")
 
-@router.get("/", response_model=List[Vehicle])
+@router.get(
+    "/",
+    response_model=List[Union[Vehicle, VehicleProjection]],
+    response_model_exclude_unset=True
+)
 async def get_vehicles(
     status: Optional[VehicleStatus] = None,
     type: Optional[EmergencyType] = None,
     limit: int = 100,
+    fields: Optional[str] = None,
     db = Depends(get_db)
 ):
-    """Retrieve vehicles with optional filtering"""
+    """Retrieve vehicles with optional filtering.
+    
+    `fields` takes a comma-separated list of fields (or the `map` preset)
+    and returns sparse vehicles containing only those fields.
+    """
     vehicle_service = VehicleService(db)
     
+    try:
+        selected_fields = parse_fields(fields, VEHICLE_FIELDS, VEHICLE_FIELD_PRESETS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         vehicles = await vehicle_service.get_vehicles(
-            status=status, type=type, limit=limit
+            status=status, type=type, limit=limit,
+            fields=selected_fields, trusted=True
         )
-        return vehicles
+        return trusted_response(vehicles)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve vehicles: {str(e)}")
 
+@router.get("/snapshot")
+async def get_fleet_snapshot(
+    status: Optional[VehicleStatus] = None,
+    type: Optional[EmergencyType] = None,
+    db = Depends(get_db)
+):
+    """Get a compact columnar snapshot of the fleet for map refreshes"""
+    if not fleet_snapshot.loaded:
+        await fleet_snapshot.load(db.vehicles)
+    
+    return fleet_snapshot.to_columns(status=status, type=type)
+
 @router.get("/{vehicle_id}", response_model=Vehicle)
 async def get_vehicle(vehicle_id: str, db = Depends(get_db)):
     """Get a specific vehicle by ID"""
@@ -91,6 +122,7 @@ async def update_vehicle_status(
             vehicle_id,
             {
                 "coordinates": status_update.location.coordinates,
+                "district": status_update.location.district,
                 "heading": status_update.location.heading or 0,
                 "speed": vehicle.speed,
                 "status": status_update.status
@@ -121,6 +153,7 @@ async def update_vehicle_location(
             vehicle_id,
             {
                 "coordinates": location.coordinates,
+                "district": location.district,
                 "heading": location.heading or 0,
                 "speed": speed or 0
             }
@@ -169,8 +202,8 @@ async def get_available_vehicles_by_type(
     vehicle_service = VehicleService(db)
     
     try:
-        vehicles = await vehicle_service.get_available_vehicles(emergency_type)
-        return vehicles
+        vehicles = await vehicle_service.get_available_vehicles(emergency_type, trusted=True)
+        return trusted_response(vehicles)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get available vehicles: {str(e)}")
 
@@ -180,8 +213,8 @@ async def get_vehicles_by_incident(incident_id: str, db = Depends(get_db)):
     vehicle_service = VehicleService(db)
     
     try:
-        vehicles = await vehicle_service.get_vehicles_by_incident(incident_id)
-        return vehicles
+        vehicles = await vehicle_service.get_vehicles_by_incident(incident_id, trusted=True)
+        return trusted_response(vehicles)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get vehicles for incident: {str(e)}")
 
@@ -202,8 +235,8 @@ async def get_vehicles_needing_maintenance(db = Depends(get_db)):
     vehicle_service = VehicleService(db)
     
     try:
-        vehicles = await vehicle_service.get_vehicles_needing_maintenance()
-        return vehicles
+        vehicles = await vehicle_service.get_vehicles_needing_maintenance(trusted=True)
+        return trusted_response(vehicles)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get maintenance info: {str(e)}")
 
@@ -213,7 +246,7 @@ async def search_vehicles(query: str, db = Depends(get_db)):
     vehicle_service = VehicleService(db)
     
     try:
-        vehicles = await vehicle_service.search_vehicles(query)
-        return vehicles
+        vehicles = await vehicle_service.search_vehicles(query, trusted=True)
+        return trusted_response(vehicles)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
\ No newline at end of file
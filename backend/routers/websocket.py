@@ -14,11 +14,15 @@ logger = logging.getLogger(__name__)
 async def websocket_endpoint(
     websocket: WebSocket,
     client_id: Optional[str] = None,
+    encoding: Optional[str] = None,
     db = Depends(get_db)
 ):
-    """WebSocket endpoint for real-time communication"""
+    """WebSocket endpoint for real-time communication.
+
+    Pass `encoding=msgpack` to receive compact binary frames instead of JSON.
+    """
     try:
-        await websocket_service.handle_websocket(websocket, client_id)
+        await websocket_service.handle_websocket(websocket, client_id, encoding)
     except WebSocketDisconnect:
         logger.info(f"WebSocket client disconnected")
     except Exception as e:
@@ -35,14 +39,14 @@ async def broadcast_test_message(
     message_data: dict,
     exclude_client: Optional[str] = None
 ):
-    """Broadcast a test message to all connected clients (for testing)"""
+    """Broadcast a test message to all connected clients of every worker (for testing)"""
     message = {
         "type": message_type,
         "data": message_data,
         "timestamp": datetime.utcnow().isoformat()
     }
     
-    await websocket_service.manager.broadcast_message(message, exclude_client)
+    await websocket_service.broadcast_to_all(message, exclude_client)
     
     return {
         "message": "Broadcast sent",
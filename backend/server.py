@@ -2,13 +2,23 @@ from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
+import asyncio
 import logging
 from pathlib import Path
 from contextlib import asynccontextmanager
 
 # Import routers
-from routers import incidents, vehicles, routes, websocket
+from routers import incidents, vehicles, routes, websocket, heatmap
 from dependencies import get_database
+from services.fleet_snapshot import fleet_snapshot
+from services.stats_service import run_reconciliation, OPEN_STATUSES
+from services.duplicate_index import duplicate_index
+from services.response_analytics import response_analytics
+from services.scheduler import work_scheduler
+from services.archive_service import run_archiver
+from services.heatmap_service import heatmap_index
+from services.websocket_service import websocket_service
+from services.state_store import state_store
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -27,13 +37,49 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Emergency Routing System API...")
     
     # Initialize database connection
-    await get_database()
+    db = await get_database()
     logger.info("Database connection established")
     
+    # Build the in-memory fleet snapshot used by hot read paths
+    await fleet_snapshot.load(db.vehicles)
+    
+    # Rebuild response-time aggregates from recent transition events
+    await response_analytics.load(db.response_events)
+    
+    # Index recent open incidents for duplicate-call detection
+    await duplicate_index.load(db.incidents, OPEN_STATUSES)
+    
+    # Rebuild the incident heatmap bins
+    await heatmap_index.load(db.incidents)
+    
+    # Priority-aware worker pool for dispatch and routing work
+    work_scheduler.start()
+    
+    # Mirror the fleet and open incidents for WebSocket state sync
+    await state_store.load(db.vehicles, db.incidents, OPEN_STATUSES)
+    
+    # Batch vehicle location broadcasts and state deltas per flush tick
+    websocket_service.start(db)
+    
+    # Reconcile the materialized stats counters now and periodically after
+    reconcile_interval = float(os.environ.get('STATS_RECONCILE_INTERVAL', '300'))
+    
+    # Move aged closed incidents to the archive collection
+    archive_interval = float(os.environ.get('ARCHIVE_INTERVAL', '3600'))
+    
+    background_jobs = [
+        asyncio.create_task(run_reconciliation(db, reconcile_interval)),
+        asyncio.create_task(run_archiver(db, archive_interval))
+    ]
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Emergency Routing System API...")
+    for job in background_jobs:
+        job.cancel()
+    await work_scheduler.stop()
+    await websocket_service.stop()
 
 # Create the main app
 app = FastAPI(
@@ -68,6 +114,7 @@ api_router.include_router(incidents.router)
 api_router.include_router(vehicles.router)
 api_router.include_router(routes.router)
 api_router.include_router(websocket.router)
+api_router.include_router(heatmap.router)
 
 # Include the main API router in the app
 app.include_router(api_router)
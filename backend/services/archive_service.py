@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+
+from models.emergency import IncidentStatus
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = float(os.environ.get("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "500"))
+
+# Pause between batches so a large backlog drains without starving live traffic
+ARCHIVE_BATCH_PAUSE_SECONDS = float(os.environ.get("ARCHIVE_BATCH_PAUSE_SECONDS", "0.5"))
+
+ARCHIVED_STATUSES = [IncidentStatus.RESOLVED.value, IncidentStatus.CANCELLED.value]
+
+class ArchiveService:
+    """Moves closed incidents from `incidents` into `incidents_archive`.
+
+    Each batch is copied with idempotent upserts before the live copies
+    are deleted, so a crash mid-batch leaves at worst a duplicate that
+    the next run cleans up, never a lost incident. The delete repeats the
+    archive conditions, so an incident reopened during the copy stays
+    live and its stale archive copy is dropped.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.collection = db.incidents
+        self.archive = db.incidents_archive
+
+    def _archivable(self, cutoff: datetime) -> dict:
+        return {"status": {"$in": ARCHIVED_STATUSES}, "last_update": {"$lt": cutoff}}
+
+    async def archive_batch(self, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        """Move one batch of closed incidents last updated before `cutoff`"""
+        filter_dict = self._archivable(cutoff)
+        incidents = await self.collection.find(filter_dict, {"_id": 0}).sort(
+            "last_update", 1
+        ).limit(batch_size).to_list(length=batch_size)
+        if not incidents:
+            return 0
+
+        await self.archive.bulk_write(
+            [ReplaceOne({"id": incident["id"]}, incident, upsert=True) for incident in incidents],
+            ordered=False
+        )
+
+        incident_ids = [incident["id"] for incident in incidents]
+        result = await self.collection.delete_many({"id": {"$in": incident_ids}, **filter_dict})
+
+        if result.deleted_count < len(incident_ids):
+            # Some were reopened after the copy; their live version wins
+            still_live = await self.collection.distinct("id", {"id": {"$in": incident_ids}})
+            await self.archive.delete_many({"id": {"$in": still_live}})
+
+        return result.deleted_count
+
+    async def run_once(
+        self,
+        older_than: timedelta = timedelta(days=ARCHIVE_AFTER_DAYS),
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+        pause_seconds: float = ARCHIVE_BATCH_PAUSE_SECONDS
+    ) -> int:
+        """Archive everything currently eligible, one paced batch at a time"""
+        cutoff = datetime.utcnow() - older_than
+        total = 0
+        while True:
+            moved = await self.archive_batch(cutoff, batch_size)
+            total += moved
+            if moved < batch_size:
+                break
+            await asyncio.sleep(pause_seconds)
+
+        if total:
+            logger.info(f"Archived {total} closed incidents last updated before {cutoff.isoformat()}")
+        return total
+
+async def run_archiver(db: AsyncIOMotorDatabase, interval_seconds: float):
+    """Periodically archive closed incidents until cancelled"""
+    archive_service = ArchiveService(db)
+    while True:
+        try:
+            await archive_service.run_once()
+        except Exception as e:
+            logger.error(f"Incident archiving failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import random
+from datetime import datetime
+from typing import Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+
+from models.emergency import Incident, Vehicle, VehicleStatus
+from services.fleet_snapshot import fleet_snapshot
+from services.incident_service import IncidentService
+from services.response_analytics import DISPATCH
+from services.serialization import DEFAULT_PROJECTION
+from services.state_store import state_store, VEHICLE, INCIDENT
+from services.stats_service import StatsService, OPEN_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Mongo error codes meaning "this deployment cannot run transactions" (standalone server)
+TRANSACTIONS_UNSUPPORTED_CODES = {20, 263}
+
+# Attempts at an assignment transaction that keeps losing write conflicts to concurrent ones
+TRANSACTION_ATTEMPTS = 5
+
+INCIDENT_NOT_FOUND = "incident_not_found"
+VEHICLE_NOT_FOUND = "vehicle_not_found"
+VEHICLE_UNAVAILABLE = "vehicle_unavailable"
+
+class AssignmentError(Exception):
+    """An assignment was refused; `reason` says why"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+class _IncidentClosed(Exception):
+    """Aborts the assignment transaction when the incident update matches nothing"""
+
+# Unknown until the first assignment; standalone servers flip it to False
+_transactions_supported: Optional[bool] = None
+
+class AssignmentService:
+    """Assigns a vehicle to an incident in one conditional write per collection.
+
+    The vehicle update only matches while the unit is `available`, so two
+    concurrent dispatches cannot both take it. On replica sets the vehicle
+    and incident writes share a transaction; standalone servers fall back
+    to writing the vehicle first and releasing it again if the incident
+    write fails.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.incident_service = IncidentService(db)
+        self.stats = StatsService(db)
+
+    async def assign(
+        self,
+        incident_id: str,
+        vehicle_id: str,
+        eta: Optional[str] = None
+    ) -> Tuple[Incident, Vehicle]:
+        """Dispatch an available vehicle to an open incident.
+
+        Returns the updated incident and vehicle, or raises AssignmentError.
+        """
+        global _transactions_supported
+        now = datetime.utcnow()
+
+        incident = vehicle = None
+        if _transactions_supported is not False:
+            try:
+                incident, vehicle = await self._assign_in_transaction(incident_id, vehicle_id, eta, now)
+                _transactions_supported = True
+            except OperationFailure as e:
+                if e.code not in TRANSACTIONS_UNSUPPORTED_CODES:
+                    raise
+                logger.info("MongoDB transactions unavailable; assignments will use compensating writes")
+                _transactions_supported = False
+
+        if _transactions_supported is False:
+            incident, vehicle = await self._assign_with_compensation(incident_id, vehicle_id, eta, now)
+
+        if vehicle is None:
+            await self._raise_vehicle_error(vehicle_id)
+        if incident is None:
+            raise AssignmentError(INCIDENT_NOT_FOUND, "Incident not found or already closed")
+
+        fleet_snapshot.apply_update(vehicle_id, self._vehicle_update(incident_id, eta, now))
+        state_store.upsert(VEHICLE, vehicle_id, vehicle)
+        state_store.upsert(INCIDENT, incident_id, incident)
+        await self.stats.vehicle_status_changed(VehicleStatus.AVAILABLE, VehicleStatus.DISPATCHED)
+        if incident.get("dispatched_at") is None:
+            await self.incident_service.mark_transition(incident_id, "dispatched_at", DISPATCH, now)
+            incident["dispatched_at"] = now
+
+        return Incident(**incident), Vehicle(**vehicle)
+
+    def _vehicle_update(self, incident_id: str, eta: Optional[str], now: datetime) -> dict:
+        return {
+            "current_incident": incident_id,
+            "status": VehicleStatus.DISPATCHED,
+            "eta": eta,
+            "last_update": now
+        }
+
+    def _reserve_vehicle(self, incident_id: str, vehicle_id: str, eta: Optional[str], now: datetime, session=None):
+        return self.db.vehicles.find_one_and_update(
+            {"id": vehicle_id, "status": VehicleStatus.AVAILABLE},
+            {"$set": self._vehicle_update(incident_id, eta, now)},
+            projection=DEFAULT_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+
+    def _attach_vehicle(self, incident_id: str, vehicle_id: str, now: datetime, session=None):
+        return self.db.incidents.find_one_and_update(
+            {"id": incident_id, "status": {"$in": OPEN_STATUSES}},
+            {
+                "$addToSet": {"assigned_vehicles": vehicle_id},
+                "$set": {"last_update": now}
+            },
+            projection=DEFAULT_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+
+    async def _assign_in_transaction(self, incident_id: str, vehicle_id: str, eta: Optional[str], now: datetime):
+        """Run the assignment transaction, retrying it while it fails transiently.
+
+        Concurrent assignments touching the same vehicle or incident abort
+        each other with write conflicts (labelled TransientTransactionError);
+        the loser reruns, and its conditional writes then see the winner's
+        outcome. A race still lost after every attempt is refused like an
+        unavailable vehicle.
+        """
+        for attempt in range(TRANSACTION_ATTEMPTS):
+            try:
+                return await self._run_transaction(incident_id, vehicle_id, eta, now)
+            except PyMongoError as e:
+                if not e.has_error_label("TransientTransactionError"):
+                    raise
+                logger.debug(f"Assignment of {vehicle_id} to {incident_id} conflicted (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+        raise AssignmentError(VEHICLE_UNAVAILABLE, "Vehicle or incident is being assigned concurrently; try again")
+
+    async def _run_transaction(self, incident_id: str, vehicle_id: str, eta: Optional[str], now: datetime):
+        async with await self.db.client.start_session() as session:
+            try:
+                async with session.start_transaction():
+                    vehicle = await self._reserve_vehicle(incident_id, vehicle_id, eta, now, session)
+                    if vehicle is None:
+                        return None, None
+                    incident = await self._attach_vehicle(incident_id, vehicle_id, now, session)
+                    if incident is None:
+                        raise _IncidentClosed()
+                    return incident, vehicle
+            except _IncidentClosed:
+                # Transaction aborted: the vehicle reservation was rolled back
+                return None, vehicle
+
+    async def _assign_with_compensation(self, incident_id: str, vehicle_id: str, eta: Optional[str], now: datetime):
+        vehicle = await self._reserve_vehicle(incident_id, vehicle_id, eta, now)
+        if vehicle is None:
+            return None, None
+
+        incident = await self._attach_vehicle(incident_id, vehicle_id, now)
+        if incident is None:
+            # Release the unit, unless something else has already moved it on
+            await self.db.vehicles.update_one(
+                {"id": vehicle_id, "current_incident": incident_id, "status": VehicleStatus.DISPATCHED},
+                {"$set": {
+                    "current_incident": None,
+                    "status": VehicleStatus.AVAILABLE,
+                    "eta": None,
+                    "last_update": datetime.utcnow()
+                }}
+            )
+        return incident, vehicle
+
+    async def _raise_vehicle_error(self, vehicle_id: str):
+        """Explain a failed reservation (only runs on the failure path)"""
+        vehicle = await self.db.vehicles.find_one({"id": vehicle_id}, {"_id": 0, "status": 1})
+        if vehicle is None:
+            raise AssignmentError(VEHICLE_NOT_FOUND, "Vehicle not found")
+        raise AssignmentError(VEHICLE_UNAVAILABLE, f"Vehicle is not available (status: {vehicle['status']})")
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models.emergency import EmergencyType, Incident, Priority, Vehicle
+from services.assignment_service import AssignmentError, AssignmentService, INCIDENT_NOT_FOUND
+from services.fleet_snapshot import fleet_snapshot
+from services.incident_service import IncidentService
+from services.response_analytics import MILLISECOND_BIN_EDGES, StreamingHistogram
+from services.route_service import RouteService
+from services.scheduler import SchedulerOverloaded, work_scheduler
+from services.vehicle_service import VehicleService
+from services.websocket_service import websocket_service
+
+logger = logging.getLogger(__name__)
+
+AUTO_DISPATCH_ENABLED = os.environ.get("AUTO_DISPATCH_ENABLED", "true").lower() in ("1", "true", "yes")
+AUTO_DISPATCH_MAX_DISTANCE_KM = float(os.environ.get("AUTO_DISPATCH_MAX_DISTANCE_KM", "15"))
+
+# Target for incident creation (or escalation) -> first unit assigned
+DISPATCH_LATENCY_TARGET_MS = 1000
+
+# Units sent per incident priority
+UNITS_PER_PRIORITY = {
+    Priority.CRITICAL: 2,
+    Priority.HIGH: 1,
+    Priority.MEDIUM: 1,
+    Priority.LOW: 1,
+}
+
+# Equipment a unit must carry to be auto-dispatched to an incident type
+REQUIRED_EQUIPMENT: Dict[EmergencyType, List[str]] = {
+    EmergencyType.FIRE: ["Hose"],
+    EmergencyType.MEDICAL: ["Defibrillator"],
+}
+
+# Nearest units considered per unit needed, to allow for equipment misses and lost races
+CANDIDATES_PER_UNIT = 4
+
+class DispatchMetrics:
+    """Creation-to-assignment latency and outcome counters.
+
+    Escalations are timed from the escalating report, not from the
+    original incident's creation.
+    """
+
+    def __init__(self):
+        self.latency_ms = StreamingHistogram(MILLISECOND_BIN_EDGES)
+        self.within_target = 0
+        self.dispatched_incidents = 0
+        self.assigned_units = 0
+        self.unfilled_incidents = 0
+        self.reservation_conflicts = 0
+        self.failures = 0
+        self.deferred = 0
+
+    def record_assignment(self, latency_ms: float):
+        self.latency_ms.add(latency_ms)
+        if latency_ms <= DISPATCH_LATENCY_TARGET_MS:
+            self.within_target += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        latency = self.latency_ms.summary()
+        return {
+            "enabled": AUTO_DISPATCH_ENABLED,
+            "target_ms": DISPATCH_LATENCY_TARGET_MS,
+            "creation_to_assignment_ms": latency,
+            "within_target_ratio": (self.within_target / latency["count"]) if latency["count"] else None,
+            "dispatched_incidents": self.dispatched_incidents,
+            "assigned_units": self.assigned_units,
+            "unfilled_incidents": self.unfilled_incidents,
+            "reservation_conflicts": self.reservation_conflicts,
+            "failures": self.failures,
+            "deferred": self.deferred
+        }
+
+class DispatchService:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.incident_service = IncidentService(db)
+        self.vehicle_service = VehicleService(db)
+        self.assignment_service = AssignmentService(db)
+        self.route_service = RouteService()
+
+    def _has_equipment(self, vehicle: Vehicle, incident: Incident) -> bool:
+        required = REQUIRED_EQUIPMENT.get(incident.type, [])
+        return all(item in vehicle.equipment for item in required)
+
+    async def find_candidates(self, incident: Incident, units: int) -> List[Vehicle]:
+        """Available units of the incident's type that carry the required equipment, nearest first"""
+        if not fleet_snapshot.loaded:
+            await fleet_snapshot.load(self.db.vehicles)
+
+        ranked = fleet_snapshot.nearest(
+            incident.location.coordinates,
+            types=[incident.type],
+            max_distance_m=AUTO_DISPATCH_MAX_DISTANCE_KM * 1000,
+            limit=units * CANDIDATES_PER_UNIT
+        )
+        vehicles = await self.vehicle_service.get_vehicles_by_ids([vehicle_id for vehicle_id, _ in ranked])
+        return [vehicle for vehicle in vehicles if self._has_equipment(vehicle, incident)]
+
+    async def dispatch_incident(self, incident: Incident, requested_at: Optional[datetime] = None) -> List[str]:
+        """Reserve the nearest suitable units for an incident and route them.
+
+        Units already assigned count towards the incident's quota, so an
+        incident escalated to a higher priority only gets the extra units.
+        Latency is measured from `requested_at` (the incident's creation
+        unless given).
+        """
+        units = UNITS_PER_PRIORITY.get(incident.priority, 1) - len(incident.assigned_vehicles)
+        if units <= 0:
+            return []
+        candidates = await self.find_candidates(incident, units)
+        traffic_factor = self.route_service.get_traffic_factor()
+
+        # Reserve first; routing and broadcasts must not delay the next unit
+        assigned: List[Tuple[Vehicle, str]] = []
+        for vehicle in candidates:
+            if len(assigned) >= units:
+                break
+
+            distance = self.route_service.calculate_distance(
+                vehicle.location.coordinates, incident.location.coordinates
+            )
+            eta = self.route_service.format_eta_display(
+                self.route_service.estimate_travel_time(distance, traffic_factor)
+            )
+
+            # Conditional assignment: loses cleanly if someone else took the unit first
+            try:
+                _, reserved = await self.assignment_service.assign(incident.id, vehicle.id, eta)
+            except AssignmentError as e:
+                if e.reason == INCIDENT_NOT_FOUND:
+                    break  # closed while we were dispatching
+                dispatch_metrics.reservation_conflicts += 1
+                continue
+
+            if not assigned:
+                latency_ms = (datetime.utcnow() - (requested_at or incident.timestamp)).total_seconds() * 1000
+                dispatch_metrics.record_assignment(latency_ms)
+            assigned.append((reserved, eta))
+
+        dispatch_metrics.dispatched_incidents += 1
+        dispatch_metrics.assigned_units += len(assigned)
+        if len(assigned) < units:
+            dispatch_metrics.unfilled_incidents += 1
+            logger.warning(f"Auto-dispatch filled {len(assigned)}/{units} units for incident {incident.id}")
+
+        if assigned:
+            # Candidates are in distance order, so the first unit sets the incident ETA
+            await self.incident_service.update_eta(incident.id, assigned[0][1])
+
+        for vehicle, eta in assigned:
+            await websocket_service.broadcast_incident_update(
+                incident.id,
+                "vehicle_assigned",
+                {"vehicle_id": vehicle.id, "vehicle_call_sign": vehicle.call_sign, "auto_dispatched": True}
+            )
+            route = await self.route_service.calculate_route(vehicle, incident)
+            await websocket_service.broadcast_route_optimization(
+                incident.id,
+                vehicle.id,
+                {"new_eta": eta, "route": route.route}
+            )
+
+        return [vehicle.id for vehicle, _ in assigned]
+
+async def _run_dispatch(db: AsyncIOMotorDatabase, incident: Incident, requested_at: Optional[datetime]):
+    try:
+        await DispatchService(db).dispatch_incident(incident, requested_at)
+    except Exception as e:
+        dispatch_metrics.failures += 1
+        logger.error(f"Auto-dispatch failed for incident {incident.id}: {e}")
+
+def _dispatch_done(incident: Incident, future: asyncio.Future):
+    if not future.cancelled() and isinstance(future.exception(), SchedulerOverloaded):
+        dispatch_metrics.deferred += 1
+        logger.warning(f"Auto-dispatch for incident {incident.id} was not scheduled: {future.exception()}")
+
+def schedule_auto_dispatch(
+    db: AsyncIOMotorDatabase,
+    incident: Incident,
+    requested_at: Optional[datetime] = None
+) -> Optional[asyncio.Future]:
+    """Queue auto-dispatch for a new incident at its priority without blocking the request.
+
+    Pass `requested_at` when the dispatch is for a later change (an
+    escalation), so the latency metric is not charged with the incident's age.
+    """
+    if not AUTO_DISPATCH_ENABLED:
+        return None
+    future = work_scheduler.submit(incident.priority, _run_dispatch, db, incident, requested_at)
+    future.add_done_callback(partial(_dispatch_done, incident))
+    return future
+
+# Global auto-dispatch metrics
+dispatch_metrics = DispatchMetrics()
@@ -0,0 +1,122 @@
+import logging
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_DEGREE_LAT = 111320
+
+# (incident_id, latitude, longitude, created_at)
+Entry = Tuple[str, float, float, datetime]
+
+def _value(value) -> str:
+    return value.value if hasattr(value, "value") else value
+
+class DuplicateIndex:
+    """In-memory spatio-temporal index of recent open incidents.
+
+    Incidents are bucketed by (type, grid row, grid column, time bucket),
+    with cells as wide as the match radius and time buckets as long as the
+    match window. A lookup therefore only checks the 3x3 neighbouring cells
+    in the current and previous time bucket: constant work regardless of
+    how many incidents are open.
+    """
+
+    def __init__(self, radius_meters: float = 150, window: timedelta = timedelta(minutes=20)):
+        self.radius_meters = radius_meters
+        self.window = window
+        self.cell_degrees = radius_meters / METERS_PER_DEGREE_LAT
+        self.cells: Dict[Tuple[str, int, int, int], List[Entry]] = {}
+        self.entries: Dict[str, Tuple[str, int, int, int]] = {}
+        self.oldest_bucket = 0
+
+    def _bucket(self, at: datetime) -> int:
+        return int(at.timestamp() // self.window.total_seconds())
+
+    def _row(self, latitude: float) -> int:
+        return math.floor(latitude / self.cell_degrees)
+
+    def _column(self, row: int, longitude: float) -> int:
+        # Columns narrow with latitude so cells stay roughly square in meters
+        row_latitude = (row + 0.5) * self.cell_degrees
+        return math.floor(longitude * math.cos(math.radians(row_latitude)) / self.cell_degrees)
+
+    def _distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """Equirectangular distance in meters (accurate at these ranges)"""
+        x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+        y = math.radians(lat2 - lat1)
+        return math.hypot(x, y) * 6371000
+
+    def add(self, incident_id: str, incident_type, coordinates: List[float], created_at: datetime):
+        """Index an open incident"""
+        latitude, longitude = coordinates[0], coordinates[1]
+        row = self._row(latitude)
+        key = (_value(incident_type), row, self._column(row, longitude), self._bucket(created_at))
+
+        self.cells.setdefault(key, []).append((incident_id, latitude, longitude, created_at))
+        self.entries[incident_id] = key
+        self._prune(key[3])
+
+    def remove(self, incident_id: str):
+        """Drop an incident, e.g. once it is resolved or cancelled"""
+        key = self.entries.pop(incident_id, None)
+        if key is None:
+            return
+        entries = [entry for entry in self.cells.get(key, []) if entry[0] != incident_id]
+        if entries:
+            self.cells[key] = entries
+        else:
+            self.cells.pop(key, None)
+
+    def _prune(self, current_bucket: int):
+        """Forget buckets that can no longer match (runs once per bucket rollover)"""
+        if current_bucket - 1 <= self.oldest_bucket:
+            return
+        self.oldest_bucket = current_bucket - 1
+        for key in [key for key in self.cells if key[3] < self.oldest_bucket]:
+            for entry in self.cells.pop(key):
+                self.entries.pop(entry[0], None)
+
+    def find(self, incident_type, coordinates: List[float], at: datetime) -> Optional[str]:
+        """ID of the closest open incident of the same type within radius and window"""
+        latitude, longitude = coordinates[0], coordinates[1]
+        incident_type = _value(incident_type)
+        bucket = self._bucket(at)
+        row = self._row(latitude)
+
+        best_id, best_distance = None, self.radius_meters
+        for row_offset in (-1, 0, 1):
+            candidate_row = row + row_offset
+            column = self._column(candidate_row, longitude)
+            for column_offset in (-1, 0, 1):
+                for candidate_bucket in (bucket, bucket - 1):
+                    key = (incident_type, candidate_row, column + column_offset, candidate_bucket)
+                    for incident_id, lat, lon, created_at in self.cells.get(key, ()):
+                        if at - created_at > self.window:
+                            continue
+                        distance = self._distance(latitude, longitude, lat, lon)
+                        if distance <= best_distance:
+                            best_id, best_distance = incident_id, distance
+        return best_id
+
+    async def load(self, collection, open_statuses: List[str]) -> int:
+        """Index the open incidents created inside the match window"""
+        cutoff = datetime.utcnow() - self.window
+        cursor = collection.find(
+            {"status": {"$in": open_statuses}, "timestamp": {"$gte": cutoff}},
+            {"_id": 0, "id": 1, "type": 1, "location.coordinates": 1, "timestamp": 1}
+        )
+        count = 0
+        async for incident in cursor:
+            self.add(incident["id"], incident["type"], incident["location"]["coordinates"], incident["timestamp"])
+            count += 1
+        logger.info(f"Duplicate index loaded with {count} open incidents")
+        return count
+
+# Global duplicate-call index
+duplicate_index = DuplicateIndex(
+    radius_meters=float(os.environ.get("DUPLICATE_RADIUS_METERS", "150")),
+    window=timedelta(minutes=float(os.environ.get("DUPLICATE_WINDOW_MINUTES", "20")))
+)
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from services.response_analytics import MICROSECOND_BIN_EDGES, StreamingHistogram
+
+logger = logging.getLogger(__name__)
+
+# "unix" shares WebSocket events between worker processes on this host; "none" keeps them in-process
+WS_EVENT_BUS = os.environ.get("WS_EVENT_BUS", "unix")
+
+# Directory holding one datagram socket per worker
+WS_EVENT_BUS_DIR = os.environ.get("WS_EVENT_BUS_DIR", os.path.join(tempfile.gettempdir(), "emergency-routing-bus"))
+
+# How often a publisher re-lists the directory to pick up new workers
+PEER_REFRESH_SECONDS = 5.0
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class EventBus:
+    """Fan-out of WebSocket events to the other worker processes.
+
+    This base class is the single-process bus: publishing is a no-op
+    because the local ConnectionManager has already delivered the event.
+    Subclasses deliver each published envelope to every other worker,
+    whose handler fans it out to its own clients.
+    """
+
+    name = "none"
+
+    def __init__(self):
+        self.node_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.handler: Optional[Handler] = None
+        self.published = 0
+        self.received = 0
+        self.send_errors = 0
+        # Publish-to-delivery latency across processes, in microseconds
+        self.latency_us = StreamingHistogram(MICROSECOND_BIN_EDGES)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self, handler: Handler):
+        self.handler = handler
+
+    async def stop(self):
+        pass
+
+    def publish(self, envelope: Dict[str, Any]):
+        self.published += 1
+
+    def _deliver(self, data: bytes):
+        """Decode an envelope from another worker and hand it to the handler"""
+        try:
+            envelope = json.loads(data)
+        except ValueError:
+            self.send_errors += 1
+            return
+        if envelope.get("origin") == self.node_id or self.handler is None:
+            return
+
+        self.received += 1
+        self.latency_us.add(max(time.time() - envelope.get("sent_at", time.time()), 0) * 1e6)
+        task = asyncio.create_task(self.handler(envelope))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def get_peer_count(self) -> int:
+        return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "type": self.name,
+            "node": self.node_id,
+            "peers": self.get_peer_count(),
+            "published": self.published,
+            "received": self.received,
+            "send_errors": self.send_errors,
+            "publish_latency_us": self.latency_us.summary()
+        }
+
+class UnixDatagramBus(EventBus):
+    """Peer-to-peer bus over Unix datagram sockets; no broker process.
+
+    Each worker binds its own socket in a shared directory and publishes
+    by sending one datagram to every other socket there. Sends never
+    block: a peer whose receive buffer is full misses the event (counted
+    as a send error) rather than stalling the publisher. Sockets left
+    behind by dead workers are removed on the first failed send.
+    """
+
+    name = "unix"
+
+    def __init__(self, directory: str = WS_EVENT_BUS_DIR):
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{self.node_id}.sock")
+        self.sock: Optional[socket.socket] = None
+        self.peers: List[str] = []
+        self.peers_refreshed = 0.0
+
+    def start(self, handler: Handler):
+        super().start(handler)
+        os.makedirs(self.directory, exist_ok=True)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.sock.bind(self.path)
+        asyncio.get_running_loop().add_reader(self.sock.fileno(), self._on_readable)
+        self._refresh_peers()
+        logger.info(f"WebSocket event bus listening on {self.path} ({len(self.peers)} peers)")
+
+    async def stop(self):
+        if self.sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self.sock.fileno())
+        self.sock.close()
+        self.sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _refresh_peers(self):
+        self.peers = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".sock") and os.path.join(self.directory, name) != self.path
+        ]
+        self.peers_refreshed = time.monotonic()
+
+    def _on_readable(self):
+        while self.sock is not None:
+            try:
+                data = self.sock.recv(65536 * 4)
+            except BlockingIOError:
+                return
+            self._deliver(data)
+
+    def publish(self, envelope: Dict[str, Any]):
+        if self.sock is None:
+            return
+        if time.monotonic() - self.peers_refreshed > PEER_REFRESH_SECONDS:
+            self._refresh_peers()
+        if not self.peers:
+            return
+
+        self.published += 1
+        data = json.dumps({**envelope, "origin": self.node_id, "sent_at": time.time()}, default=str).encode()
+        for peer in list(self.peers):
+            try:
+                self.sock.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The worker behind this socket is gone
+                self.peers.remove(peer)
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                self.send_errors += 1  # the peer's receive buffer is full
+            except OSError as e:
+                self.send_errors += 1
+                logger.warning(f"Event bus send to {peer} failed: {e}")
+
+    def get_peer_count(self) -> int:
+        return len(self.peers)
+
+BUSES = {"none": EventBus, "unix": UnixDatagramBus}
+
+def create_event_bus(kind: str = WS_EVENT_BUS) -> EventBus:
+    if kind not in BUSES:
+        raise ValueError(f"Unknown WebSocket event bus {kind}; expected one of {list(BUSES)}")
+    return BUSES[kind]()
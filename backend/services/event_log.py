@@ -0,0 +1,73 @@
+import itertools
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from services.state_store import process_epoch
+from services.ws_encoding import OutboundFrame
+
+# Published events kept for replay to reconnecting clients
+EVENT_BUFFER_SIZE = int(os.environ.get("WS_EVENT_BUFFER_SIZE", "4096"))
+
+class LoggedEvent:
+    """One published event as it went out, plus what its recipients were chosen by"""
+
+    __slots__ = ("seq", "topic", "frame", "location", "vehicles")
+
+    def __init__(
+        self,
+        seq: int,
+        topic: Optional[str],
+        frame: OutboundFrame,
+        location: Optional[Tuple[Optional[List[float]], Optional[str]]] = None,
+        vehicles: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.seq = seq
+        self.topic = topic            # None for events sent to every client
+        self.frame = frame            # keeps its encodings cached for replays
+        self.location = location      # (coordinates, district) for viewport-filtered events
+        self.vehicles = vehicles      # per-vehicle entries of a batched location frame
+
+class EventLog:
+    """Ring buffer of the last published events, numbered by a sequence.
+
+    Every published event takes the next sequence number, so a client that
+    remembers the last number it saw can be sent exactly what it missed
+    while disconnected. Sequence numbers are contiguous, which makes the
+    start of a replay an index computation rather than a search.
+    """
+
+    def __init__(self, size: int = EVENT_BUFFER_SIZE):
+        self.entries: Deque[LoggedEvent] = deque(maxlen=size)
+        self.seq = 0
+        # Sequence numbers are per process; resumes across epochs (restarts, other workers) need a snapshot
+        self.epoch = process_epoch()
+
+    def next_seq(self) -> int:
+        self.seq += 1
+        return self.seq
+
+    def append(self, event: LoggedEvent):
+        self.entries.append(event)
+
+    def since(self, seq: int, epoch: Optional[int] = None) -> Optional[List[LoggedEvent]]:
+        """Events after `seq`, or None if some of them are no longer buffered"""
+        if epoch is not None and epoch != self.epoch:
+            return None
+        if seq > self.seq or seq < 0:
+            return None
+        if seq == self.seq:
+            return []
+        if not self.entries or seq < self.entries[0].seq - 1:
+            return None
+        start = seq - self.entries[0].seq + 1
+        return list(itertools.islice(self.entries, start, None))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "buffered": len(self.entries),
+            "capacity": self.entries.maxlen,
+            "oldest_seq": self.entries[0].seq if self.entries else None
+        }
@@ -0,0 +1,249 @@
+import logging
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from models.emergency import EmergencyType, VehicleStatus
+
+logger = logging.getLogger(__name__)
+
+# Integer codes used in the columnar arrays (index into these tuples)
+STATUS_VALUES: Tuple[str, ...] = tuple(status.value for status in VehicleStatus)
+TYPE_VALUES: Tuple[str, ...] = tuple(emergency_type.value for emergency_type in EmergencyType)
+STATUS_CODES: Dict[str, int] = {value: code for code, value in enumerate(STATUS_VALUES)}
+TYPE_CODES: Dict[str, int] = {value: code for code, value in enumerate(TYPE_VALUES)}
+
+# Only the fields the snapshot keeps are pulled from Mongo
+SNAPSHOT_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "call_sign": 1,
+    "type": 1,
+    "status": 1,
+    "location.coordinates": 1,
+    "location.heading": 1,
+    "speed": 1,
+    "fuel": 1,
+}
+
+EARTH_RADIUS_METERS = 6371000
+
+def _code(value: Any) -> str:
+    """Normalize an enum member or raw string to its string value"""
+    return value.value if hasattr(value, "value") else value
+
+class FleetSnapshot:
+    """Columnar, array-backed view of the fleet for read-heavy hot paths.
+
+    Each vehicle occupies one row across a set of NumPy arrays. Rows are
+    addressed through an interned ID table, so filtering, counting and
+    serialization never build per-vehicle pydantic objects.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.ids: List[str] = []
+        self.call_signs: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.coordinates = np.zeros((capacity, 2), dtype=np.float64)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.type = np.zeros(capacity, dtype=np.int8)
+        self.fuel = np.zeros(capacity, dtype=np.float32)
+        self.speed = np.zeros(capacity, dtype=np.float32)
+        self.heading = np.zeros(capacity, dtype=np.float32)
+        self.size = 0
+        self.version = 0
+        self.loaded = False
+
+    def _grow(self, minimum: int):
+        """Grow the backing arrays geometrically to fit at least `minimum` rows"""
+        capacity = len(self.status)
+        if minimum <= capacity:
+            return
+        new_capacity = max(minimum, capacity * 2)
+        for name in ("coordinates", "status", "type", "fuel", "speed", "heading"):
+            old = getattr(self, name)
+            new = np.zeros((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    async def load(self, collection) -> int:
+        """Rebuild the whole snapshot from the vehicles collection"""
+        documents = await collection.find({}, SNAPSHOT_PROJECTION).to_list(length=None)
+
+        self.ids = []
+        self.call_signs = []
+        self.index = {}
+        self.size = 0
+        self._grow(len(documents))
+
+        for document in documents:
+            self._insert(document)
+
+        self.loaded = True
+        self.version += 1
+        logger.info(f"Fleet snapshot loaded with {self.size} vehicles")
+        return self.size
+
+    def _insert(self, document: Dict[str, Any]) -> int:
+        """Append a new row for a vehicle document"""
+        self._grow(self.size + 1)
+        row = self.size
+        vehicle_id = sys.intern(document["id"])
+
+        self.ids.append(vehicle_id)
+        self.call_signs.append(document.get("call_sign", vehicle_id))
+        self.index[vehicle_id] = row
+        self.size += 1
+
+        self._write_row(row, document)
+        return row
+
+    def _write_row(self, row: int, fields: Dict[str, Any]):
+        """Write the snapshot-tracked fields present in `fields` into a row"""
+        if "call_sign" in fields:
+            self.call_signs[row] = fields["call_sign"]
+        if "status" in fields:
+            self.status[row] = STATUS_CODES[_code(fields["status"])]
+        if "type" in fields:
+            self.type[row] = TYPE_CODES[_code(fields["type"])]
+        if "fuel" in fields:
+            self.fuel[row] = fields["fuel"]
+        if "speed" in fields:
+            self.speed[row] = fields["speed"]
+
+        location = fields.get("location")
+        if location:
+            self.coordinates[row] = location["coordinates"]
+            self.heading[row] = location.get("heading") or 0
+
+    def upsert(self, document: Dict[str, Any]):
+        """Insert a full vehicle document, or overwrite the row if it exists"""
+        row = self.index.get(document["id"])
+        if row is None:
+            self._insert(document)
+        else:
+            self._write_row(row, document)
+        self.version += 1
+
+    def apply_update(self, vehicle_id: str, fields: Dict[str, Any]) -> bool:
+        """Apply a partial `$set` payload to an existing row"""
+        row = self.index.get(vehicle_id)
+        if row is None:
+            return False
+        self._write_row(row, fields)
+        self.version += 1
+        return True
+
+    def remove(self, vehicle_id: str) -> bool:
+        """Drop a vehicle by moving the last row into its slot"""
+        row = self.index.pop(vehicle_id, None)
+        if row is None:
+            return False
+
+        last = self.size - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.call_signs[row] = self.call_signs[last]
+            for name in ("coordinates", "status", "type", "fuel", "speed", "heading"):
+                array = getattr(self, name)
+                array[row] = array[last]
+            self.index[moved_id] = row
+
+        self.ids.pop()
+        self.call_signs.pop()
+        self.size -= 1
+        self.version += 1
+        return True
+
+    def mask(
+        self,
+        status: Optional[Any] = None,
+        type: Optional[Any] = None,
+        min_fuel: Optional[float] = None
+    ) -> np.ndarray:
+        """Boolean row mask for the given filters"""
+        mask = np.ones(self.size, dtype=bool)
+        if status is not None:
+            mask &= self.status[:self.size] == STATUS_CODES[_code(status)]
+        if type is not None:
+            mask &= self.type[:self.size] == TYPE_CODES[_code(type)]
+        if min_fuel is not None:
+            mask &= self.fuel[:self.size] >= min_fuel
+        return mask
+
+    def count(self, status: Optional[Any] = None, type: Optional[Any] = None) -> int:
+        """Count vehicles matching the filters"""
+        return int(np.count_nonzero(self.mask(status=status, type=type)))
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Vehicle counts per status, plus a total"""
+        counts = np.bincount(self.status[:self.size], minlength=len(STATUS_VALUES))
+        stats = {value: int(counts[code]) for code, value in enumerate(STATUS_VALUES)}
+        stats["total"] = self.size
+        return stats
+
+    def filter_ids(self, status: Optional[Any] = None, type: Optional[Any] = None) -> List[str]:
+        """IDs of vehicles matching the filters"""
+        rows = np.flatnonzero(self.mask(status=status, type=type))
+        return [self.ids[row] for row in rows]
+
+    def distances_to(self, coordinates: Iterable[float]) -> np.ndarray:
+        """Haversine distance in meters from every row to a point"""
+        lat, lon = np.radians(np.asarray(coordinates, dtype=np.float64))
+        points = np.radians(self.coordinates[:self.size])
+
+        dlat = points[:, 0] - lat
+        dlon = points[:, 1] - lon
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(points[:, 0]) * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+
+    def nearest(
+        self,
+        coordinates: Iterable[float],
+        status: Optional[Any] = VehicleStatus.AVAILABLE,
+        types: Optional[Iterable[Any]] = None,
+        max_distance_m: Optional[float] = None,
+        limit: int = 5
+    ) -> List[Tuple[str, float]]:
+        """Nearest vehicles to a point as (vehicle_id, distance_meters) pairs"""
+        if self.size == 0:
+            return []
+
+        mask = self.mask(status=status)
+        if types is not None:
+            codes = [TYPE_CODES[_code(t)] for t in types]
+            mask &= np.isin(self.type[:self.size], codes)
+
+        distances = self.distances_to(coordinates)
+        if max_distance_m is not None:
+            mask &= distances <= max_distance_m
+
+        rows = np.flatnonzero(mask)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(distances[rows], limit)[:limit]]
+        rows = rows[np.argsort(distances[rows])]
+
+        return [(self.ids[row], float(distances[row])) for row in rows]
+
+    def to_columns(self, status: Optional[Any] = None, type: Optional[Any] = None) -> Dict[str, Any]:
+        """Serialize matching rows as parallel columns"""
+        rows = np.flatnonzero(self.mask(status=status, type=type))
+        return {
+            "version": self.version,
+            "count": int(len(rows)),
+            "status_values": STATUS_VALUES,
+            "type_values": TYPE_VALUES,
+            "ids": [self.ids[row] for row in rows],
+            "call_signs": [self.call_signs[row] for row in rows],
+            "coordinates": self.coordinates[rows].tolist(),
+            "status": self.status[rows].tolist(),
+            "type": self.type[rows].tolist(),
+            "fuel": self.fuel[rows].round(1).tolist(),
+            "speed": self.speed[rows].round(1).tolist(),
+            "heading": self.heading[rows].round(1).tolist(),
+        }
+
+# Global fleet snapshot instance
+fleet_snapshot = FleetSnapshot()
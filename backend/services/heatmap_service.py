@@ -0,0 +1,187 @@
+import logging
+import math
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.serialization import encode_documents
+
+logger = logging.getLogger(__name__)
+
+# Tile zoom levels served; each tile is split into 2^BIN_DEPTH x 2^BIN_DEPTH bins
+HEATMAP_ZOOMS = (8, 10, 12, 14)
+BIN_DEPTH = 4
+
+# Time windows, in hourly buckets ending with the current hour
+WINDOWS = {"1h": 1, "24h": 24, "7d": 7 * 24}
+RETENTION_HOURS = max(WINDOWS.values())
+
+# Bins of every type are also counted under this key
+ALL_TYPES = "all"
+
+# Rendered tiles kept (least recently used are evicted)
+TILE_CACHE_SIZE = 10000
+
+MAX_LATITUDE = 85.05112878
+
+TileKey = Tuple[int, int, int]
+
+def _value(value) -> str:
+    return value.value if hasattr(value, "value") else value
+
+def tile_xy(latitude: float, longitude: float, zoom: int) -> Tuple[int, int]:
+    """Web Mercator (slippy map) tile containing a point"""
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    n = 1 << zoom
+    x = int((longitude + 180.0) / 360.0 * n)
+    sin_lat = math.sin(math.radians(latitude))
+    y = int((0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tile_center(x: int, y: int, zoom: int) -> Tuple[float, float]:
+    """(latitude, longitude) of a tile's center"""
+    n = 1 << zoom
+    longitude = (x + 0.5) / n * 360.0 - 180.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 0.5) / n))))
+    return latitude, longitude
+
+def quadkey(x: int, y: int, zoom: int) -> str:
+    """Bing-style quadkey for a tile"""
+    digits = []
+    for level in range(zoom, 0, -1):
+        mask = 1 << (level - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return "".join(digits)
+
+class HeatmapIndex:
+    """Incident density per map tile, maintained incrementally.
+
+    Every incident increments one bin per zoom level in the bucket for its
+    hour, under its type and under ALL_TYPES. A tile request sums the
+    tile's bins over the window's hourly buckets; the rendered tile is
+    cached until the tile changes or the hour rolls over, so panning a map
+    never reaches the database and an unchanged tile costs only an ETag
+    comparison.
+    """
+
+    def __init__(self, zooms: Tuple[int, ...] = HEATMAP_ZOOMS, bin_depth: int = BIN_DEPTH):
+        self.zooms = zooms
+        self.bin_depth = bin_depth
+        # hour -> (type, zoom, x, y) -> bin (x, y) -> count
+        self.hours: Dict[int, Dict[Tuple[str, int, int, int], Counter]] = {}
+        # Bumped on every change to a tile, to invalidate cached renders
+        self.versions: Dict[TileKey, int] = {}
+        self.cache: "OrderedDict[Tuple, Tuple[str, bytes]]" = OrderedDict()
+        # Distinguishes ETags issued before a restart
+        self.epoch = int(time.time())
+
+    def _hour(self, at: datetime) -> int:
+        return int(at.timestamp() // 3600)
+
+    def add(self, incident_type: Any, coordinates: List[float], at: datetime):
+        """Count one incident"""
+        hour = self._hour(at)
+        if hour <= self._hour(datetime.utcnow()) - RETENTION_HOURS:
+            return
+
+        if hour not in self.hours:
+            self.hours[hour] = {}
+            self._prune(hour)
+        bins = self.hours[hour]
+
+        latitude, longitude = coordinates[0], coordinates[1]
+        for zoom in self.zooms:
+            bin_x, bin_y = tile_xy(latitude, longitude, zoom + self.bin_depth)
+            tile = (zoom, bin_x >> self.bin_depth, bin_y >> self.bin_depth)
+            for key in (_value(incident_type), ALL_TYPES):
+                bins.setdefault((key,) + tile, Counter())[(bin_x, bin_y)] += 1
+            self.versions[tile] = self.versions.get(tile, 0) + 1
+
+    def _prune(self, newest_hour: int):
+        """Drop hourly buckets that have left the longest window"""
+        for hour in [hour for hour in self.hours if hour <= newest_hour - RETENTION_HOURS]:
+            del self.hours[hour]
+
+    def tile(
+        self,
+        zoom: int,
+        x: int,
+        y: int,
+        incident_type: Optional[Any] = None,
+        window: str = "24h",
+        now: Optional[datetime] = None
+    ) -> Tuple[str, bytes]:
+        """(ETag, encoded JSON) for one tile"""
+        if zoom not in self.zooms:
+            raise ValueError(f"Unsupported zoom {zoom}; available: {list(self.zooms)}")
+        if window not in WINDOWS:
+            raise ValueError(f"Unsupported window {window}; available: {list(WINDOWS)}")
+        if not (0 <= x < (1 << zoom) and 0 <= y < (1 << zoom)):
+            raise ValueError("Tile coordinates out of range")
+
+        type_key = _value(incident_type) if incident_type else ALL_TYPES
+        current_hour = self._hour(now or datetime.utcnow())
+        version = self.versions.get((zoom, x, y), 0)
+        cache_key = (type_key, window, zoom, x, y)
+
+        etag = f'"{self.epoch}-{type_key}-{window}-{zoom}-{x}-{y}-{version}-{current_hour}"'
+        cached = self.cache.get(cache_key)
+        if cached and cached[0] == etag:
+            self.cache.move_to_end(cache_key)
+            return cached
+
+        body = encode_documents(self._render(type_key, window, zoom, x, y, current_hour))
+        self.cache[cache_key] = (etag, body)
+        self.cache.move_to_end(cache_key)
+        if len(self.cache) > TILE_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return etag, body
+
+    def _render(self, type_key: str, window: str, zoom: int, x: int, y: int, current_hour: int) -> Dict[str, Any]:
+        counts: Counter = Counter()
+        key = (type_key, zoom, x, y)
+        for hour in range(current_hour - WINDOWS[window] + 1, current_hour + 1):
+            bins = self.hours.get(hour, {}).get(key)
+            if bins:
+                counts.update(bins)
+
+        bin_zoom = zoom + self.bin_depth
+        bins = []
+        for (bin_x, bin_y), count in sorted(counts.items()):
+            latitude, longitude = tile_center(bin_x, bin_y, bin_zoom)
+            bins.append({
+                "quadkey": quadkey(bin_x, bin_y, bin_zoom),
+                "lat": round(latitude, 6),
+                "lon": round(longitude, 6),
+                "count": count
+            })
+
+        return {
+            "z": zoom,
+            "x": x,
+            "y": y,
+            "type": type_key,
+            "window": window,
+            "bin_zoom": bin_zoom,
+            "total": sum(counts.values()),
+            "max": max(counts.values(), default=0),
+            "bins": bins
+        }
+
+    async def load(self, collection, since: timedelta = timedelta(hours=RETENTION_HOURS)) -> int:
+        """Count the incidents created inside the retention period (startup warm-up)"""
+        cutoff = datetime.utcnow() - since
+        cursor = collection.find(
+            {"timestamp": {"$gte": cutoff}},
+            {"_id": 0, "type": 1, "location.coordinates": 1, "timestamp": 1}
+        )
+        count = 0
+        async for incident in cursor:
+            self.add(incident["type"], incident["location"]["coordinates"], incident["timestamp"])
+            count += 1
+        logger.info(f"Heatmap warmed with {count} incidents")
+        return count
+
+# Global incident heatmap
+heatmap_index = HeatmapIndex()
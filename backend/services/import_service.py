@@ -0,0 +1,445 @@
+import asyncio
+import csv
+import gc
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import TypeAdapter, ValidationError
+from pymongo.errors import BulkWriteError
+
+from models.emergency import Incident
+from services.response_analytics import (
+    response_analytics, transition_event, DISPATCH, RESPONSE, RESOLUTION
+)
+from services.heatmap_service import heatmap_index
+from services.search import normalize_id
+from services.state_store import state_store, INCIDENT
+from services.stats_service import StatsService, OPEN_STATUSES
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 5000
+
+# Errors kept in the summary (the rest are only counted)
+MAX_REPORTED_ERRORS = 100
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Optional CSV columns copied through as incident fields
+CSV_OPTIONAL_COLUMNS = (
+    "id", "status", "timestamp", "last_update", "dispatched_at", "on_scene_at",
+    "resolved_at", "estimated_arrival", "notes"
+)
+
+# Hex digits of the content hash in generated IDs (80 bits: collision-free at any realistic import size)
+GENERATED_ID_DIGITS = 20
+
+# Fields describing the call itself; a stored incident with the same ID but
+# different values here is a different incident, not a re-import. Status,
+# priority and transition times may legitimately have moved on since.
+CALL_FIELDS = ("type", "description", "reported_by", "timestamp")
+
+# Call fields filled in at validation time when a record omits them, so a
+# re-import cannot reproduce the stored value
+DEFAULTED_CALL_FIELDS = ("timestamp",)
+
+# Transition timestamps replayed into the response-time aggregates
+TRANSITION_FIELDS = (("dispatched_at", DISPATCH), ("on_scene_at", RESPONSE), ("resolved_at", RESOLUTION))
+
+_incidents_adapter = TypeAdapter(List[Incident])
+
+@contextmanager
+def _gc_paused():
+    """Suspend the cyclic GC around a synchronous burst of allocations.
+
+    Validating a chunk allocates tens of thousands of short-lived objects,
+    which otherwise triggers repeated full collections that cost more than
+    the validation itself. Only wrap code that never awaits.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _naive_utc(value: Any) -> Any:
+    """Offset-aware datetime -> naive UTC, the form every stored timestamp takes"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _naive_utc_fields(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a document's datetimes in place (sources mix naive, `Z` and offset forms)"""
+    for field, value in document.items():
+        if isinstance(value, datetime):
+            document[field] = _naive_utc(value)
+    for report in document.get("duplicate_reports") or ():
+        report["timestamp"] = _naive_utc(report.get("timestamp"))
+    return document
+
+def _to_document(incident: Incident) -> Dict[str, Any]:
+    """Validated incident -> insertable document.
+
+    Equivalent to `incident.dict()` for this model but several times
+    faster, which matters at import volumes: only the nested models need
+    converting, every other field is already a plain value.
+    """
+    document = dict(incident.__dict__)
+    document["location"] = dict(incident.location.__dict__)
+    if incident.duplicate_reports:
+        document["duplicate_reports"] = [report.dict() for report in incident.duplicate_reports]
+    return _naive_utc_fields(document)
+
+def _comparable(value: Any) -> Any:
+    """Normalize a field for comparison with its stored copy (enum values, millisecond datetimes)"""
+    if hasattr(value, "value"):
+        return value.value
+    if isinstance(value, datetime):
+        value = _naive_utc(value)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+def same_call(document: Dict[str, Any], stored: Dict[str, Any], ignore: Iterable[str] = ()) -> bool:
+    """Whether an imported document and a stored incident with its ID record the same call.
+
+    Fields in `ignore` (ones the source record did not supply) are not compared.
+    """
+    fields = [field for field in CALL_FIELDS if field not in ignore]
+    if any(_comparable(document.get(field)) != _comparable(stored.get(field)) for field in fields):
+        return False
+    coordinates = (stored.get("location") or {}).get("coordinates")
+    return list(document["location"]["coordinates"]) == list(coordinates or [])
+
+def read_ndjson(stream: TextIO) -> Iterator[Tuple[str, Any]]:
+    """Yield (raw line, parsed object) for each non-blank NDJSON line"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line, ValueError(f"Invalid JSON: {e.msg}")
+
+def read_csv(stream: TextIO) -> Iterator[Tuple[str, Any]]:
+    """Yield (raw row, incident dict) for each CSV row.
+
+    Expected columns: type, priority, description, reported_by, address,
+    latitude, longitude, plus optionally district and the fields in
+    CSV_OPTIONAL_COLUMNS. Blank cells are treated as missing.
+    """
+    for row in csv.DictReader(stream):
+        raw = ",".join(value or "" for value in row.values())
+        try:
+            record = {
+                "type": row.get("type"),
+                "priority": row.get("priority"),
+                "description": row.get("description"),
+                "reported_by": row.get("reported_by"),
+                "location": {
+                    "address": row.get("address"),
+                    "coordinates": [float(row["latitude"]), float(row["longitude"])],
+                    "district": row.get("district") or None
+                }
+            }
+        except (KeyError, TypeError, ValueError):
+            yield raw, ValueError("Missing or invalid latitude/longitude")
+            continue
+        for column in CSV_OPTIONAL_COLUMNS:
+            if row.get(column):
+                record[column] = row[column]
+        yield raw, record
+
+READERS = {"ndjson": read_ndjson, "csv": read_csv}
+
+def _read_chunk(
+    records: Iterator[Tuple[int, Tuple[str, Any]]],
+    skip: int,
+    chunk_size: int
+) -> List[Tuple[int, str, Any]]:
+    """The next `chunk_size` numbered records after `skip` (fewer at the end of the input)"""
+    chunk: List[Tuple[int, str, Any]] = []
+    for record_number, (raw, record) in records:
+        if record_number <= skip:
+            continue
+        chunk.append((record_number, raw, record))
+        if len(chunk) >= chunk_size:
+            break
+    return chunk
+
+def detect_format(filename: Optional[str]) -> str:
+    """Guess the import format from a file name (NDJSON unless it ends in .csv)"""
+    return "csv" if filename and filename.lower().endswith(".csv") else "ndjson"
+
+class ImportProgress:
+    """Running totals for one import"""
+
+    def __init__(self, skip: int = 0):
+        self.started = time.perf_counter()
+        self.processed = skip        # records read, including any skipped by a resumed checkpoint
+        self.inserted = 0
+        self.duplicates = 0
+        self.conflicts = 0
+        self.invalid = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.conflicting_ids: List[str] = []
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Inserted documents per second"""
+        return self.inserted / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def add_conflict(self, incident_id: str):
+        self.conflicts += 1
+        if len(self.conflicting_ids) < MAX_REPORTED_ERRORS:
+            self.conflicting_ids.append(incident_id)
+
+    def add_error(self, record_number: int, message: str):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"record": record_number, "error": message})
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "conflicts": self.conflicts,
+            "conflicting_ids": self.conflicting_ids,
+            "invalid": self.invalid,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "documents_per_second": round(self.rate, 1),
+            "errors": sorted(self.errors, key=lambda error: error["record"])
+        }
+
+class ImportCheckpoint:
+    """Number of records of a source already written, persisted as JSON.
+
+    Every insert is keyed on the incident ID, so replaying a chunk after a
+    crash only produces duplicate-key skips; the checkpoint just avoids
+    re-reading and re-validating what is already stored.
+    """
+
+    def __init__(self, path: Optional[str], source: str):
+        self.path = path
+        self.source = source
+
+    def load(self) -> int:
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path) as f:
+            state = json.load(f)
+        if state.get("source") != self.source:
+            logger.warning(f"Ignoring checkpoint {self.path}: it belongs to {state.get('source')}")
+            return 0
+        return state.get("records", 0)
+
+    def save(self, records: int):
+        if not self.path:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"source": self.source, "records": records}, f)
+        os.replace(temporary, self.path)
+
+class ImportService:
+    """Bulk loads historical incidents (CAD exports, backfills, replays).
+
+    Records are read and validated a chunk at a time in a worker thread,
+    so a large upload never stalls the event loop. Each chunk goes through
+    a single pydantic TypeAdapter call and is written with unordered
+    `insert_many`, so one bad or duplicate record never stalls the rest
+    of the chunk. Records whose ID is already taken count as duplicates
+    when they describe the same call and as conflicts otherwise. Stats
+    counters, response-time aggregates and heatmap are updated once per
+    chunk.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.collection = db.incidents
+        self.stats = StatsService(db)
+
+    def _prepare(self, raw: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill the fields a historical record may omit and normalize its ID"""
+        if isinstance(record.get("id"), str) and record["id"].strip():
+            record["id"] = normalize_id(record["id"])
+        elif not record.get("id"):
+            # Content-derived, so re-importing the same record is still a duplicate
+            digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:GENERATED_ID_DIGITS].upper()
+            year = str(record.get("timestamp") or "")[:4] or "IMPT"
+            record["id"] = f"INC-{year}-{digest}"
+        if record.get("timestamp") and not record.get("last_update"):
+            record["last_update"] = record.get("resolved_at") or record["timestamp"]
+        return record
+
+    def _validate(
+        self,
+        chunk: List[Tuple[int, str, Any]],
+        progress: ImportProgress
+    ) -> Tuple[List[Dict[str, Any]], Set[str]]:
+        """Validate a chunk, falling back to per-record validation to isolate errors.
+
+        Returns the documents and the IDs of those whose source record had no
+        timestamp (validation stamps them with the current time).
+        """
+        records = []
+        untimed = set()
+        for record_number, raw, record in chunk:
+            if isinstance(record, Exception):
+                progress.add_error(record_number, str(record))
+            elif not isinstance(record, dict):
+                progress.add_error(record_number, "Record is not an object")
+            else:
+                record = self._prepare(raw, record)
+                if not record.get("timestamp"):
+                    untimed.add(record["id"])
+                records.append((record_number, record))
+
+        try:
+            with _gc_paused():
+                incidents = _incidents_adapter.validate_python([record for _, record in records])
+                return [_to_document(incident) for incident in incidents], untimed
+        except ValidationError:
+            pass
+
+        documents = []
+        for record_number, record in records:
+            try:
+                documents.append(_naive_utc_fields(Incident(**record).dict()))
+            except ValidationError as e:
+                first = e.errors()[0]
+                location = ".".join(str(part) for part in first["loc"])
+                progress.add_error(record_number, f"{location}: {first['msg']}")
+        return documents, untimed
+
+    async def _write(self, documents: List[Dict[str, Any]], progress: ImportProgress, untimed: Set[str]):
+        """Insert a validated chunk and fold the stored documents into the aggregates"""
+        if not documents:
+            return
+
+        failed = set()
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") != DUPLICATE_KEY_ERROR:
+                    raise
+                failed.add(error["index"])
+            await self._classify_rejected([documents[index] for index in failed], progress, untimed)
+
+        inserted = [document for index, document in enumerate(documents) if index not in failed]
+        progress.inserted += len(inserted)
+        if not inserted:
+            return
+
+        await self.stats.incidents_imported(inserted)
+        for incident in inserted:
+            heatmap_index.add(incident["type"], incident["location"]["coordinates"], incident["timestamp"])
+            if incident["status"] in OPEN_STATUSES:
+                state_store.upsert(INCIDENT, incident["id"], incident)
+        await self._record_transitions(inserted)
+
+    async def _classify_rejected(self, documents: List[Dict[str, Any]], progress: ImportProgress, untimed: Set[str]):
+        """Split records rejected for an existing ID into re-imports and conflicts.
+
+        A conflict is a different call that happens to share the stored
+        incident's ID; it is reported rather than silently dropped. Records
+        in `untimed` had no timestamp of their own, so theirs is not compared.
+        """
+        if not documents:
+            return
+        stored = {
+            incident["id"]: incident
+            async for incident in self.collection.find(
+                {"id": {"$in": [document["id"] for document in documents]}},
+                {"_id": 0, "id": 1, "location.coordinates": 1, **{field: 1 for field in CALL_FIELDS}}
+            )
+        }
+        for document in documents:
+            existing = stored.get(document["id"])
+            ignore = DEFAULTED_CALL_FIELDS if document["id"] in untimed else ()
+            if existing is not None and same_call(document, existing, ignore):
+                progress.duplicates += 1
+            else:
+                progress.add_conflict(document["id"])
+
+    async def _record_transitions(self, incidents: List[Dict[str, Any]]):
+        """Persist and aggregate the response-time transitions of imported incidents"""
+        events = [
+            transition_event(incident, metric, incident[field])
+            for incident in incidents
+            for field, metric in TRANSITION_FIELDS
+            if incident.get(field)
+        ]
+        if not events:
+            return
+
+        await self.db.response_events.insert_many([dict(event) for event in events], ordered=False)
+        for event in events:
+            response_analytics.record(
+                event["metric"], event["seconds"], event["at"], event["type"], event["district"]
+            )
+
+    async def import_records(
+        self,
+        records: Iterable[Tuple[str, Any]],
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        checkpoint: Optional[ImportCheckpoint] = None,
+        on_progress: Optional[Callable[[ImportProgress], None]] = None
+    ) -> Dict[str, Any]:
+        """Validate and insert (raw, record) pairs chunk by chunk"""
+        skip = checkpoint.load() if checkpoint else 0
+        progress = ImportProgress(skip)
+        if skip:
+            logger.info(f"Resuming import after {skip} records")
+
+        numbered = enumerate(records, start=1)
+        while True:
+            chunk = await asyncio.to_thread(_read_chunk, numbered, skip, chunk_size)
+            if not chunk:
+                break
+            await self._flush(chunk, progress, checkpoint, on_progress)
+
+        return progress.summary()
+
+    async def _flush(
+        self,
+        chunk: List[Tuple[int, str, Any]],
+        progress: ImportProgress,
+        checkpoint: Optional[ImportCheckpoint],
+        on_progress: Optional[Callable[[ImportProgress], None]]
+    ):
+        documents, untimed = await asyncio.to_thread(self._validate, chunk, progress)
+        await self._write(documents, progress, untimed)
+        progress.processed = chunk[-1][0]
+        if checkpoint:
+            checkpoint.save(progress.processed)
+        if on_progress:
+            on_progress(progress)
+
+    async def import_stream(
+        self,
+        stream: TextIO,
+        format: str,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        checkpoint: Optional[ImportCheckpoint] = None,
+        on_progress: Optional[Callable[[ImportProgress], None]] = None
+    ) -> Dict[str, Any]:
+        """Import a CSV or NDJSON text stream"""
+        if format not in READERS:
+            raise ValueError(f"Unsupported import format: {format}")
+        return await self.import_records(READERS[format](stream), chunk_size, checkpoint, on_progress)
@@ -1,24 +1,138 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List, Optional
+from pymongo import ReturnDocument
+from typing import List, Optional, Union, Dict, Any, AsyncIterator, Tuple
 from datetime import datetime
+import base64
+import heapq
+import itertools
+import json
 import uuid
 
 from models.emergency import (
     Incident, IncidentCreate, IncidentStatus, 
-    EmergencyType, Priority
+    EmergencyType, Priority, IncidentProjection, DuplicateReport
 )
+from services.serialization import DEFAULT_PROJECTION, build_projection, load_documents
+from services.search import ranked_search
+from services.stats_service import StatsService, OPEN_STATUSES
+from services.duplicate_index import duplicate_index
+from services.heatmap_service import heatmap_index
+from services.state_store import state_store, INCIDENT
+from services.response_analytics import (
+    response_analytics, transition_event, DISPATCH, RESPONSE, RESOLUTION
+)
+
+# Status changes that stamp a first-time transition field: status -> (field, metric)
+STATUS_TRANSITIONS = {
+    IncidentStatus.DISPATCHED: ("dispatched_at", DISPATCH),
+    IncidentStatus.ON_SCENE: ("on_scene_at", RESPONSE),
+}
+
+# Merged duplicate calls kept on an incident (oldest are dropped)
+MAX_DUPLICATE_REPORTS = 50
+
+# Priority value -> urgency rank (0 is most urgent)
+PRIORITY_RANK = {priority.value: rank for rank, priority in enumerate(Priority)}
+
+# Keyset order used by paging and export: newest first, ID breaks timestamp ties
+KEYSET_SORT = [("timestamp", -1), ("id", -1)]
+
+# Count query shapes
+ACTIVE_INCIDENTS_FILTER = {
+    "status": {"$in": [IncidentStatus.ACTIVE, IncidentStatus.DISPATCHED, IncidentStatus.ON_SCENE]}
+}
+CRITICAL_INCIDENTS_FILTER = {
+    "priority": Priority.CRITICAL,
+    "status": {"$ne": IncidentStatus.RESOLVED}
+}
+
+def encode_cursor(timestamp: datetime, incident_id: str) -> str:
+    """Encode a keyset position as an opaque continuation token"""
+    payload = json.dumps({"t": timestamp.isoformat(), "i": incident_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str) -> Tuple[datetime, str]:
+    """Decode a continuation token back into (timestamp, id)"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["t"]), payload["i"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def _keyset_key(document: Dict[str, Any]) -> Tuple[datetime, str]:
+    return document["timestamp"], document["id"]
+
+def merge_keyset(results: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """Merge per-collection results that are each in KEYSET_SORT order"""
+    return list(itertools.islice(heapq.merge(*results, key=_keyset_key, reverse=True), limit))
+
+async def merge_keyset_cursors(cursors: List[Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Stream the merge of several cursors that are each in KEYSET_SORT order"""
+    iterators = [cursor.__aiter__() for cursor in cursors]
+    heads: Dict[int, Dict[str, Any]] = {}
+    
+    async def advance(index: int):
+        try:
+            heads[index] = await iterators[index].__anext__()
+        except StopAsyncIteration:
+            heads.pop(index, None)
+    
+    for index in range(len(iterators)):
+        await advance(index)
+    while heads:
+        index = max(heads, key=lambda i: _keyset_key(heads[i]))
+        yield heads[index]
+        await advance(index)
 
 class IncidentService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
         self.collection = db.incidents
+        self.archive = db.incidents_archive
+        self.stats = StatsService(db)
+
+    def _sources(self, include_history: bool = False) -> List[Any]:
+        """Collections a read covers: the archive only when history is requested"""
+        return [self.collection, self.archive] if include_history else [self.collection]
+
+    def _keyset_projection(self, fields: Optional[List[str]]) -> Dict[str, int]:
+        """Projection that keeps the keyset columns needed for merging and cursors"""
+        return build_projection(fields + ["timestamp"] if fields else None)
+
+    def _drop_keyset_columns(self, incidents: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """Remove the keyset timestamp from sparse documents that did not ask for it"""
+        if fields and "timestamp" not in fields:
+            for incident in incidents:
+                incident.pop("timestamp", None)
+        return incidents
 
-    async def create_incident(self, incident_data: IncidentCreate) -> Incident:
-        """Create a new emergency incident"""
+    async def create_incident(
+        self,
+        incident_data: IncidentCreate,
+        dedupe: bool = True
+    ) -> Tuple[Incident, bool, bool]:
+        """Create a new emergency incident.
+        
+        With `dedupe`, a report matching a recent open incident of the same
+        type nearby is merged into it instead, raising its priority if the
+        report is more urgent. Returns (incident, merged, escalated).
+        """
+        now = datetime.utcnow()
+        
+        if dedupe:
+            existing_id = duplicate_index.find(incident_data.type, incident_data.location.coordinates, now)
+            if existing_id:
+                merged = await self.merge_duplicate_report(existing_id, incident_data, now)
+                if merged:
+                    return merged[0], True, merged[1]
+                # The match closed in the meantime
+                duplicate_index.remove(existing_id)
+        
         incident_dict = incident_data.dict()
-        incident_dict["id"] = f"INC-{datetime.utcnow().strftime('%Y')}-{str(uuid.uuid4())[:8].upper()}"
-        incident_dict["timestamp"] = datetime.utcnow()
-        incident_dict["last_update"] = datetime.utcnow()
+        incident_dict["id"] = f"INC-{now.strftime('%Y')}-{str(uuid.uuid4())[:8].upper()}"
+        incident_dict["timestamp"] = now
+        incident_dict["last_update"] = now
         incident_dict["status"] = IncidentStatus.ACTIVE
         incident_dict["assigned_vehicles"] = []
         incident_dict["estimated_arrival"] = "Calculating..."
@@ -27,17 +141,108 @@ class IncidentService:
         
         # Insert into database
         await self.collection.insert_one(incident.dict())
+        await self.stats.incident_created(incident_dict)
+        duplicate_index.add(incident.id, incident.type, incident.location.coordinates, now)
+        heatmap_index.add(incident.type, incident.location.coordinates, now)
+        state_store.upsert(INCIDENT, incident.id, incident.dict())
         
-        return incident
+        return incident, False, False
+
+    async def merge_duplicate_report(
+        self,
+        incident_id: str,
+        incident_data: IncidentCreate,
+        at: datetime
+    ) -> Optional[Tuple[Incident, bool]]:
+        """Attach a duplicate call to an open incident.
+
+        A report more urgent than the incident escalates the incident to the
+        report's priority; the update only matches while the stored priority
+        is lower, so concurrent merges never lower it again. Returns
+        (incident, escalated), or None if the incident has closed.
+        """
+        report = DuplicateReport(
+            reported_by=incident_data.reported_by,
+            description=incident_data.description,
+            location=incident_data.location,
+            timestamp=at
+        )
+        update = {
+            "$inc": {"report_count": 1},
+            "$push": {"duplicate_reports": {"$each": [report.dict()], "$slice": -MAX_DUPLICATE_REPORTS}},
+            "$set": {"last_update": at}
+        }
+
+        priority = incident_data.priority.value
+        less_urgent = [value for value, rank in PRIORITY_RANK.items() if rank > PRIORITY_RANK[priority]]
+        if less_urgent:
+            before = await self.collection.find_one_and_update(
+                {"id": incident_id, "status": {"$in": OPEN_STATUSES}, "priority": {"$in": less_urgent}},
+                {**update, "$set": {"last_update": at, "priority": priority}},
+                projection=DEFAULT_PROJECTION,
+                return_document=ReturnDocument.BEFORE
+            )
+            if before is not None:
+                await self.stats.incident_priority_changed(before["status"], before["priority"], priority)
+                incident = {
+                    **before,
+                    "priority": priority,
+                    "last_update": at,
+                    "report_count": before.get("report_count", 1) + 1,
+                    "duplicate_reports": (before.get("duplicate_reports") or [])[1 - MAX_DUPLICATE_REPORTS:] + [report.dict()]
+                }
+                state_store.apply_update(INCIDENT, incident_id, incident)
+                return Incident(**incident), True
+
+        incident = await self.collection.find_one_and_update(
+            {"id": incident_id, "status": {"$in": OPEN_STATUSES}},
+            update,
+            projection=DEFAULT_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if incident is None:
+            return None
+        state_store.apply_update(INCIDENT, incident_id, incident)
+        return Incident(**incident), False
 
     async def get_incidents(
         self, 
         status: Optional[IncidentStatus] = None,
         type: Optional[EmergencyType] = None,
         priority: Optional[Priority] = None,
-        limit: int = 100
-    ) -> List[Incident]:
-        """Retrieve incidents with optional filtering"""
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+        trusted: bool = False,
+        include_history: bool = False
+    ) -> Union[List[Incident], List[IncidentProjection], List[Dict[str, Any]]]:
+        """Retrieve incidents with optional filtering and field projection.
+        
+        With `include_history`, archived incidents are merged in as well.
+        """
+        filter_dict = self.build_filter(status=status, type=type, priority=priority)
+        
+        if include_history:
+            projection = self._keyset_projection(fields)
+            results = [
+                await collection.find(filter_dict, projection).sort(KEYSET_SORT).to_list(length=limit)
+                for collection in self._sources(include_history)
+            ]
+            incidents = self._drop_keyset_columns(merge_keyset(results, limit), fields)
+        else:
+            projection = build_projection(fields)
+            cursor = self.collection.find(filter_dict, projection).sort(KEYSET_SORT).limit(limit)
+            incidents = await cursor.to_list(length=limit)
+        
+        return load_documents(IncidentProjection if fields else Incident, incidents, trusted)
+
+    def build_filter(
+        self,
+        status: Optional[IncidentStatus] = None,
+        type: Optional[EmergencyType] = None,
+        priority: Optional[Priority] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the Mongo filter for the list/page/export query shape"""
         filter_dict = {}
         
         if status:
@@ -46,17 +251,84 @@ class IncidentService:
             filter_dict["type"] = type
         if priority:
             filter_dict["priority"] = priority
+        if cursor:
+            # Resume strictly after the cursor position in KEYSET_SORT order
+            timestamp, incident_id = decode_cursor(cursor)
+            filter_dict["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "id": {"$lt": incident_id}}
+            ]
             
-        cursor = self.collection.find(filter_dict).sort("timestamp", -1).limit(limit)
-        incidents = await cursor.to_list(length=limit)
+        return filter_dict
+
+    async def get_incidents_page(
+        self,
+        status: Optional[IncidentStatus] = None,
+        type: Optional[EmergencyType] = None,
+        priority: Optional[Priority] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        trusted: bool = False,
+        include_history: bool = False
+    ) -> Dict[str, Any]:
+        """Retrieve one keyset page of incidents ordered by (timestamp, id)"""
+        filter_dict = self.build_filter(status=status, type=type, priority=priority, cursor=cursor)
+        
+        # The keyset columns must be present to build the next token
+        projection = self._keyset_projection(fields)
+        
+        # Fetch one extra document to know whether another page exists
+        results = [
+            await collection.find(filter_dict, projection).sort(KEYSET_SORT).limit(limit + 1).to_list(length=limit + 1)
+            for collection in self._sources(include_history)
+        ]
+        incidents = merge_keyset(results, limit + 1) if include_history else results[0]
+        
+        next_cursor = None
+        if len(incidents) > limit:
+            incidents = incidents[:limit]
+            last = incidents[-1]
+            next_cursor = encode_cursor(last["timestamp"], last["id"])
+        self._drop_keyset_columns(incidents, fields)
+        
+        return {
+            "items": load_documents(IncidentProjection if fields else Incident, incidents, trusted),
+            "next_cursor": next_cursor
+        }
+
+    async def iter_incidents(
+        self,
+        status: Optional[IncidentStatus] = None,
+        type: Optional[EmergencyType] = None,
+        priority: Optional[Priority] = None,
+        fields: Optional[List[str]] = None,
+        batch_size: int = 500,
+        include_history: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate raw incident documents in keyset order without buffering the result"""
+        filter_dict = self.build_filter(status=status, type=type, priority=priority)
         
-        return [Incident(**incident) for incident in incidents]
+        if not include_history:
+            db_cursor = self.collection.find(filter_dict, build_projection(fields)).sort(KEYSET_SORT)
+            async for incident in db_cursor.batch_size(batch_size):
+                yield incident
+            return
+        
+        projection = self._keyset_projection(fields)
+        cursors = [
+            collection.find(filter_dict, projection).sort(KEYSET_SORT).batch_size(batch_size)
+            for collection in self._sources(include_history)
+        ]
+        async for incident in merge_keyset_cursors(cursors):
+            yield self._drop_keyset_columns([incident], fields)[0]
 
-    async def get_incident_by_id(self, incident_id: str) -> Optional[Incident]:
-        """Get a specific incident by ID"""
-        incident_data = await self.collection.find_one({"id": incident_id})
-        if incident_data:
-            return Incident(**incident_data)
+    async def get_incident_by_id(self, incident_id: str, include_history: bool = False) -> Optional[Incident]:
+        """Get a specific incident by ID (falling back to the archive if asked)"""
+        for collection in self._sources(include_history):
+            incident_data = await collection.find_one({"id": incident_id}, DEFAULT_PROJECTION)
+            if incident_data:
+                return Incident(**incident_data)
         return None
 
     async def update_incident_status(
@@ -77,24 +349,74 @@ class IncidentService:
         if notes:
             update_data["notes"] = notes
             
-        result = await self.collection.update_one(
+        previous = await self.collection.find_one_and_update(
             {"id": incident_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection=DEFAULT_PROJECTION,
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.modified_count > 0:
-            return await self.get_incident_by_id(incident_id)
-        return None
+        if previous is None:
+            return None
+        
+        await self.stats.incident_status_changed(previous["priority"], previous["status"], status)
+        
+        # Response-time tracking
+        now = update_data["last_update"]
+        if status in STATUS_TRANSITIONS:
+            field, metric = STATUS_TRANSITIONS[status]
+            if previous.get(field) is None and await self.mark_transition(incident_id, field, metric, now):
+                update_data[field] = now
+        elif status == IncidentStatus.RESOLVED and previous["status"] != IncidentStatus.RESOLVED:
+            await self.record_transition(previous, RESOLUTION, now)
+        
+        # Closed incidents no longer absorb duplicate calls or appear in synced state
+        if status not in OPEN_STATUSES:
+            duplicate_index.remove(incident_id)
+            state_store.remove(INCIDENT, incident_id)
+        else:
+            state_store.apply_update(INCIDENT, incident_id, update_data)
+        
+        return Incident(**{**previous, **update_data})
+
+    async def mark_transition(self, incident_id: str, field: str, metric: str, at: datetime) -> bool:
+        """Stamp a first-time transition field and record its duration.
+        
+        The `field: None` condition makes this a no-op after the first
+        transition, so concurrent dispatches record a single event.
+        """
+        incident = await self.collection.find_one_and_update(
+            {"id": incident_id, field: None},
+            {"$set": {field: at}},
+            projection={"_id": 0, "id": 1, "timestamp": 1, "type": 1, "location.district": 1}
+        )
+        if incident is None:
+            return False
+        
+        await self.record_transition(incident, metric, at)
+        return True
+
+    async def record_transition(self, incident: Dict[str, Any], metric: str, at: datetime):
+        """Persist a transition event and fold it into the live aggregates"""
+        event = transition_event(incident, metric, at)
+        await self.db.response_events.insert_one(dict(event))
+        response_analytics.record(
+            metric, event["seconds"], at, event["type"], event["district"]
+        )
 
     async def assign_vehicle(self, incident_id: str, vehicle_id: str) -> bool:
         """Assign a vehicle to an incident"""
+        now = datetime.utcnow()
         result = await self.collection.update_one(
             {"id": incident_id},
             {
                 "$addToSet": {"assigned_vehicles": vehicle_id},
-                "$set": {"last_update": datetime.utcnow()}
+                "$set": {"last_update": now}
             }
         )
+        if result.modified_count > 0:
+            state_store.add_item(INCIDENT, incident_id, "assigned_vehicles", vehicle_id)
+            await self.mark_transition(incident_id, "dispatched_at", DISPATCH, now)
         return result.modified_count > 0
 
     async def unassign_vehicle(self, incident_id: str, vehicle_id: str) -> bool:
@@ -106,6 +428,8 @@ class IncidentService:
                 "$set": {"last_update": datetime.utcnow()}
             }
         )
+        if result.modified_count > 0:
+            state_store.remove_item(INCIDENT, incident_id, "assigned_vehicles", vehicle_id)
         return result.modified_count > 0
 
     async def update_eta(self, incident_id: str, eta: str) -> bool:
@@ -119,38 +443,48 @@ class IncidentService:
                 }
             }
         )
+        if result.modified_count > 0:
+            state_store.apply_update(INCIDENT, incident_id, {"estimated_arrival": eta})
         return result.modified_count > 0
 
     async def get_active_incidents_count(self) -> int:
         """Get count of active incidents"""
-        return await self.collection.count_documents({
-            "status": {"$in": [IncidentStatus.ACTIVE, IncidentStatus.DISPATCHED, IncidentStatus.ON_SCENE]}
-        })
+        return await self.collection.count_documents(ACTIVE_INCIDENTS_FILTER)
 
     async def get_critical_incidents_count(self) -> int:
         """Get count of critical priority incidents"""
-        return await self.collection.count_documents({
-            "priority": Priority.CRITICAL,
-            "status": {"$ne": IncidentStatus.RESOLVED}
-        })
-
-    async def get_incidents_by_type(self, emergency_type: EmergencyType) -> List[Incident]:
-        """Get all incidents of a specific type"""
-        cursor = self.collection.find({"type": emergency_type}).sort("timestamp", -1)
-        incidents = await cursor.to_list(length=None)
-        return [Incident(**incident) for incident in incidents]
-
-    async def search_incidents(self, query: str) -> List[Incident]:
-        """Search incidents by description, location, or ID"""
-        search_filter = {
-            "$or": [
-                {"id": {"$regex": query, "$options": "i"}},
-                {"description": {"$regex": query, "$options": "i"}},
-                {"location.address": {"$regex": query, "$options": "i"}},
-                {"location.district": {"$regex": query, "$options": "i"}}
-            ]
-        }
+        return await self.collection.count_documents(CRITICAL_INCIDENTS_FILTER)
+
+    async def get_incidents_by_type(
+        self,
+        emergency_type: EmergencyType,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        trusted: bool = False,
+        include_history: bool = False
+    ) -> Dict[str, Any]:
+        """Get one page of incidents of a specific type"""
+        return await self.get_incidents_page(
+            type=emergency_type, limit=limit, cursor=cursor, trusted=trusted,
+            include_history=include_history
+        )
+
+    async def search_incidents(
+        self,
+        query: str,
+        limit: int = 50,
+        trusted: bool = False,
+        include_history: bool = False
+    ) -> Union[List[Incident], List[Dict[str, Any]]]:
+        """Search incidents by description, location, or ID, ranked by relevance.
         
-        cursor = self.collection.find(search_filter).sort("timestamp", -1)
-        incidents = await cursor.to_list(length=50)
-        return [Incident(**incident) for incident in incidents]
\ No newline at end of file
+        Archived matches (with `include_history`) follow the live ones.
+        """
+        incidents = []
+        for collection in self._sources(include_history):
+            if len(incidents) >= limit:
+                break
+            incidents += await ranked_search(
+                collection, query, tiebreak=[("timestamp", -1)], limit=limit - len(incidents)
+            )
+        return load_documents(Incident, incidents, trusted)
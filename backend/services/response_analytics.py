@@ -0,0 +1,204 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Transition metrics, all measured from incident creation (`timestamp`)
+DISPATCH = "dispatch"        # first unit assigned / status -> dispatched
+RESPONSE = "response"        # status -> on-scene
+RESOLUTION = "resolution"    # status -> resolved
+METRICS = (DISPATCH, RESPONSE, RESOLUTION)
+
+# Log-spaced bin edges from 1 second to 7 days (~4% relative error per bin)
+BIN_EDGES = np.geomspace(1, 7 * 24 * 3600, 300)
+
+# Bin edges for latencies in milliseconds: 1 microsecond to 10 minutes (~6% per bin)
+MILLISECOND_BIN_EDGES = np.geomspace(0.001, 10 * 60 * 1000, 350)
+
+# The same range for latencies recorded in microseconds
+MICROSECOND_BIN_EDGES = MILLISECOND_BIN_EDGES * 1000
+
+# Rolling windows: (name, span, bucket width)
+WINDOWS = (
+    ("1h", timedelta(hours=1), timedelta(minutes=1)),
+    ("24h", timedelta(hours=24), timedelta(minutes=15)),
+    ("7d", timedelta(days=7), timedelta(hours=1)),
+)
+
+# Window of the per-type and per-district breakdowns: (span, bucket width).
+# Matches the warm-up span so every worker reports the same data; coarser
+# buckets keep the many (metric, key) windows small.
+DIMENSION_WINDOW = (timedelta(days=7), timedelta(hours=6))
+
+class StreamingHistogram:
+    """Fixed log-bucketed histogram supporting O(bins) quantiles and merges.
+
+    `edges` sets the value scale: BIN_EDGES for seconds-scale durations,
+    MILLISECOND_BIN_EDGES for latencies in milliseconds. Histograms are
+    only merged with others on the same edges.
+    """
+
+    def __init__(self, edges: np.ndarray = BIN_EDGES):
+        self.edges = edges
+        self.counts = np.zeros(len(edges) + 1, dtype=np.int64)
+        self.total = 0
+        self.sum = 0.0
+
+    def add(self, value: float):
+        self.counts[np.searchsorted(self.edges, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def merge(self, other: "StreamingHistogram"):
+        self.counts += other.counts
+        self.total += other.total
+        self.sum += other.sum
+
+    def clear(self):
+        self.counts[:] = 0
+        self.total = 0
+        self.sum = 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile (bin midpoint), or None when empty"""
+        if self.total == 0:
+            return None
+        rank = q * (self.total - 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank, side="right"))
+        if index == 0:
+            return float(self.edges[0])
+        if index >= len(self.edges):
+            return float(self.edges[-1])
+        return float(np.sqrt(self.edges[index - 1] * self.edges[index]))
+
+    def mean(self) -> Optional[float]:
+        return self.sum / self.total if self.total else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean and percentiles (in the unit recorded)"""
+        return {
+            "count": self.total,
+            "mean": self.mean(),
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9)
+        }
+
+class RollingWindow:
+    """Ring of per-bucket histograms covering a fixed time span"""
+
+    def __init__(self, span: timedelta, bucket: timedelta):
+        self.bucket_seconds = bucket.total_seconds()
+        self.size = int(span / bucket)
+        self.buckets = [StreamingHistogram() for _ in range(self.size)]
+        self.bucket_ids = [-1] * self.size
+
+    def _bucket_id(self, at: datetime) -> int:
+        return int(at.timestamp() // self.bucket_seconds)
+
+    def add(self, value: float, at: datetime):
+        bucket_id = self._bucket_id(at)
+        slot = bucket_id % self.size
+        if self.bucket_ids[slot] != bucket_id:
+            if self.bucket_ids[slot] > bucket_id:
+                return  # older than the window
+            self.buckets[slot].clear()
+            self.bucket_ids[slot] = bucket_id
+        self.buckets[slot].add(value)
+
+    def merged(self, now: datetime) -> StreamingHistogram:
+        """Histogram of every bucket still inside the window"""
+        oldest = self._bucket_id(now) - self.size + 1
+        result = StreamingHistogram()
+        for bucket_id, bucket in zip(self.bucket_ids, self.buckets):
+            if bucket_id >= oldest:
+                result.merge(bucket)
+        return result
+
+class ResponseAnalytics:
+    """Incrementally maintained response-time aggregates.
+
+    Each recorded transition updates the rolling windows and the per-type
+    and per-district windows in place, so percentile reads never touch the
+    event history. Everything expires with its window, so the figures do
+    not depend on how long the process has been running.
+    """
+
+    def __init__(self):
+        self.windows: Dict[str, Dict[str, RollingWindow]] = {
+            metric: {name: RollingWindow(span, bucket) for name, span, bucket in WINDOWS}
+            for metric in METRICS
+        }
+        self.by_type: Dict[str, Dict[str, RollingWindow]] = {metric: {} for metric in METRICS}
+        self.by_district: Dict[str, Dict[str, RollingWindow]] = {metric: {} for metric in METRICS}
+
+    def record(
+        self,
+        metric: str,
+        seconds: float,
+        at: datetime,
+        incident_type: Optional[str] = None,
+        district: Optional[str] = None
+    ):
+        """Add one transition duration"""
+        seconds = max(seconds, 0.0)
+        for window in self.windows[metric].values():
+            window.add(seconds, at)
+        if incident_type:
+            self._dimension_window(self.by_type[metric], incident_type).add(seconds, at)
+        if district:
+            self._dimension_window(self.by_district[metric], district).add(seconds, at)
+
+    def _dimension_window(self, windows: Dict[str, RollingWindow], key: str) -> RollingWindow:
+        window = windows.get(key)
+        if window is None:
+            window = windows[key] = RollingWindow(*DIMENSION_WINDOW)
+        return window
+
+    def _dimension_summary(self, windows: Dict[str, RollingWindow], now: datetime) -> Dict[str, Any]:
+        summaries = {key: window.merged(now).summary() for key, window in windows.items()}
+        return {key: summary for key, summary in summaries.items() if summary["count"]}
+
+    def window_summary(self, metric: str, window: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Count/mean/p50/p90 for one metric over one rolling window"""
+        return self.windows[metric][window].merged(now or datetime.utcnow()).summary()
+
+    def get_summary(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Every window and dimension breakdown, in seconds"""
+        now = now or datetime.utcnow()
+        return {
+            metric: {
+                "windows": {name: self.window_summary(metric, name, now) for name, _, _ in WINDOWS},
+                "by_type": self._dimension_summary(self.by_type[metric], now),
+                "by_district": self._dimension_summary(self.by_district[metric], now)
+            }
+            for metric in METRICS
+        }
+
+    async def load(self, collection, since: timedelta = WINDOWS[-1][1]) -> int:
+        """Replay recent persisted transition events (startup warm-up)"""
+        cutoff = datetime.utcnow() - since
+        count = 0
+        async for event in collection.find({"at": {"$gte": cutoff}}, {"_id": 0}):
+            self.record(event["metric"], event["seconds"], event["at"], event.get("type"), event.get("district"))
+            count += 1
+        logger.info(f"Response analytics warmed with {count} transition events")
+        return count
+
+def transition_event(incident: Dict[str, Any], metric: str, at: datetime) -> Dict[str, Any]:
+    """Build the persisted event for an incident reaching a transition"""
+    location = incident.get("location") or {}
+    incident_type = incident.get("type")
+    return {
+        "incident_id": incident["id"],
+        "metric": metric,
+        "seconds": (at - incident["timestamp"]).total_seconds(),
+        "at": at,
+        "type": incident_type.value if hasattr(incident_type, "value") else incident_type,
+        "district": location.get("district")
+    }
+
+# Global response analytics instance
+response_analytics = ResponseAnalytics()
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from models.emergency import Priority
+from services.response_analytics import MILLISECOND_BIN_EDGES, StreamingHistogram
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_CONCURRENCY = int(os.environ.get("SCHEDULER_CONCURRENCY", "8"))
+SCHEDULER_MAX_QUEUED = int(os.environ.get("SCHEDULER_MAX_QUEUED", "1000"))
+
+# Highest priority first; also the eviction order when the queue is full (reversed)
+PRIORITY_ORDER = [Priority.CRITICAL, Priority.HIGH, Priority.MEDIUM, Priority.LOW]
+
+# Share of dequeues each priority gets while several queues are backed up
+PRIORITY_WEIGHTS = {
+    Priority.CRITICAL: 8,
+    Priority.HIGH: 4,
+    Priority.MEDIUM: 2,
+    Priority.LOW: 1,
+}
+
+class SchedulerOverloaded(Exception):
+    """Raised when a job is rejected, or evicted in favour of a more urgent one"""
+
+class Job:
+    def __init__(self, priority: Priority, func: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict):
+        self.priority = priority
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+class PriorityQueueStats:
+    """Counters and queue wait times for one priority"""
+
+    def __init__(self):
+        self.wait_ms = StreamingHistogram(MILLISECOND_BIN_EDGES)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.evicted = 0
+        self.rejected = 0
+
+class PriorityScheduler:
+    """Async work scheduler with per-priority queues.
+
+    Jobs wait in one FIFO queue per incident priority and are dequeued
+    with smooth weighted round-robin, so a backlog of low-priority work
+    still drains while critical jobs get most of the worker slots. At
+    most `concurrency` jobs run at once. When the queues are full, a new
+    job preempts (evicts) the most recently queued job of the lowest
+    priority below its own; if there is none the new job is rejected.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = SCHEDULER_CONCURRENCY,
+        max_queued: int = SCHEDULER_MAX_QUEUED,
+        weights: Optional[Dict[Priority, int]] = None
+    ):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.weights = weights or PRIORITY_WEIGHTS
+        self.queues: Dict[Priority, Deque[Job]] = {priority: deque() for priority in PRIORITY_ORDER}
+        self.credits: Dict[Priority, int] = {priority: 0 for priority in PRIORITY_ORDER}
+        self.stats: Dict[Priority, PriorityQueueStats] = {
+            priority: PriorityQueueStats() for priority in PRIORITY_ORDER
+        }
+        self.running = 0
+        self.workers: List[asyncio.Task] = []
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._unscheduled: Set[asyncio.Task] = set()
+
+    @property
+    def started(self) -> bool:
+        return bool(self.workers)
+
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def start(self):
+        """Start the worker pool (call from a running event loop)"""
+        if self.started:
+            return
+        self._ready = asyncio.Semaphore(0)
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f"Priority scheduler started with {self.concurrency} workers")
+
+    async def stop(self):
+        """Cancel the workers and fail any jobs still queued"""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        for queue in self.queues.values():
+            while queue:
+                job = queue.popleft()
+                if not job.future.done():
+                    job.future.set_exception(SchedulerOverloaded("Scheduler stopped"))
+
+    def submit(self, priority: Any, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> asyncio.Future:
+        """Queue `func(*args, **kwargs)` at an incident priority; returns a future for its result"""
+        job = Job(Priority(priority), func, args, kwargs)
+        stats = self.stats[job.priority]
+        stats.submitted += 1
+
+        if not self.started:
+            # No worker pool (e.g. scripts): run immediately, unscheduled
+            task = asyncio.create_task(self._execute(job))
+            self._unscheduled.add(task)
+            task.add_done_callback(self._unscheduled.discard)
+            return job.future
+
+        if self.queued() >= self.max_queued:
+            victim = self._evict_below(job.priority)
+            if victim is None:
+                stats.rejected += 1
+                job.future.set_exception(SchedulerOverloaded(f"Work queue full ({self.max_queued} jobs)"))
+                return job.future
+            # The evicted job's slot is reused, so the ready count stays unchanged
+            self.queues[job.priority].append(job)
+            return job.future
+
+        self.queues[job.priority].append(job)
+        self._ready.release()
+        return job.future
+
+    async def run(self, priority: Any, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Submit a job and wait for its result"""
+        return await self.submit(priority, func, *args, **kwargs)
+
+    def _evict_below(self, priority: Priority) -> Optional[Job]:
+        """Drop the newest queued job of the lowest priority below `priority`"""
+        for candidate in reversed(PRIORITY_ORDER):
+            if candidate == priority:
+                return None
+            queue = self.queues[candidate]
+            if queue:
+                victim = queue.pop()
+                self.stats[candidate].evicted += 1
+                victim.future.set_exception(
+                    SchedulerOverloaded(f"Preempted by {priority.value}-priority work")
+                )
+                logger.warning(f"Evicted queued {candidate.value}-priority job for {priority.value}-priority work")
+                return victim
+        return None
+
+    def _next_job(self) -> Optional[Job]:
+        """Smooth weighted round-robin over the non-empty queues"""
+        backlog = [priority for priority in PRIORITY_ORDER if self.queues[priority]]
+        if not backlog:
+            return None
+
+        total = 0
+        for priority in backlog:
+            self.credits[priority] += self.weights[priority]
+            total += self.weights[priority]
+        chosen = max(backlog, key=lambda priority: self.credits[priority])
+        self.credits[chosen] -= total
+
+        # Idle queues do not bank credit
+        for priority in PRIORITY_ORDER:
+            if not self.queues[priority] and priority != chosen:
+                self.credits[priority] = 0
+        return self.queues[chosen].popleft()
+
+    async def _worker(self):
+        while True:
+            await self._ready.acquire()
+            job = self._next_job()
+            if job is None:
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: Job):
+        stats = self.stats[job.priority]
+        stats.wait_ms.add((time.monotonic() - job.enqueued_at) * 1000)
+        if job.future.done():
+            return
+
+        self.running += 1
+        try:
+            result = await job.func(*job.args, **job.kwargs)
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            stats.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            stats.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self.running -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, outcomes and wait times per priority"""
+        return {
+            "concurrency": self.concurrency,
+            "max_queued": self.max_queued,
+            "running": self.running,
+            "queued": self.queued(),
+            "priorities": {
+                priority.value: {
+                    "weight": self.weights[priority],
+                    "queued": len(self.queues[priority]),
+                    "submitted": stats.submitted,
+                    "completed": stats.completed,
+                    "failed": stats.failed,
+                    "evicted": stats.evicted,
+                    "rejected": stats.rejected,
+                    "wait_ms": stats.wait_ms.summary()
+                }
+                for priority, stats in self.stats.items()
+            }
+        }
+
+# Global scheduler for dispatch and routing work
+work_scheduler = PriorityScheduler()
@@ -0,0 +1,88 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from services.serialization import DEFAULT_PROJECTION
+
+# Text index definitions: (name, keys, weights). Higher weight ranks higher.
+INCIDENT_TEXT_INDEX = (
+    "incident_search",
+    [("id", "text"), ("location.district", "text"), ("location.address", "text"), ("description", "text")],
+    {"id": 10, "location.district": 5, "location.address": 3, "description": 1},
+)
+VEHICLE_TEXT_INDEX = (
+    "vehicle_search",
+    [("call_sign", "text"), ("id", "text"), ("crew.name", "text")],
+    {"call_sign": 10, "id": 8, "crew.name": 3},
+)
+
+# Identifiers look like INC-2025-1A2B3C4D or FD-ENGINE-54
+ID_PREFIX_PATTERN = re.compile(r"^[A-Za-z]+-[A-Za-z0-9-]*$")
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+async def create_text_index(collection, definition):
+    """Create a weighted text index from one of the definitions above"""
+    name, keys, weights = definition
+    await collection.create_index(keys, name=name, weights=weights, default_language="english")
+
+def text_search_terms(query: str) -> Optional[str]:
+    """Reduce a free-text query to plain terms for `$text`.
+
+    Quotes and leading hyphens carry phrase/negation meaning in `$search`,
+    so only word characters are kept.
+    """
+    terms = TERM_PATTERN.findall(query)
+    return " ".join(terms) if terms else None
+
+def normalize_id(entity_id: str) -> str:
+    """Canonical (upper-case) stored form of an entity ID, applied on every write path"""
+    return entity_id.strip().upper()
+
+def id_prefix_filter(query: str, field: str = "id") -> Optional[Dict[str, Any]]:
+    """Anchored, case-sensitive prefix filter that the unique ID index can serve.
+
+    Stored IDs are upper-case (see `normalize_id`), so upper-casing the
+    query makes the match case-insensitive without giving up the index.
+    """
+    query = query.strip()
+    if not ID_PREFIX_PATTERN.match(query):
+        return None
+    return {field: {"$regex": f"^{re.escape(query.upper())}"}}
+
+async def ranked_search(
+    collection,
+    query: str,
+    tiebreak: List[Any],
+    limit: int
+) -> List[Dict[str, Any]]:
+    """Run an ID-prefix lookup followed by a relevance-ranked text search.
+
+    Exact ID prefixes are returned first (they are what a dispatcher typing
+    an ID wants); text matches follow, ordered by text score and then by
+    `tiebreak`. Both queries are index-served, so latency does not grow
+    with collection size the way unanchored `$regex` scans do.
+    """
+    results: List[Dict[str, Any]] = []
+    seen = set()
+
+    prefix_filter = id_prefix_filter(query)
+    if prefix_filter:
+        cursor = collection.find(prefix_filter, DEFAULT_PROJECTION).sort("id", 1).limit(limit)
+        async for document in cursor:
+            seen.add(document["id"])
+            results.append(document)
+
+    terms = text_search_terms(query)
+    if terms and len(results) < limit:
+        projection = {**DEFAULT_PROJECTION, "score": {"$meta": "textScore"}}
+        cursor = collection.find({"$text": {"$search": terms}}, projection).sort(
+            [("score", {"$meta": "textScore"})] + tiebreak
+        ).limit(limit)
+        async for document in cursor:
+            document.pop("score", None)
+            if document["id"] in seen:
+                continue
+            results.append(document)
+            if len(results) >= limit:
+                break
+
+    return results
@@ -0,0 +1,121 @@
+import json
+import os
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Type, Union
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+# Debug switch: set VALIDATE_READS=true to run every read through the
+# pydantic models again, even on endpoints that opted into trusted reads.
+VALIDATE_READS = os.environ.get("VALIDATE_READS", "false").lower() in ("1", "true", "yes")
+
+# Documents we wrote ourselves never need their Mongo `_id`
+DEFAULT_PROJECTION = {"_id": 0}
+
+# Selectable fields for sparse list responses
+LOCATION_FIELDS = {"location.address", "location.coordinates", "location.district", "location.heading"}
+INCIDENT_FIELDS = {
+    "id", "type", "priority", "location", "description", "timestamp", "status",
+    "assigned_vehicles", "reported_by", "estimated_arrival", "last_update",
+    "dispatched_at", "on_scene_at", "resolved_at", "notes", "report_count",
+    "duplicate_reports"
+} | LOCATION_FIELDS
+VEHICLE_FIELDS = {
+    "id", "call_sign", "type", "status", "location", "crew", "current_incident",
+    "eta", "speed", "fuel", "equipment", "last_update", "maintenance_due"
+} | LOCATION_FIELDS
+
+# Named field sets, e.g. `fields=map` for the dashboard map refresh
+INCIDENT_FIELD_PRESETS = {
+    "map": ["id", "type", "priority", "status", "location.coordinates"],
+}
+VEHICLE_FIELD_PRESETS = {
+    "map": ["id", "call_sign", "type", "status", "location.coordinates", "location.heading"],
+}
+
+def parse_fields(
+    fields: Optional[str],
+    allowed: Iterable[str],
+    presets: Optional[Dict[str, List[str]]] = None
+) -> Optional[List[str]]:
+    """Parse a comma-separated `fields` parameter into a validated field list"""
+    if not fields:
+        return None
+
+    presets = presets or {}
+    allowed = set(allowed)
+    selected: List[str] = []
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        for field in presets.get(name, [name]):
+            if field not in allowed:
+                raise ValueError(f"Unknown field: {field}")
+            if field not in selected:
+                selected.append(field)
+
+    return selected or None
+
+def build_projection(fields: Optional[List[str]]) -> Dict[str, int]:
+    """Mongo projection for the selected fields; `id` is always included"""
+    if not fields:
+        return DEFAULT_PROJECTION
+
+    projection = {"_id": 0, "id": 1}
+    for field in fields:
+        # A whole-document field already covers its subfields (Mongo rejects the overlap)
+        parent = field.split(".", 1)[0]
+        if parent != field and parent in fields:
+            continue
+        projection[field] = 1
+    return projection
+
+def trusted_reads_enabled(trusted: bool = True) -> bool:
+    """Whether a read that asked for the trusted path should get it"""
+    return trusted and not VALIDATE_READS
+
+def _default(value: Any) -> Any:
+    """Encode the non-JSON types that appear in our stored documents"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return str(value)
+
+# Built once and reused for every trusted response
+_encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+def encode_documents(content: Any) -> bytes:
+    """Serialize raw documents to JSON bytes"""
+    return _encoder.encode(content).encode("utf-8")
+
+def load_documents(
+    model: Type[BaseModel],
+    documents: List[Dict[str, Any]],
+    trusted: bool = False
+) -> Union[List[Dict[str, Any]], List[BaseModel]]:
+    """Return raw documents on the trusted path, validated models otherwise"""
+    if trusted_reads_enabled(trusted):
+        return documents
+    return [model(**document) for document in documents]
+
+class TrustedJSONResponse(Response):
+    """JSON response that skips FastAPI's response_model validation"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return encode_documents(content)
+
+def trusted_response(content: Any, trusted: bool = True) -> Any:
+    """Wrap trusted content so FastAPI serializes it without re-validating.
+
+    When the debug switch is on the content is returned untouched, so the
+    endpoint's `response_model` validates it as usual.
+    """
+    if trusted_reads_enabled(trusted):
+        return TrustedJSONResponse(content=content)
+    return content
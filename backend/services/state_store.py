@@ -0,0 +1,264 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VEHICLE = "vehicle"
+INCIDENT = "incident"
+
+# Fields mirrored to clients per entity kind; everything else stays server-side
+TRACKED_FIELDS = {
+    VEHICLE: ("call_sign", "type", "status", "location", "speed", "fuel", "current_incident", "eta"),
+    INCIDENT: (
+        "type", "priority", "status", "location", "description", "assigned_vehicles",
+        "estimated_arrival", "report_count", "timestamp"
+    ),
+}
+
+# Removed entities remembered for deltas; older removals force a snapshot
+TOMBSTONE_LIMIT = 10000
+
+EntityKey = Tuple[str, str]
+
+# Called as (op, kind, entity_id, fields) for every local change; op is "set" or "remove"
+ChangeListener = Callable[[str, str, str, Dict[str, Any]], None]
+
+def process_epoch() -> int:
+    """Identifier distinguishing this process's counters from other workers and restarts"""
+    return (int(time.time()) << 20) | (os.getpid() & 0xFFFFF)
+
+def _plain(value: Any) -> Any:
+    """JSON-ready copy: enum members -> values, datetimes -> ISO strings, containers copied"""
+    if hasattr(value, "value"):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+def tracked_fields(kind: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """The client-visible fields of a stored document, as the store would hold them"""
+    return {field: _plain(document[field]) for field in TRACKED_FIELDS[kind] if field in document}
+
+class Entity:
+    __slots__ = ("fields", "field_versions", "version")
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.field_versions: Dict[str, int] = {}
+        self.version = 0
+
+class StateStore:
+    """Versioned mirror of the fleet and open incidents for client sync.
+
+    Every change bumps a global version and stamps the changed fields with
+    it. A client holding version N catches up with only the fields changed
+    since N (`delta_since`) instead of reloading everything; a client with
+    no state, or one older than the removal horizon, gets a `snapshot`.
+    Entities are kept in change order, so building a delta walks only the
+    entities changed since N.
+    """
+
+    def __init__(self, tombstone_limit: int = TOMBSTONE_LIMIT):
+        self.entities: "OrderedDict[EntityKey, Entity]" = OrderedDict()
+        self.tombstones: "OrderedDict[EntityKey, int]" = OrderedDict()
+        self.tombstone_limit = tombstone_limit
+        self.version = 0
+        # Deltas from versions below this may miss removals
+        self.horizon = 0
+        # Versions are per process; clients must resync across epochs
+        self.epoch = process_epoch()
+        self.on_change: Optional[ChangeListener] = None
+
+    def _set_fields(self, key: EntityKey, entity: Entity, fields: Dict[str, Any], notify: bool = True) -> Dict[str, Any]:
+        changed = {}
+        tracked = TRACKED_FIELDS[key[0]]
+        for field, value in fields.items():
+            if field not in tracked:
+                continue
+            value = _plain(value)
+            if field in entity.fields and entity.fields[field] == value:
+                continue
+            changed[field] = value
+
+        if changed:
+            self.version += 1
+            for field, value in changed.items():
+                entity.fields[field] = value
+                entity.field_versions[field] = self.version
+            entity.version = self.version
+            self.entities.move_to_end(key)
+            if notify and self.on_change is not None:
+                self.on_change("set", key[0], key[1], changed)
+        return changed
+
+    def upsert(self, kind: str, entity_id: str, document: Dict[str, Any], notify: bool = True) -> Dict[str, Any]:
+        """Insert or update an entity from a full document; returns the changed fields"""
+        key = (kind, entity_id)
+        entity = self.entities.get(key)
+        if entity is None:
+            entity = self.entities[key] = Entity()
+            self.tombstones.pop(key, None)
+        return self._set_fields(key, entity, document, notify)
+
+    def apply_update(self, kind: str, entity_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a partial `$set` payload to a known entity; returns the changed fields"""
+        key = (kind, entity_id)
+        entity = self.entities.get(key)
+        if entity is None:
+            return {}
+        return self._set_fields(key, entity, fields)
+
+    def add_item(self, kind: str, entity_id: str, field: str, item: Any):
+        """`$addToSet` on a list field"""
+        entity = self.entities.get((kind, entity_id))
+        if entity is not None and item not in entity.fields.get(field, []):
+            self.apply_update(kind, entity_id, {field: entity.fields.get(field, []) + [item]})
+
+    def remove_item(self, kind: str, entity_id: str, field: str, item: Any):
+        """`$pull` on a list field"""
+        entity = self.entities.get((kind, entity_id))
+        if entity is not None and item in entity.fields.get(field, []):
+            self.apply_update(kind, entity_id, {field: [value for value in entity.fields[field] if value != item]})
+
+    def remove(self, kind: str, entity_id: str, notify: bool = True) -> bool:
+        """Drop an entity (e.g. a closed incident), leaving a tombstone for deltas"""
+        key = (kind, entity_id)
+        if self.entities.pop(key, None) is None:
+            return False
+
+        self.version += 1
+        self.tombstones[key] = self.version
+        if len(self.tombstones) > self.tombstone_limit:
+            _, self.horizon = self.tombstones.popitem(last=False)
+        if notify and self.on_change is not None:
+            self.on_change("remove", kind, entity_id, {})
+        return True
+
+    async def refresh(
+        self,
+        vehicles,
+        incidents,
+        open_statuses: Iterable[str],
+        changed: Optional[Dict[str, Iterable[str]]] = None
+    ) -> int:
+        """Re-read entities changed by another worker from the database, without re-announcing them.
+
+        `changed` maps kind -> entity IDs; None re-reads everything (a
+        resync). Entities no longer stored (or no longer open, for
+        incidents) are removed. Returns the number of fields changed.
+        """
+        sources = {VEHICLE: (vehicles, {}), INCIDENT: (incidents, {"status": {"$in": list(open_statuses)}})}
+        changes = 0
+        for kind, (collection, query) in sources.items():
+            if changed is not None and not changed.get(kind):
+                continue
+            expected = set(changed[kind]) if changed is not None else {
+                entity_id for entity_kind, entity_id in self.entities if entity_kind == kind
+            }
+            if changed is not None:
+                query = {**query, "id": {"$in": sorted(expected)}}
+
+            projection = {"_id": 0, "id": 1, **{field: 1 for field in TRACKED_FIELDS[kind]}}
+            async for document in collection.find(query, projection):
+                changes += len(self.upsert(kind, document["id"], document, notify=False))
+                expected.discard(document["id"])
+            for entity_id in expected:
+                changes += self.remove(kind, entity_id, notify=False)
+        return changes
+
+    def get(self, kind: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        entity = self.entities.get((kind, entity_id))
+        return dict(entity.fields) if entity else None
+
+    def query(
+        self,
+        kind: str,
+        ids: Optional[Iterable[str]] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """Current fields of the `kind` entities (only `ids`, if given) matching `predicate`.
+
+        Returns the matches, most recently changed first, and whether
+        `limit` cut them short.
+        """
+        if ids is not None:
+            candidates = ((entity_id, self.entities.get((kind, entity_id))) for entity_id in ids)
+        else:
+            candidates = ((entity_id, entity) for (entity_kind, entity_id), entity in reversed(self.entities.items()) if entity_kind == kind)
+
+        matches: Dict[str, Dict[str, Any]] = {}
+        for entity_id, entity in candidates:
+            if entity is None or (predicate is not None and not predicate(entity.fields)):
+                continue
+            if limit is not None and len(matches) >= limit:
+                return matches, True
+            matches[entity_id] = entity.fields
+        return matches, False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every entity's tracked fields at the current version"""
+        entities: Dict[str, Dict[str, Any]] = {kind: {} for kind in TRACKED_FIELDS}
+        for (kind, entity_id), entity in self.entities.items():
+            entities[kind][entity_id] = entity.fields
+        return {"epoch": self.epoch, "version": self.version, "entities": entities}
+
+    def delta_since(self, version: int, epoch: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Fields changed and entities removed after `version`, or None if a snapshot is needed"""
+        if epoch is not None and epoch != self.epoch:
+            return None
+        if version < self.horizon or version > self.version:
+            return None
+
+        changes: Dict[str, Dict[str, Any]] = {}
+        for (kind, entity_id), entity in reversed(self.entities.items()):
+            if entity.version <= version:
+                break
+            changes.setdefault(kind, {})[entity_id] = {
+                field: entity.fields[field]
+                for field, field_version in entity.field_versions.items()
+                if field_version > version
+            }
+
+        removed: Dict[str, List[str]] = {}
+        for (kind, entity_id), removed_at in reversed(self.tombstones.items()):
+            if removed_at <= version:
+                break
+            removed.setdefault(kind, []).append(entity_id)
+
+        return {
+            "epoch": self.epoch,
+            "from": version,
+            "version": self.version,
+            "changes": changes,
+            "removed": removed
+        }
+
+    async def load(self, vehicles, incidents, open_statuses: Iterable[str]) -> int:
+        """Mirror every vehicle and open incident (startup warm-up)"""
+        count = 0
+        async for vehicle in vehicles.find({}, {"_id": 0}):
+            self.upsert(VEHICLE, vehicle["id"], vehicle)
+            count += 1
+        async for incident in incidents.find({"status": {"$in": list(open_statuses)}}, {"_id": 0}):
+            self.upsert(INCIDENT, incident["id"], incident)
+            count += 1
+        logger.info(f"State store loaded with {count} entities at version {self.version}")
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        counts = {kind: 0 for kind in TRACKED_FIELDS}
+        for kind, _ in self.entities:
+            counts[kind] += 1
+        return {"epoch": self.epoch, "version": self.version, "horizon": self.horizon, "entities": counts, "tombstones": len(self.tombstones)}
+
+# Global state mirror for WebSocket sync
+state_store = StateStore()
@@ -0,0 +1,288 @@
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from models.emergency import EmergencyType, IncidentStatus, Priority, VehicleStatus
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_COUNTERS = "incidents"
+VEHICLE_COUNTERS = "vehicles"
+
+# Bumped by every counter write, so reconcile can tell whether one raced it
+VERSION_FIELD = "version"
+
+# Passes reconcile makes before leaving a busy counter document to the next run
+RECONCILE_ATTEMPTS = 3
+
+OPEN_STATUSES = [IncidentStatus.ACTIVE.value, IncidentStatus.DISPATCHED.value, IncidentStatus.ON_SCENE.value]
+
+def _value(value: Any) -> str:
+    """Normalize an enum member or raw string to its string value"""
+    return value.value if hasattr(value, "value") else value
+
+def _flatten(counters: Dict[str, Any], prefix: str = "") -> Dict[str, int]:
+    """Nested counter document -> {dotted path: count}"""
+    flat: Dict[str, int] = {}
+    for key, value in counters.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+class StatsService:
+    """Materialized counters kept in the `stats_counters` collection.
+
+    Every write path that creates an entity or changes its status applies
+    an `$inc` here, so summary reads are a single document lookup instead
+    of collection scans. `reconcile` recomputes the counters from source
+    data to correct any drift (e.g. a crash between the two writes).
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.collection = db.stats_counters
+
+    async def _increment(self, counter_id: str, increments: Dict[str, int]):
+        """`$inc` a counter document, bumping its version"""
+        await self.collection.update_one(
+            {"_id": counter_id},
+            {"$inc": {**increments, VERSION_FIELD: 1}},
+            upsert=True
+        )
+
+    async def incident_created(self, incident: Dict[str, Any]):
+        """Count a newly stored incident"""
+        status = _value(incident["status"])
+        priority = _value(incident["priority"])
+        await self._increment(INCIDENT_COUNTERS, {
+            "total": 1,
+            f"status.{status}": 1,
+            f"priority.{priority}": 1,
+            f"type.{_value(incident['type'])}": 1,
+            f"priority_status.{priority}.{status}": 1
+        })
+
+    async def incidents_imported(self, incidents: List[Dict[str, Any]]):
+        """Count a batch of stored incidents with a single update"""
+        increments: Dict[str, int] = {"total": len(incidents)}
+        for incident in incidents:
+            status = _value(incident["status"])
+            priority = _value(incident["priority"])
+            for key in (
+                f"status.{status}",
+                f"priority.{priority}",
+                f"type.{_value(incident['type'])}",
+                f"priority_status.{priority}.{status}"
+            ):
+                increments[key] = increments.get(key, 0) + 1
+
+        await self._increment(INCIDENT_COUNTERS, increments)
+
+    async def incident_status_changed(self, priority: Any, old_status: Any, new_status: Any):
+        """Move an incident between status counters"""
+        old_status, new_status = _value(old_status), _value(new_status)
+        if old_status == new_status:
+            return
+
+        priority = _value(priority)
+        await self._increment(INCIDENT_COUNTERS, {
+            f"status.{old_status}": -1,
+            f"status.{new_status}": 1,
+            f"priority_status.{priority}.{old_status}": -1,
+            f"priority_status.{priority}.{new_status}": 1
+        })
+
+    async def incident_priority_changed(self, status: Any, old_priority: Any, new_priority: Any):
+        """Move an incident between priority counters"""
+        old_priority, new_priority = _value(old_priority), _value(new_priority)
+        if old_priority == new_priority:
+            return
+
+        status = _value(status)
+        await self._increment(INCIDENT_COUNTERS, {
+            f"priority.{old_priority}": -1,
+            f"priority.{new_priority}": 1,
+            f"priority_status.{old_priority}.{status}": -1,
+            f"priority_status.{new_priority}.{status}": 1
+        })
+
+    async def vehicle_created(self, vehicle: Dict[str, Any]):
+        """Count a newly stored vehicle"""
+        await self._increment(VEHICLE_COUNTERS, {
+            "total": 1,
+            f"status.{_value(vehicle['status'])}": 1,
+            f"type.{_value(vehicle['type'])}": 1
+        })
+
+    async def vehicle_status_changed(self, old_status: Any, new_status: Any):
+        """Move a vehicle between status counters"""
+        old_status, new_status = _value(old_status), _value(new_status)
+        if old_status == new_status:
+            return
+
+        await self._increment(VEHICLE_COUNTERS, {f"status.{old_status}": -1, f"status.{new_status}": 1})
+
+    async def get_counters(self) -> Dict[str, Dict[str, Any]]:
+        """Read both counter documents"""
+        documents = await self.collection.find(
+            {"_id": {"$in": [INCIDENT_COUNTERS, VEHICLE_COUNTERS]}}
+        ).to_list(length=2)
+        counters = {document.pop("_id"): document for document in documents}
+        return {
+            INCIDENT_COUNTERS: counters.get(INCIDENT_COUNTERS, {}),
+            VEHICLE_COUNTERS: counters.get(VEHICLE_COUNTERS, {})
+        }
+
+    async def get_summary(self) -> Dict[str, int]:
+        """Flattened counts used by the stats endpoints"""
+        counters = await self.get_counters()
+        incidents = counters[INCIDENT_COUNTERS]
+        vehicles = counters[VEHICLE_COUNTERS]
+
+        incident_status = incidents.get("status", {})
+        critical_by_status = incidents.get("priority_status", {}).get(Priority.CRITICAL.value, {})
+        vehicle_status = vehicles.get("status", {})
+
+        return {
+            "total_incidents": incidents.get("total", 0),
+            "active_incidents": sum(incident_status.get(status, 0) for status in OPEN_STATUSES),
+            "critical_incidents": sum(
+                count for status, count in critical_by_status.items()
+                if status != IncidentStatus.RESOLVED.value
+            ),
+            "total_vehicles": vehicles.get("total", 0),
+            "available_vehicles": vehicle_status.get(VehicleStatus.AVAILABLE.value, 0),
+            "dispatched_vehicles": vehicle_status.get(VehicleStatus.DISPATCHED.value, 0),
+            "on_scene_vehicles": vehicle_status.get(VehicleStatus.ON_SCENE.value, 0)
+        }
+
+    async def get_vehicle_status_counts(self) -> Dict[str, int]:
+        """Vehicle counts per status, plus a total"""
+        vehicles = (await self.get_counters())[VEHICLE_COUNTERS]
+        stats = {status.value: vehicles.get("status", {}).get(status.value, 0) for status in VehicleStatus}
+        stats["total"] = vehicles.get("total", 0)
+        return stats
+
+    async def _group_counts(self, collection, fields) -> Dict[str, Any]:
+        """Count a collection by each of `fields` in a single aggregation"""
+        facets = {
+            field: [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+            for field in fields
+        }
+        if "priority" in fields:
+            facets["priority_status"] = [
+                {"$group": {"_id": {"priority": "$priority", "status": "$status"}, "count": {"$sum": 1}}}
+            ]
+        result = await collection.aggregate([{"$facet": facets}]).to_list(length=1)
+        return result[0] if result else {}
+
+    def _incident_sources(self):
+        """Collections whose incidents are included in the counters (archived ones still count)"""
+        return [self.db.incidents, self.db.incidents_archive]
+
+    async def compute_counters(self) -> Dict[str, Dict[str, Any]]:
+        """Recompute every counter from the source collections"""
+        incidents: Dict[str, Any] = {
+            "total": 0,
+            "status": {status.value: 0 for status in IncidentStatus},
+            "priority": {priority.value: 0 for priority in Priority},
+            "type": {emergency_type.value: 0 for emergency_type in EmergencyType},
+            "priority_status": {}
+        }
+        for collection in self._incident_sources():
+            groups = await self._group_counts(collection, ["status", "priority", "type"])
+            for field in ("status", "priority", "type"):
+                for group in groups.get(field, []):
+                    incidents[field][group["_id"]] = incidents[field].get(group["_id"], 0) + group["count"]
+                    if field == "status":
+                        incidents["total"] += group["count"]
+            for group in groups.get("priority_status", []):
+                by_status = incidents["priority_status"].setdefault(group["_id"]["priority"], {})
+                status = group["_id"]["status"]
+                by_status[status] = by_status.get(status, 0) + group["count"]
+
+        vehicles: Dict[str, Any] = {
+            "total": 0,
+            "status": {status.value: 0 for status in VehicleStatus},
+            "type": {emergency_type.value: 0 for emergency_type in EmergencyType}
+        }
+        groups = await self._group_counts(self.db.vehicles, ["status", "type"])
+        for field in ("status", "type"):
+            for group in groups.get(field, []):
+                vehicles[field][group["_id"]] = group["count"]
+                if field == "status":
+                    vehicles["total"] += group["count"]
+
+        return {INCIDENT_COUNTERS: incidents, VEHICLE_COUNTERS: vehicles}
+
+    async def _apply_correction(self, counter_id: str, version: Any, correction: Dict[str, int]) -> bool:
+        """`$inc` the correction only if the document is still at `version`; False if a write raced it"""
+        update = {"$inc": {**correction, VERSION_FIELD: 1}}
+        if version is not None:
+            result = await self.collection.update_one({"_id": counter_id, VERSION_FIELD: version}, update)
+            return result.matched_count == 1
+        try:
+            # Never written by a versioned path: create it, or stamp a legacy document
+            await self.collection.update_one({"_id": counter_id, VERSION_FIELD: {"$exists": False}}, update, upsert=True)
+        except DuplicateKeyError:
+            return False  # created concurrently
+        return True
+
+    async def reconcile(self) -> bool:
+        """Correct the counters towards freshly computed values.
+
+        Each counter document is read, with its version, before the counts
+        are computed; the correction (computed - observed) is then applied
+        only if the version is unchanged. An increment that lands while the
+        counts are computed bumps the version, so instead of being cancelled
+        out by the correction it makes that document retry, up to
+        RECONCILE_ATTEMPTS passes, after which it is left to the next run.
+        Returns True if any drift was found.
+        """
+        drifted = False
+        pending = [INCIDENT_COUNTERS, VEHICLE_COUNTERS]
+        for _ in range(RECONCILE_ATTEMPTS):
+            current = await self.get_counters()
+            computed = await self.compute_counters()
+
+            raced = []
+            for counter_id in pending:
+                observed = _flatten(current[counter_id])
+                version = observed.pop(VERSION_FIELD, None)
+                expected = _flatten(computed[counter_id])
+                correction = {
+                    path: expected.get(path, 0) - observed.get(path, 0)
+                    for path in expected.keys() | observed.keys()
+                    if expected.get(path, 0) != observed.get(path, 0)
+                }
+                if not correction:
+                    continue
+                if await self._apply_correction(counter_id, version, correction):
+                    drifted = drifted or bool(observed)
+                else:
+                    raced.append(counter_id)
+
+            pending = raced
+            if not pending:
+                break
+
+        if pending:
+            logger.info(f"Stats counters {pending} kept changing during reconciliation; retrying next run")
+        if drifted:
+            logger.warning("Stats counters drifted from source data and were reconciled")
+        return drifted
+
+async def run_reconciliation(db: AsyncIOMotorDatabase, interval_seconds: float):
+    """Periodically reconcile the stats counters until cancelled"""
+    stats_service = StatsService(db)
+    while True:
+        try:
+            await stats_service.reconcile()
+        except Exception as e:
+            logger.error(f"Stats reconciliation failed: {e}")
+        await asyncio.sleep(interval_seconds)
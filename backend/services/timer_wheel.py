@@ -0,0 +1,53 @@
+import math
+import time
+from typing import Dict, Hashable, List, Optional, Set
+
+class TimerWheel:
+    """Hashed timing wheel of deadlines, one per key.
+
+    Scheduling and cancelling are O(1), and advancing the clock visits only
+    the slots of the ticks that have passed, so tracking a deadline for
+    every connection costs neither a task per connection nor a scan of all
+    of them. Delays longer than the wheel wait extra turns in their slot.
+    """
+
+    def __init__(self, tick_seconds: float, slots: int):
+        self.tick_seconds = tick_seconds
+        self.slots: List[Set[Hashable]] = [set() for _ in range(slots)]
+        # key -> absolute tick at which it is due
+        self.deadlines: Dict[Hashable, int] = {}
+        self.current_tick = self._tick(time.monotonic())
+
+    def _tick(self, now: float) -> int:
+        return math.floor(now / self.tick_seconds)
+
+    def schedule(self, key: Hashable, delay_seconds: float, now: Optional[float] = None):
+        """(Re)schedule `key` to be due `delay_seconds` from now"""
+        self.cancel(key)
+        now = time.monotonic() if now is None else now
+        due = max(self._tick(now + delay_seconds), self.current_tick + 1)
+        self.deadlines[key] = due
+        self.slots[due % len(self.slots)].add(key)
+
+    def cancel(self, key: Hashable):
+        due = self.deadlines.pop(key, None)
+        if due is not None:
+            self.slots[due % len(self.slots)].discard(key)
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the clock to `now`; returns the keys that fell due (and unschedules them)"""
+        target = self._tick(time.monotonic() if now is None else now)
+        # A stall longer than a whole turn only needs each slot visited once
+        first = max(self.current_tick + 1, target - len(self.slots) + 1)
+        due: List[Hashable] = []
+        for tick in range(first, target + 1):
+            slot = self.slots[tick % len(self.slots)]
+            for key in [key for key in slot if self.deadlines[key] <= target]:
+                slot.discard(key)
+                del self.deadlines[key]
+                due.append(key)
+        self.current_tick = max(self.current_tick, target)
+        return due
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
@@ -1,20 +1,28 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List, Optional, Dict
+from pymongo import ReturnDocument
+from typing import List, Optional, Dict, Union, Any
 from datetime import datetime, timedelta
 
 from models.emergency import (
     Vehicle, VehicleCreate, VehicleStatus, VehicleStatusUpdate,
-    EmergencyType, Location
+    EmergencyType, Location, VehicleProjection
 )
+from services.fleet_snapshot import fleet_snapshot
+from services.state_store import state_store, VEHICLE
+from services.serialization import DEFAULT_PROJECTION, build_projection, load_documents
+from services.search import normalize_id, ranked_search
+from services.stats_service import StatsService
 
 class VehicleService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
         self.collection = db.vehicles
+        self.stats = StatsService(db)
 
     async def create_vehicle(self, vehicle_data: VehicleCreate) -> Vehicle:
         """Create a new emergency vehicle"""
         vehicle_dict = vehicle_data.dict()
+        vehicle_dict["id"] = normalize_id(vehicle_dict["id"])
         vehicle_dict["status"] = VehicleStatus.AVAILABLE
         vehicle_dict["location"] = {
             "address": f"Station - {vehicle_data.call_sign}",
@@ -30,6 +38,9 @@ class VehicleService:
         
         # Insert into database
         await self.collection.insert_one(vehicle.dict())
+        fleet_snapshot.upsert(vehicle.dict())
+        state_store.upsert(VEHICLE, vehicle.id, vehicle.dict())
+        await self.stats.vehicle_created(vehicle_dict)
         
         return vehicle
 
@@ -37,9 +48,24 @@ class VehicleService:
         self, 
         status: Optional[VehicleStatus] = None,
         type: Optional[EmergencyType] = None,
-        limit: int = 100
-    ) -> List[Vehicle]:
-        """Retrieve vehicles with optional filtering"""
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+        trusted: bool = False
+    ) -> Union[List[Vehicle], List[VehicleProjection], List[Dict[str, Any]]]:
+        """Retrieve vehicles with optional filtering and field projection"""
+        filter_dict = self.build_filter(status=status, type=type)
+        projection = build_projection(fields)
+        cursor = self.collection.find(filter_dict, projection).sort("call_sign", 1).limit(limit)
+        vehicles = await cursor.to_list(length=limit)
+        
+        return load_documents(VehicleProjection if fields else Vehicle, vehicles, trusted)
+
+    def build_filter(
+        self,
+        status: Optional[VehicleStatus] = None,
+        type: Optional[EmergencyType] = None
+    ) -> Dict[str, Any]:
+        """Build the Mongo filter for the vehicle list query shape"""
         filter_dict = {}
         
         if status:
@@ -47,10 +73,7 @@ class VehicleService:
         if type:
             filter_dict["type"] = type
             
-        cursor = self.collection.find(filter_dict).sort("call_sign", 1).limit(limit)
-        vehicles = await cursor.to_list(length=limit)
-        
-        return [Vehicle(**vehicle) for vehicle in vehicles]
+        return filter_dict
 
     async def get_vehicle_by_id(self, vehicle_id: str) -> Optional[Vehicle]:
         """Get a specific vehicle by ID"""
@@ -59,6 +82,12 @@ class VehicleService:
             return Vehicle(**vehicle_data)
         return None
 
+    async def get_vehicles_by_ids(self, vehicle_ids: List[str]) -> List[Vehicle]:
+        """Get vehicles by ID, preserving the order of `vehicle_ids`"""
+        cursor = self.collection.find({"id": {"$in": vehicle_ids}})
+        vehicles = {vehicle["id"]: vehicle for vehicle in await cursor.to_list(length=len(vehicle_ids))}
+        return [Vehicle(**vehicles[vehicle_id]) for vehicle_id in vehicle_ids if vehicle_id in vehicles]
+
     async def update_vehicle_status(
         self, 
         vehicle_id: str, 
@@ -82,14 +111,21 @@ class VehicleService:
         if status_update.eta:
             update_data["eta"] = status_update.eta
             
-        result = await self.collection.update_one(
+        previous = await self.collection.find_one_and_update(
             {"id": vehicle_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection=DEFAULT_PROJECTION,
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.modified_count > 0:
-            return await self.get_vehicle_by_id(vehicle_id)
-        return None
+        if previous is None:
+            return None
+        
+        fleet_snapshot.apply_update(vehicle_id, update_data)
+        
+        state_store.apply_update(VEHICLE, vehicle_id, update_data)
+        await self.stats.vehicle_status_changed(previous["status"], status_update.status)
+        return Vehicle(**{**previous, **update_data})
 
     async def update_vehicle_location(
         self, 
@@ -110,114 +146,121 @@ class VehicleService:
             {"id": vehicle_id},
             {"$set": update_data}
         )
+        if result.modified_count > 0:
+            fleet_snapshot.apply_update(vehicle_id, update_data)
+            state_store.apply_update(VEHICLE, vehicle_id, update_data)
         return result.modified_count > 0
 
     async def assign_to_incident(self, vehicle_id: str, incident_id: str) -> bool:
         """Assign vehicle to an incident"""
-        result = await self.collection.update_one(
+        update_data = {
+            "current_incident": incident_id,
+            "status": VehicleStatus.DISPATCHED,
+            "last_update": datetime.utcnow()
+        }
+        previous = await self.collection.find_one_and_update(
             {"id": vehicle_id},
-            {
-                "$set": {
-                    "current_incident": incident_id,
-                    "status": VehicleStatus.DISPATCHED,
-                    "last_update": datetime.utcnow()
-                }
-            }
+            {"$set": update_data},
+            projection={"_id": 0, "status": 1}
         )
-        return result.modified_count > 0
+        if previous is None:
+            return False
+        
+        fleet_snapshot.apply_update(vehicle_id, update_data)
+        
+        state_store.apply_update(VEHICLE, vehicle_id, update_data)
+        await self.stats.vehicle_status_changed(previous["status"], update_data["status"])
+        return True
 
     async def clear_incident_assignment(self, vehicle_id: str) -> bool:
         """Clear vehicle's incident assignment"""
-        result = await self.collection.update_one(
+        update_data = {
+            "current_incident": None,
+            "eta": None,
+            "status": VehicleStatus.AVAILABLE,
+            "last_update": datetime.utcnow()
+        }
+        previous = await self.collection.find_one_and_update(
             {"id": vehicle_id},
-            {
-                "$set": {
-                    "current_incident": None,
-                    "eta": None,
-                    "status": VehicleStatus.AVAILABLE,
-                    "last_update": datetime.utcnow()
-                }
-            }
+            {"$set": update_data},
+            projection={"_id": 0, "status": 1}
         )
-        return result.modified_count > 0
+        if previous is None:
+            return False
+        
+        fleet_snapshot.apply_update(vehicle_id, update_data)
+        
+        state_store.apply_update(VEHICLE, vehicle_id, update_data)
+        await self.stats.vehicle_status_changed(previous["status"], update_data["status"])
+        return True
 
     async def update_fuel_level(self, vehicle_id: str, fuel_level: float) -> bool:
         """Update vehicle fuel level"""
+        update_data = {
+            "fuel": max(0, min(100, fuel_level)),
+            "last_update": datetime.utcnow()
+        }
         result = await self.collection.update_one(
             {"id": vehicle_id},
-            {
-                "$set": {
-                    "fuel": max(0, min(100, fuel_level)),
-                    "last_update": datetime.utcnow()
-                }
-            }
+            {"$set": update_data}
         )
+        if result.modified_count > 0:
+            fleet_snapshot.apply_update(vehicle_id, update_data)
+            state_store.apply_update(VEHICLE, vehicle_id, update_data)
         return result.modified_count > 0
 
-    async def get_available_vehicles(self, emergency_type: Optional[EmergencyType] = None) -> List[Vehicle]:
+    async def get_available_vehicles(
+        self,
+        emergency_type: Optional[EmergencyType] = None,
+        trusted: bool = False
+    ) -> Union[List[Vehicle], List[Dict[str, Any]]]:
         """Get all available vehicles, optionally filtered by type"""
-        filter_dict = {"status": VehicleStatus.AVAILABLE}
-        if emergency_type:
-            filter_dict["type"] = emergency_type
-            
-        cursor = self.collection.find(filter_dict).sort("call_sign", 1)
+        filter_dict = self.build_filter(status=VehicleStatus.AVAILABLE, type=emergency_type)
+        cursor = self.collection.find(filter_dict, DEFAULT_PROJECTION).sort("call_sign", 1)
         vehicles = await cursor.to_list(length=None)
-        return [Vehicle(**vehicle) for vehicle in vehicles]
+        return load_documents(Vehicle, vehicles, trusted)
 
-    async def get_vehicles_by_incident(self, incident_id: str) -> List[Vehicle]:
+    async def get_vehicles_by_incident(
+        self,
+        incident_id: str,
+        trusted: bool = False
+    ) -> Union[List[Vehicle], List[Dict[str, Any]]]:
         """Get all vehicles assigned to an incident"""
-        cursor = self.collection.find({"current_incident": incident_id})
+        cursor = self.collection.find({"current_incident": incident_id}, DEFAULT_PROJECTION)
         vehicles = await cursor.to_list(length=None)
-        return [Vehicle(**vehicle) for vehicle in vehicles]
+        return load_documents(Vehicle, vehicles, trusted)
 
     async def get_vehicle_stats(self) -> Dict[str, int]:
-        """Get vehicle statistics"""
-        pipeline = [
-            {
-                "$group": {
-                    "_id": "$status",
-                    "count": {"$sum": 1}
-                }
-            }
-        ]
-        
-        result = await self.collection.aggregate(pipeline).to_list(length=None)
-        stats = {item["_id"]: item["count"] for item in result}
-        
-        # Ensure all statuses are represented
-        all_statuses = [status.value for status in VehicleStatus]
-        for status in all_statuses:
-            if status not in stats:
-                stats[status] = 0
-                
-        stats["total"] = sum(stats.values())
-        return stats
-
-    async def get_vehicles_needing_maintenance(self) -> List[Vehicle]:
+        """Get vehicle statistics from the materialized counters"""
+        return await self.stats.get_vehicle_status_counts()
+
+    async def get_vehicles_needing_maintenance(
+        self,
+        trusted: bool = False
+    ) -> Union[List[Vehicle], List[Dict[str, Any]]]:
         """Get vehicles that need maintenance"""
-        # Find vehicles with low fuel or overdue maintenance
-        filter_dict = {
+        cursor = self.collection.find(self.build_maintenance_filter(), DEFAULT_PROJECTION)
+        vehicles = await cursor.to_list(length=None)
+        return load_documents(Vehicle, vehicles, trusted)
+
+    def build_maintenance_filter(self) -> Dict[str, Any]:
+        """Vehicles with low fuel, overdue maintenance, or already in maintenance"""
+        return {
             "$or": [
                 {"fuel": {"$lt": 25}},
                 {"maintenance_due": {"$lt": datetime.utcnow()}},
                 {"status": VehicleStatus.MAINTENANCE}
             ]
         }
-        
-        cursor = self.collection.find(filter_dict)
-        vehicles = await cursor.to_list(length=None)
-        return [Vehicle(**vehicle) for vehicle in vehicles]
 
-    async def search_vehicles(self, query: str) -> List[Vehicle]:
-        """Search vehicles by call sign, ID, or crew names"""
-        search_filter = {
-            "$or": [
-                {"id": {"$regex": query, "$options": "i"}},
-                {"call_sign": {"$regex": query, "$options": "i"}},
-                {"crew.name": {"$regex": query, "$options": "i"}}
-            ]
-        }
-        
-        cursor = self.collection.find(search_filter).sort("call_sign", 1)
-        vehicles = await cursor.to_list(length=20)
-        return [Vehicle(**vehicle) for vehicle in vehicles]
\ No newline at end of file
+    async def search_vehicles(
+        self,
+        query: str,
+        limit: int = 20,
+        trusted: bool = False
+    ) -> Union[List[Vehicle], List[Dict[str, Any]]]:
+        """Search vehicles by call sign, ID, or crew names, ranked by relevance"""
+        vehicles = await ranked_search(
+            self.collection, query, tiebreak=[("call_sign", 1)], limit=limit
+        )
+        return load_documents(Vehicle, vehicles, trusted)
@@ -0,0 +1,140 @@
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Grid cell size for indexing viewports (~1.1 km of latitude)
+VIEWPORT_CELL_DEGREES = float(os.environ.get("VIEWPORT_CELL_DEGREES", "0.01"))
+
+# Viewports covering more cells than this are kept in a list checked on every lookup
+MAX_VIEWPORT_CELLS = 4096
+
+# (south, west, north, east) in degrees
+BoundingBox = Tuple[float, float, float, float]
+
+def parse_bbox(bbox: Optional[Iterable[float]]) -> Optional[BoundingBox]:
+    """Validate a client-supplied [south, west, north, east] box"""
+    if bbox is None:
+        return None
+    try:
+        south, west, north, east = (float(value) for value in bbox)
+    except (TypeError, ValueError):
+        raise ValueError("bbox must be [south, west, north, east]")
+    if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+        raise ValueError("bbox must satisfy south <= north and west <= east within valid coordinates")
+    return south, west, north, east
+
+class ClientViewport:
+    """What one client is looking at: a bounding box, districts, or both"""
+
+    def __init__(self, bbox: Optional[BoundingBox], districts: Set[str]):
+        self.bbox = bbox
+        self.districts = districts
+        self.cells: List[Tuple[int, int]] = []
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        if self.bbox is None:
+            return False
+        south, west, north, east = self.bbox
+        return south <= latitude <= north and west <= longitude <= east
+
+class ViewportIndex:
+    """Spatial index of client viewports for location fan-out.
+
+    Bounding boxes are registered in every grid cell they overlap, so a
+    lookup reads the one cell containing the point and checks only the
+    viewports registered there. District subscriptions are a plain
+    district -> clients map. Updating a viewport as the map pans re-indexes
+    only that client.
+    """
+
+    def __init__(self, cell_degrees: float = VIEWPORT_CELL_DEGREES, max_cells: int = MAX_VIEWPORT_CELLS):
+        self.cell_degrees = cell_degrees
+        self.max_cells = max_cells
+        self.viewports: Dict[str, ClientViewport] = {}
+        self.cells: Dict[Tuple[int, int], Set[str]] = {}
+        self.districts: Dict[str, Set[str]] = {}
+        # Viewports too large to index cell by cell
+        self.wide: Set[str] = set()
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def set(self, client_id: str, bbox: Optional[BoundingBox] = None, districts: Iterable[str] = ()):
+        """Replace a client's viewport; with no bbox and no districts the client is unfiltered"""
+        self.remove(client_id)
+        districts = set(districts)
+        if bbox is None and not districts:
+            return
+
+        viewport = ClientViewport(bbox, districts)
+        if bbox is not None:
+            south_row, west_column = self._cell(bbox[0], bbox[1])
+            north_row, east_column = self._cell(bbox[2], bbox[3])
+            if (north_row - south_row + 1) * (east_column - west_column + 1) > self.max_cells:
+                self.wide.add(client_id)
+            else:
+                viewport.cells = [
+                    (row, column)
+                    for row in range(south_row, north_row + 1)
+                    for column in range(west_column, east_column + 1)
+                ]
+                for cell in viewport.cells:
+                    self.cells.setdefault(cell, set()).add(client_id)
+        for district in districts:
+            self.districts.setdefault(district, set()).add(client_id)
+        self.viewports[client_id] = viewport
+
+    def remove(self, client_id: str):
+        """Forget a client's viewport"""
+        viewport = self.viewports.pop(client_id, None)
+        if viewport is None:
+            return
+        for cell in viewport.cells:
+            clients = self.cells[cell]
+            clients.discard(client_id)
+            if not clients:
+                del self.cells[cell]
+        for district in viewport.districts:
+            clients = self.districts[district]
+            clients.discard(client_id)
+            if not clients:
+                del self.districts[district]
+        self.wide.discard(client_id)
+
+    def has_viewport(self, client_id: str) -> bool:
+        return client_id in self.viewports
+
+    def get(self, client_id: str) -> Optional[ClientViewport]:
+        return self.viewports.get(client_id)
+
+    def sees(self, client_id: str, coordinates: Optional[List[float]], district: Optional[str] = None) -> bool:
+        """Whether a point falls in a client's viewport (always, for clients without one)"""
+        viewport = self.viewports.get(client_id)
+        if viewport is None:
+            return True
+        if district and district in viewport.districts:
+            return True
+        return bool(coordinates) and viewport.contains(coordinates[0], coordinates[1])
+
+    def matching(self, coordinates: Optional[List[float]], district: Optional[str] = None) -> Set[str]:
+        """Clients whose viewport contains the point or its district"""
+        matches: Set[str] = set()
+        if coordinates:
+            latitude, longitude = coordinates[0], coordinates[1]
+            for client_id in self.cells.get(self._cell(latitude, longitude), ()):
+                if self.viewports[client_id].contains(latitude, longitude):
+                    matches.add(client_id)
+            for client_id in self.wide:
+                if self.viewports[client_id].contains(latitude, longitude):
+                    matches.add(client_id)
+        if district:
+            matches |= self.districts.get(district, set())
+        return matches
+
+    def get_stats(self):
+        return {
+            "viewports": len(self.viewports),
+            "indexed_cells": len(self.cells),
+            "wide_viewports": len(self.wide),
+            "districts": len(self.districts)
+        }
@@ -1,32 +1,292 @@
 import asyncio
 import json
 import logging
-from typing import Dict, Set, Optional, Any
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Set, Optional, Tuple
 from datetime import datetime
 from fastapi import WebSocket, WebSocketDisconnect
 import uuid
 
 from models.emergency import WebSocketMessage, NotificationType
+from services.viewport_index import ClientViewport, ViewportIndex, parse_bbox
+from services.state_store import state_store, tracked_fields, VEHICLE, INCIDENT
+from services.stats_service import OPEN_STATUSES
+from services.event_log import EventLog, LoggedEvent
+from services.ws_encoding import OutboundFrame, EncodingStats, JSON, ENUM_VALUES, negotiate
+from services.event_bus import EventBus, create_event_bus
+from services.timer_wheel import TimerWheel
 
 logger = logging.getLogger(__name__)
 
+# Outbound messages buffered per client before the slow-consumer policy applies
+WS_SEND_QUEUE_SIZE = int(os.environ.get("WS_SEND_QUEUE_SIZE", "256"))
+
+# A send that takes longer than this marks the client as dead
+WS_SEND_TIMEOUT_SECONDS = float(os.environ.get("WS_SEND_TIMEOUT_SECONDS", "10"))
+
+# What to do when a client's queue is full:
+#   drop_oldest - discard the oldest queued message
+#   coalesce    - keep only the latest queued message per entity (e.g. per
+#                 vehicle location), dropping the oldest if still full
+#   disconnect  - close the connection; the client reconnects and resyncs
+SLOW_CLIENT_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+WS_SLOW_CLIENT_POLICY = os.environ.get("WS_SLOW_CLIENT_POLICY", "coalesce")
+
+# Message types that supersede earlier queued messages for the same entity
+COALESCE_KEYS = {
+    "vehicle_location": ("vehicle_id",),
+    "route_optimization": ("incident_id", "vehicle_id"),
+}
+
+# Close code sent to clients disconnected for falling behind (RFC 6455 "Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# A client silent for this long is sent a server ping...
+WS_HEARTBEAT_INTERVAL_SECONDS = float(os.environ.get("WS_HEARTBEAT_INTERVAL_SECONDS", "30"))
+
+# ...and evicted if nothing arrives within this long after it
+WS_HEARTBEAT_TIMEOUT_SECONDS = float(os.environ.get("WS_HEARTBEAT_TIMEOUT_SECONDS", "15"))
+
+# Resolution of heartbeat deadlines
+HEARTBEAT_TICK_SECONDS = 1.0
+
+# Close code sent to clients evicted for missing heartbeats (RFC 6455 "Going Away")
+HEARTBEAT_CLOSE_CODE = 1001
+
+# Close code sent to a connection replaced by a reconnect under its client ID (RFC 6455 "Normal Closure")
+REPLACED_CLOSE_CODE = 1000
+
+# Subscribing to this topic receives every published event type
+ALL_TOPICS = "*"
+
+# Vehicle locations are coalesced per vehicle and sent as one batched frame per tick
+LOCATION_FLUSH_INTERVAL_MS = int(os.environ.get("LOCATION_FLUSH_INTERVAL_MS", "250"))
+
+# Most entities returned by one request_update or subscription snapshot
+WS_UPDATE_LIMIT = int(os.environ.get("WS_UPDATE_LIMIT", "1000"))
+
+# request_update types answered from live state: update_type -> entity kind
+UPDATE_KINDS = {"vehicle": VEHICLE, "vehicles": VEHICLE, "incident": INCIDENT, "incidents": INCIDENT}
+
+# Entity kinds in the initial snapshot of a subscription to each event type
+SNAPSHOT_KINDS = {
+    "vehicle_location": (VEHICLE,),
+    "incident_status": (INCIDENT,),
+    "route_optimization": (INCIDENT,),
+    "state_delta": (VEHICLE, INCIDENT),
+    ALL_TOPICS: (VEHICLE, INCIDENT),
+}
+
+def _as_set(value: Any) -> Optional[Set[str]]:
+    """A filter given as one value or a list, as a set (None when absent)"""
+    if value is None:
+        return None
+    return {value} if isinstance(value, str) else set(value)
+
+def _in_viewport(viewport: ClientViewport, fields: Dict[str, Any]) -> bool:
+    location = fields.get("location") or {}
+    coordinates = location.get("coordinates")
+    if location.get("district") in viewport.districts:
+        return True
+    return bool(coordinates) and viewport.contains(coordinates[0], coordinates[1])
+
+# Vehicles per location batch sent over the event bus (keeps each datagram well under the socket limit)
+BUS_LOCATION_CHUNK = 500
+
+# Entity IDs per state-change announcement sent over the event bus
+BUS_STATE_CHUNK = 2000
+
+def coalesce_key(message: Dict[str, Any]) -> Optional[Tuple]:
+    """Entity key under which a newer message replaces a queued one"""
+    fields = COALESCE_KEYS.get(message.get("type"))
+    if not fields:
+        return None
+    data = message.get("data") or {}
+    return (message["type"],) + tuple(data.get(field) for field in fields)
+
+class ClientConnection:
+    """One WebSocket client with its own bounded send queue and writer task.
+
+    Enqueueing never awaits, so a broadcast costs the same regardless of
+    how slow any one client is; each writer drains its queue at the pace
+    its client's link allows.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        websocket: WebSocket,
+        on_failure,
+        max_queued: int,
+        policy: str,
+        encoding: str = JSON,
+        encoding_stats: Optional[EncodingStats] = None
+    ):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.on_failure = on_failure
+        self.max_queued = max_queued
+        self.policy = policy
+        self.encoding = encoding
+        self.encoding_stats = encoding_stats or EncodingStats()
+        # Entries are [key, frame] lists so a coalesced message is replaced in place
+        self.queue: Deque[List[Any]] = deque()
+        self.queued_by_key: Dict[Tuple, List[Any]] = {}
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        # Monotonic times of the last message received and the last unanswered server ping
+        self.last_seen = time.monotonic()
+        self.pinged_at: Optional[float] = None
+        self.sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    def start(self):
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def close(self):
+        self.closed = True
+        self.queue.clear()
+        self.queued_by_key.clear()
+        if self.writer and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+
+    def enqueue(self, frame: OutboundFrame, key: Optional[Tuple] = None) -> bool:
+        """Queue a message; returns False if the client was dropped"""
+        if self.closed:
+            return False
+
+        if key is not None and self.policy == "coalesce":
+            entry = self.queued_by_key.get(key)
+            if entry is not None:
+                entry[1] = frame
+                self.coalesced += 1
+                return True
+
+        if len(self.queue) >= self.max_queued:
+            if self.policy == "disconnect":
+                logger.warning(f"WebSocket client {self.client_id} fell {len(self.queue)} messages behind; disconnecting")
+                self.on_failure(self.client_id, SLOW_CONSUMER_CLOSE_CODE)
+                return False
+            oldest = self.queue.popleft()
+            if oldest[0] is not None and self.queued_by_key.get(oldest[0]) is oldest:
+                del self.queued_by_key[oldest[0]]
+            self.dropped += 1
+
+        entry = [key, frame]
+        self.queue.append(entry)
+        if key is not None:
+            self.queued_by_key[key] = entry
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self.ready.set()
+        return True
+
+    async def _write_loop(self):
+        try:
+            while not self.closed:
+                await self.ready.wait()
+                self.ready.clear()
+                while self.queue:
+                    key, frame = entry = self.queue.popleft()
+                    if key is not None and self.queued_by_key.get(key) is entry:
+                        del self.queued_by_key[key]
+                    payload = frame.payload(self.encoding)
+                    if isinstance(payload, bytes):
+                        await asyncio.wait_for(self.websocket.send_bytes(payload), WS_SEND_TIMEOUT_SECONDS)
+                    else:
+                        await asyncio.wait_for(self.websocket.send_text(payload), WS_SEND_TIMEOUT_SECONDS)
+                    self.sent += 1
+                    self.bytes_sent += len(payload)
+                    self.encoding_stats.record(frame, self.encoding, len(payload))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending message to {self.client_id}: {e}")
+            self.on_failure(self.client_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "encoding": self.encoding,
+            "bytes_sent": self.bytes_sent,
+            "queue_depth": len(self.queue),
+            "max_queue_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced
+        }
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+    def __init__(
+        self,
+        max_queued: int = WS_SEND_QUEUE_SIZE,
+        policy: str = WS_SLOW_CLIENT_POLICY,
+        heartbeat_interval: float = WS_HEARTBEAT_INTERVAL_SECONDS,
+        heartbeat_timeout: float = WS_HEARTBEAT_TIMEOUT_SECONDS
+    ):
+        if policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unknown slow-client policy {policy}; expected one of {SLOW_CLIENT_POLICIES}")
+        self.max_queued = max_queued
+        self.policy = policy
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        # Each client's next heartbeat check; sized so no deadline waits more than one turn
+        self.heartbeats = TimerWheel(
+            HEARTBEAT_TICK_SECONDS,
+            math.ceil(max(heartbeat_interval, heartbeat_timeout) / HEARTBEAT_TICK_SECONDS) + 1
+        )
+        self.active_connections: Dict[str, ClientConnection] = {}
         self.connection_metadata: Dict[str, Dict[str, Any]] = {}
+        # topic (event type) -> subscribed client IDs
+        self.topics: Dict[str, Set[str]] = {}
+        self.viewports = ViewportIndex()
+        self.events = EventLog()
+        self.encoding_stats = EncodingStats()
+        self.slow_disconnects = 0
+        self.connects = 0
+        self.disconnects = 0
+        self.replaced = 0
+        self.heartbeats_sent = 0
+        self.heartbeat_evictions = 0
+        self._closing: Set[asyncio.Task] = set()
+
+    async def connect(self, websocket: WebSocket, client_id: Optional[str] = None, encoding: Optional[str] = None) -> str:
+        """Accept a new WebSocket connection.
 
-    async def connect(self, websocket: WebSocket, client_id: Optional[str] = None) -> str:
-        """Accept a new WebSocket connection"""
+        `encoding` selects the server -> client frame format: "json" text
+        frames (the default) or "msgpack" binary frames with enum values as
+        integer codes (listed in the confirmation's `codes`) and timestamps
+        as epoch milliseconds. Unsupported requests fall back to JSON.
+        """
         await websocket.accept()
         
         if not client_id:
             client_id = str(uuid.uuid4())
+        
+        # A reconnect under the same ID replaces the old connection; closing
+        # its socket ends the old handler, whose cleanup then leaves this one alone
+        if client_id in self.active_connections:
+            self.replaced += 1
+            self._drop_client(client_id, REPLACED_CLOSE_CODE)
             
-        self.active_connections[client_id] = websocket
+        encoding = negotiate(encoding)
+        connection = ClientConnection(
+            client_id, websocket, self._drop_client, self.max_queued, self.policy, encoding, self.encoding_stats
+        )
+        connection.start()
+        self.active_connections[client_id] = connection
+        self.heartbeats.schedule(client_id, self.heartbeat_interval)
+        self.connects += 1
         self.connection_metadata[client_id] = {
             "connected_at": datetime.utcnow(),
             "last_ping": datetime.utcnow(),
-            "subscriptions": set()
+            "subscriptions": set(),
+            "permessage_deflate": "permessage-deflate" in websocket.headers.get("sec-websocket-extensions", "")
         }
         
         logger.info(f"WebSocket client {client_id} connected")
@@ -36,78 +296,322 @@ class ConnectionManager:
             "type": "connection",
             "status": "connected",
             "client_id": client_id,
+            "epoch": self.events.epoch,
+            "seq": self.events.seq,
+            "encoding": encoding,
+            **({"codes": ENUM_VALUES} if encoding != JSON else {}),
             "timestamp": datetime.utcnow().isoformat()
         }, client_id)
         
         return client_id
 
-    def disconnect(self, client_id: str):
-        """Remove a WebSocket connection"""
-        if client_id in self.active_connections:
+    def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
+        """Remove a WebSocket connection (only if it is still `websocket`, when given)"""
+        connection = self.active_connections.get(client_id)
+        if connection is not None and (websocket is None or connection.websocket is websocket):
             del self.active_connections[client_id]
-            del self.connection_metadata[client_id]
+            connection.close()
+            self.heartbeats.cancel(client_id)
+            self.disconnects += 1
+            for topic in self.connection_metadata.pop(client_id)["subscriptions"]:
+                self._unindex(client_id, topic)
+            self.viewports.remove(client_id)
             logger.info(f"WebSocket client {client_id} disconnected")
 
+    def is_current(self, client_id: str, websocket: WebSocket) -> bool:
+        """Whether `websocket` is still the live connection for `client_id`"""
+        connection = self.active_connections.get(client_id)
+        return connection is not None and connection.websocket is websocket
+
+    def _drop_client(self, client_id: str, close_code: Optional[int] = None):
+        """Disconnect a failed, too-slow, silent or replaced client, closing its socket if asked"""
+        connection = self.active_connections.get(client_id)
+        self.disconnect(client_id)
+        if connection is not None and close_code is not None:
+            if close_code == SLOW_CONSUMER_CLOSE_CODE:
+                self.slow_disconnects += 1
+            task = asyncio.create_task(self._close_socket(connection.websocket, close_code))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def _close_socket(self, websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass  # already gone
+
+    def touch(self, client_id: str, heartbeat: bool = False):
+        """Record that a client is alive; heartbeats (ping/pong) also update `last_ping`.
+
+        Only timestamps change here: the client's wheel deadline is pushed
+        back lazily when it comes due, so busy clients cost nothing extra.
+        """
+        connection = self.active_connections.get(client_id)
+        if connection is None:
+            return
+        connection.last_seen = time.monotonic()
+        connection.pinged_at = None
+        if heartbeat:
+            self.connection_metadata[client_id]["last_ping"] = datetime.utcnow()
+
+    def check_heartbeats(self, now: Optional[float] = None) -> int:
+        """Ping clients that went quiet and evict those that ignored a ping.
+
+        Only clients whose deadline fell due since the last check are
+        visited. Returns the number evicted.
+        """
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        for client_id in self.heartbeats.advance(now):
+            connection = self.active_connections.get(client_id)
+            if connection is None:
+                continue
+            if connection.pinged_at is None:
+                quiet_until = connection.last_seen + self.heartbeat_interval
+                if quiet_until > now:
+                    self.heartbeats.schedule(client_id, quiet_until - now, now)
+                    continue
+                connection.pinged_at = now
+                self.heartbeats_sent += 1
+                self._enqueue(client_id, OutboundFrame({"type": "ping", "timestamp": datetime.utcnow().isoformat()}))
+                self.heartbeats.schedule(client_id, self.heartbeat_timeout, now)
+            else:
+                logger.info(f"WebSocket client {client_id} missed its heartbeat; evicting")
+                self.heartbeat_evictions += 1
+                evicted += 1
+                self._drop_client(client_id, HEARTBEAT_CLOSE_CODE)
+        return evicted
+
+    def _enqueue(self, client_id: str, frame: OutboundFrame, key: Optional[Tuple] = None):
+        connection = self.active_connections.get(client_id)
+        if connection is not None:
+            connection.enqueue(frame, key)
+
     async def send_personal_message(self, message: Dict[str, Any], client_id: str):
-        """Send a message to a specific client"""
-        if client_id in self.active_connections:
-            try:
-                await self.active_connections[client_id].send_text(json.dumps(message, default=str))
-            except Exception as e:
-                logger.error(f"Error sending message to {client_id}: {e}")
-                self.disconnect(client_id)
+        """Queue a message for a specific client"""
+        self._enqueue(client_id, OutboundFrame(message), coalesce_key(message))
+
+    def _publish(
+        self,
+        message: Dict[str, Any],
+        topic: Optional[str],
+        location: Optional[Tuple[Optional[List[float]], Optional[str]]] = None,
+        vehicles: Optional[List[Dict[str, Any]]] = None
+    ) -> OutboundFrame:
+        """Number an outbound event and record it for replay"""
+        frame = OutboundFrame({**message, "seq": self.events.next_seq()})
+        self.events.append(LoggedEvent(self.events.seq, topic, frame, location, vehicles))
+        return frame
 
     async def broadcast_message(self, message: Dict[str, Any], exclude_client: Optional[str] = None):
-        """Broadcast a message to all connected clients"""
-        message_json = json.dumps(message, default=str)
-        disconnected_clients = []
+        """Queue a message for all connected clients (encoded once)"""
+        frame = self._publish(message, None)
+        key = coalesce_key(message)
         
-        for client_id, websocket in self.active_connections.items():
+        for client_id in list(self.active_connections):
             if exclude_client and client_id == exclude_client:
                 continue
-                
-            try:
-                await websocket.send_text(message_json)
-            except Exception as e:
-                logger.error(f"Error broadcasting to {client_id}: {e}")
-                disconnected_clients.append(client_id)
-        
-        # Clean up disconnected clients
-        for client_id in disconnected_clients:
-            self.disconnect(client_id)
-
-    async def send_to_subscribed(self, message: Dict[str, Any], subscription_type: str):
-        """Send message to clients subscribed to a specific event type"""
-        message_json = json.dumps(message, default=str)
-        disconnected_clients = []
-        
-        for client_id, websocket in self.active_connections.items():
-            metadata = self.connection_metadata.get(client_id, {})
-            if subscription_type in metadata.get("subscriptions", set()):
-                try:
-                    await websocket.send_text(message_json)
-                except Exception as e:
-                    logger.error(f"Error sending to subscribed client {client_id}: {e}")
-                    disconnected_clients.append(client_id)
-        
-        # Clean up disconnected clients
-        for client_id in disconnected_clients:
-            self.disconnect(client_id)
+            self._enqueue(client_id, frame, key)
+
+    def subscribers(self, subscription_type: str) -> Set[str]:
+        """Clients subscribed to an event type, directly or through ALL_TOPICS"""
+        return self.topics.get(subscription_type, set()) | self.topics.get(ALL_TOPICS, set())
+
+    async def send_to_subscribed(self, message: Dict[str, Any], subscription_type: Optional[str] = None) -> int:
+        """Queue a message for clients subscribed to its event type (defaults to the message type).
+
+        Recipients come from the topic index, so the cost is proportional
+        to the subscribers rather than to all connections. Returns the
+        number of recipients.
+        """
+        topic = subscription_type or message["type"]
+        frame = self._publish(message, topic)
+        recipients = self.subscribers(topic)
+        key = coalesce_key(message)
+        for client_id in recipients:
+            self._enqueue(client_id, frame, key)
+        return len(recipients)
+
+    async def send_to_viewport(
+        self,
+        message: Dict[str, Any],
+        coordinates: Optional[List[float]],
+        district: Optional[str] = None,
+        subscription_type: Optional[str] = None
+    ) -> int:
+        """Queue a located message for subscribers whose viewport contains it.
+
+        Subscribers that never set a viewport still receive everything.
+        Returns the number of recipients.
+        """
+        topic = subscription_type or message["type"]
+        frame = self._publish(message, topic, location=(coordinates, district))
+        subscribers = self.subscribers(topic)
+        recipients = subscribers.difference(self.viewports.viewports)
+        recipients |= self.viewports.matching(coordinates, district) & subscribers
+        key = coalesce_key(message)
+        for client_id in recipients:
+            self._enqueue(client_id, frame, key)
+        return len(recipients)
+
+    async def send_location_batch(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Queue one `vehicle_locations` frame per vehicle_location subscriber.
+
+        `updates` maps vehicle ID -> latest location. Clients without a
+        viewport share a single encoded frame of every update; viewport
+        clients get a frame of only the vehicles inside their viewport.
+        Returns the number of frames queued.
+        """
+        if not updates:
+            return 0
+
+        timestamp = datetime.utcnow().isoformat()
+        vehicles = [{"vehicle_id": vehicle_id, "location": location} for vehicle_id, location in updates.items()]
+        frame = self._publish({
+            "type": "vehicle_locations",
+            "data": {"vehicles": vehicles},
+            "timestamp": timestamp
+        }, "vehicle_location", vehicles=vehicles)
+        seq = self.events.seq
+        frames = 0
+
+        subscribers = self.subscribers("vehicle_location")
+        unfiltered = subscribers.difference(self.viewports.viewports)
+        if unfiltered:
+            for client_id in unfiltered:
+                self._enqueue(client_id, frame)
+            frames += len(unfiltered)
+
+        if len(unfiltered) < len(subscribers):
+            visible: Dict[str, List[Dict[str, Any]]] = {}
+            for vehicle in vehicles:
+                location = vehicle["location"]
+                for client_id in self.viewports.matching(location.get("coordinates"), location.get("district")):
+                    if client_id in subscribers:
+                        visible.setdefault(client_id, []).append(vehicle)
+            for client_id, client_vehicles in visible.items():
+                self._enqueue(client_id, OutboundFrame({
+                    "type": "vehicle_locations",
+                    "data": {"vehicles": client_vehicles},
+                    "timestamp": timestamp,
+                    "seq": seq
+                }))
+            frames += len(visible)
+
+        return frames
+
+    def replay(self, client_id: str, last_seq: int, epoch: Optional[int] = None) -> Optional[int]:
+        """Queue the events a reconnecting client missed after `last_seq`.
+
+        Only events the client would have received under its current
+        subscriptions and viewport are replayed. Missed location batches
+        are merged into one latest-wins `vehicle_locations` frame sent
+        last. Returns the number of frames queued, or None if the gap is no
+        longer buffered and the client needs a snapshot instead.
+        """
+        events = self.events.since(last_seq, epoch)
+        metadata = self.connection_metadata.get(client_id)
+        if events is None or metadata is None:
+            return None
+
+        subscriptions = metadata["subscriptions"]
+        every_topic = ALL_TOPICS in subscriptions
+        locations: Dict[str, Dict[str, Any]] = {}
+        frames = 0
+        for event in events:
+            if event.topic is not None and not every_topic and event.topic not in subscriptions:
+                continue
+            if event.vehicles is not None:
+                for vehicle in event.vehicles:
+                    locations[vehicle["vehicle_id"]] = vehicle
+                continue
+            if event.location is not None and not self.viewports.sees(client_id, *event.location):
+                continue
+            self._enqueue(client_id, event.frame)
+            frames += 1
+
+        vehicles = [
+            vehicle for vehicle in locations.values()
+            if self.viewports.sees(client_id, vehicle["location"].get("coordinates"), vehicle["location"].get("district"))
+        ]
+        if vehicles:
+            self._enqueue(client_id, OutboundFrame({
+                "type": "vehicle_locations",
+                "data": {"vehicles": vehicles},
+                "timestamp": datetime.utcnow().isoformat(),
+                "seq": self.events.seq
+            }))
+            frames += 1
+        return frames
+
+    def set_viewport(self, client_id: str, bbox: Optional[List[float]] = None, districts: Optional[List[str]] = None):
+        """Restrict a client's located messages to a bounding box and/or districts.
+
+        Raises ValueError for a malformed bounding box. Passing neither
+        clears the viewport.
+        """
+        if client_id in self.active_connections:
+            self.viewports.set(client_id, parse_bbox(bbox), districts or ())
 
     def add_subscription(self, client_id: str, subscription_type: str):
         """Add a subscription for a client"""
         if client_id in self.connection_metadata:
             self.connection_metadata[client_id]["subscriptions"].add(subscription_type)
+            self.topics.setdefault(subscription_type, set()).add(client_id)
 
     def remove_subscription(self, client_id: str, subscription_type: str):
         """Remove a subscription for a client"""
         if client_id in self.connection_metadata:
             self.connection_metadata[client_id]["subscriptions"].discard(subscription_type)
+            self._unindex(client_id, subscription_type)
+
+    def _unindex(self, client_id: str, subscription_type: str):
+        subscribers = self.topics.get(subscription_type)
+        if subscribers is not None:
+            subscribers.discard(client_id)
+            if not subscribers:
+                del self.topics[subscription_type]
+
+    def get_topic_counts(self) -> Dict[str, int]:
+        """Number of subscribers per topic"""
+        return {topic: len(subscribers) for topic, subscribers in self.topics.items()}
 
     def get_connection_count(self) -> int:
         """Get the number of active connections"""
         return len(self.active_connections)
 
+    def get_churn_stats(self) -> Dict[str, Any]:
+        """Connection turnover and heartbeat outcomes"""
+        return {
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "replaced": self.replaced,
+            "heartbeat_interval_seconds": self.heartbeat_interval,
+            "heartbeat_timeout_seconds": self.heartbeat_timeout,
+            "heartbeats_sent": self.heartbeats_sent,
+            "awaiting_pong": sum(1 for connection in self.active_connections.values() if connection.pinged_at is not None),
+            "heartbeat_evictions": self.heartbeat_evictions
+        }
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Send-queue depth and slow-consumer outcomes across all clients"""
+        depths = [len(connection.queue) for connection in self.active_connections.values()]
+        return {
+            "policy": self.policy,
+            "max_queued": self.max_queued,
+            "total_queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "dropped": sum(connection.dropped for connection in self.active_connections.values()),
+            "coalesced": sum(connection.coalesced for connection in self.active_connections.values()),
+            "slow_disconnects": self.slow_disconnects
+        }
+
+    def _viewport_info(self, client_id: str) -> Optional[Dict[str, Any]]:
+        viewport = self.viewports.get(client_id)
+        if viewport is None:
+            return None
+        return {"bbox": list(viewport.bbox) if viewport.bbox else None, "districts": sorted(viewport.districts)}
+
     def get_connection_info(self) -> Dict[str, Any]:
         """Get information about all connections"""
         return {
@@ -115,25 +619,222 @@ class ConnectionManager:
             "connections": {
                 client_id: {
                     "connected_at": metadata["connected_at"].isoformat(),
-                    "subscriptions": list(metadata["subscriptions"])
+                    "last_ping": metadata["last_ping"].isoformat(),
+                    "subscriptions": list(metadata["subscriptions"]),
+                    "viewport": self._viewport_info(client_id),
+                    "permessage_deflate_offered": metadata["permessage_deflate"],
+                    **self.active_connections[client_id].get_stats()
                 }
                 for client_id, metadata in self.connection_metadata.items()
             }
         }
 
 class WebSocketService:
-    def __init__(self):
+    """WebSocket clients of this worker, plus the event bus to the other workers.
+
+    Broadcasts go through `publish`, which fans an event out to this
+    worker's clients and hands it to the bus; each other worker fans it out
+    to its own clients on receipt. State store changes are replicated the
+    same way (as IDs to re-read), so `state_delta` subscribers see the
+    whole fleet whichever worker they are connected to.
+    """
+
+    def __init__(self, location_flush_interval_ms: int = LOCATION_FLUSH_INTERVAL_MS, bus: Optional[EventBus] = None):
         self.manager = ConnectionManager()
+        # Database for entities outside the live state (closed incidents); set by start()
+        self.db = None
         self.update_tasks: Dict[str, asyncio.Task] = {}
+        self.bus = bus or create_event_bus()
+        self.location_flush_interval = location_flush_interval_ms / 1000
+        # vehicle ID -> latest location not yet sent
+        self.pending_locations: Dict[str, Dict[str, Any]] = {}
+        self.location_flusher: Optional[asyncio.Task] = None
+        self.heartbeat_checker: Optional[asyncio.Task] = None
+        self.location_updates = 0
+        self.location_updates_superseded = 0
+        self.location_frames = 0
+        self.location_flushes = 0
+        # Last state version pushed to `state_delta` subscribers
+        self.state_published = state_store.version
+        self.state_snapshots_sent = 0
+        self.state_deltas_sent = 0
+        self.resumes = 0
+        self.resume_failures = 0
+        self.events_replayed = 0
+        self.updates_served = 0
+        self.updates_from_database = 0
+        self.subscription_snapshots = 0
+        # Entities changed on this worker since the last announcement: kind -> IDs
+        self.changed_entities: Dict[str, Set[str]] = {}
+        self.state_announcements = 0
+        # Last announcement sequence seen from each peer worker
+        self.peer_state_seq: Dict[str, int] = {}
+        # Reloads are applied in arrival order, so an older read never overwrites a newer one
+        self.state_refresh_lock = asyncio.Lock()
+        self.state_refreshes = 0
+        self.state_gaps = 0
+
+    def start(self, db=None):
+        """Join the event bus and start coalescing locations and state deltas into periodic frames"""
+        if db is not None:
+            self.db = db
+        if self.location_flusher is None:
+            try:
+                self.bus.start(self._on_bus_message)
+            except OSError as e:
+                logger.warning(f"WebSocket event bus unavailable ({e}); broadcasts stay within this worker")
+                self.bus = EventBus()
+                self.bus.start(self._on_bus_message)
+            state_store.on_change = self._on_state_change
+            self.state_published = state_store.version
+            self.location_flusher = asyncio.create_task(self._flush_locations_loop())
+            self.heartbeat_checker = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        """Stop the location flusher, sending whatever is still pending"""
+        if self.location_flusher is None:
+            return
+        for task in (self.location_flusher, self.heartbeat_checker):
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.location_flusher = None
+        self.heartbeat_checker = None
+        await self.flush_locations()
+        self.announce_state()
+        await self.flush_state()
+        state_store.on_change = None
+        await self.bus.stop()
+
+    async def _flush_locations_loop(self):
+        while True:
+            await asyncio.sleep(self.location_flush_interval)
+            try:
+                await self.flush_locations()
+                self.announce_state()
+                await self.flush_state()
+            except Exception as e:
+                logger.error(f"WebSocket flush failed: {e}")
 
-    async def handle_websocket(self, websocket: WebSocket, client_id: Optional[str] = None):
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_TICK_SECONDS)
+            try:
+                self.manager.check_heartbeats()
+            except Exception as e:
+                logger.error(f"WebSocket heartbeat check failed: {e}")
+
+    async def flush_state(self):
+        """Push the state changes since the last tick to `state_delta` subscribers"""
+        if state_store.version == self.state_published:
+            return
+        delta = state_store.delta_since(self.state_published)
+        self.state_published = state_store.version
+        if delta is None:
+            # Removals were dropped from the horizon mid-tick; clients must resync
+            await self.manager.send_to_subscribed({
+                "type": "state_resync",
+                "timestamp": datetime.utcnow().isoformat()
+            }, "state_delta")
+            return
+        if delta["changes"] or delta["removed"]:
+            await self.manager.send_to_subscribed({
+                "type": "state_delta",
+                "data": delta,
+                "timestamp": datetime.utcnow().isoformat()
+            })
+
+    async def flush_locations(self):
+        """Send the latest pending location of every vehicle updated since the last tick"""
+        if not self.pending_locations:
+            return
+        updates, self.pending_locations = self.pending_locations, {}
+        self.location_frames += await self.manager.send_location_batch(updates)
+        self.location_flushes += 1
+        vehicle_ids = list(updates)
+        for start in range(0, len(vehicle_ids), BUS_LOCATION_CHUNK):
+            chunk = vehicle_ids[start:start + BUS_LOCATION_CHUNK]
+            self.bus.publish({"op": "locations", "updates": {vehicle_id: updates[vehicle_id] for vehicle_id in chunk}})
+
+    async def publish(self, envelope: Dict[str, Any]):
+        """Deliver an event to this worker's clients and to every other worker"""
+        await self._fan_out(envelope)
+        self.bus.publish(envelope)
+
+    async def _fan_out(self, envelope: Dict[str, Any]):
+        """Deliver an event to this worker's clients"""
+        op = envelope["op"]
+        if op == "subscribed":
+            await self.manager.send_to_subscribed(envelope["message"], envelope.get("topic"))
+        elif op == "viewport":
+            await self.manager.send_to_viewport(envelope["message"], envelope.get("coordinates"), envelope.get("district"))
+        elif op == "all":
+            await self.manager.broadcast_message(envelope["message"], envelope.get("exclude_client"))
+        elif op == "locations":
+            self.location_frames += await self.manager.send_location_batch(envelope["updates"])
+        elif op == "state":
+            await self._refresh_state(envelope)
+        else:
+            logger.warning(f"Ignoring event bus message with unknown op {op}")
+
+    async def _on_bus_message(self, envelope: Dict[str, Any]):
+        try:
+            await self._fan_out(envelope)
+        except Exception as e:
+            logger.error(f"Failed to deliver event bus message: {e}")
+
+    def _on_state_change(self, op: str, kind: str, entity_id: str, fields: Dict[str, Any]):
+        # Announced once per flush tick, however often the entity changes
+        self.changed_entities.setdefault(kind, set()).add(entity_id)
+
+    def announce_state(self):
+        """Tell the other workers which entities changed here since the last tick.
+
+        Only IDs are sent: peers re-read those entities from the database,
+        which orders concurrent writes to the same entity the same way for
+        every worker. Announcements are numbered so a peer that misses one
+        can tell and resync.
+        """
+        if not self.changed_entities:
+            return
+        changed, self.changed_entities = self.changed_entities, {}
+        entities = [(kind, entity_id) for kind, ids in changed.items() for entity_id in ids]
+        for start in range(0, len(entities), BUS_STATE_CHUNK):
+            chunk: Dict[str, List[str]] = {}
+            for kind, entity_id in entities[start:start + BUS_STATE_CHUNK]:
+                chunk.setdefault(kind, []).append(entity_id)
+            self.state_announcements += 1
+            self.bus.publish({"op": "state", "seq": self.state_announcements, "changed": chunk})
+
+    async def _refresh_state(self, envelope: Dict[str, Any]):
+        """Apply another worker's state announcement (a full resync if one was missed)"""
+        async with self.state_refresh_lock:
+            origin, seq = envelope.get("origin"), envelope["seq"]
+            last = self.peer_state_seq.get(origin)
+            self.peer_state_seq[origin] = seq
+            if self.db is None:
+                return
+            self.state_refreshes += 1
+            if last is not None and seq != last + 1:
+                self.state_gaps += 1
+                logger.warning(f"Missed state announcements {last + 1}..{seq - 1} from worker {origin}; resyncing")
+                await state_store.refresh(self.db.vehicles, self.db.incidents, OPEN_STATUSES)
+            else:
+                await state_store.refresh(self.db.vehicles, self.db.incidents, OPEN_STATUSES, envelope["changed"])
+
+    async def handle_websocket(self, websocket: WebSocket, client_id: Optional[str] = None, encoding: Optional[str] = None):
         """Handle a WebSocket connection"""
-        client_id = await self.manager.connect(websocket, client_id)
+        client_id = await self.manager.connect(websocket, client_id, encoding)
         
         try:
             while True:
                 # Receive message from client
                 data = await websocket.receive_text()
+                if not self.manager.is_current(client_id, websocket):
+                    break  # replaced by a reconnect; the new handler owns client_id
+                self.manager.touch(client_id)
                 
                 try:
                     message = json.loads(data)
@@ -146,10 +847,10 @@ class WebSocketService:
                     }, client_id)
                     
         except WebSocketDisconnect:
-            self.manager.disconnect(client_id)
+            self.manager.disconnect(client_id, websocket)
         except Exception as e:
             logger.error(f"WebSocket error for client {client_id}: {e}")
-            self.manager.disconnect(client_id)
+            self.manager.disconnect(client_id, websocket)
 
     async def handle_client_message(self, client_id: str, message: Dict[str, Any]):
         """Handle incoming message from client"""
@@ -159,19 +860,38 @@ class WebSocketService:
             event_types = message.get("events", [])
             for event_type in event_types:
                 self.manager.add_subscription(client_id, event_type)
+            if "bbox" in message or "districts" in message:
+                await self.update_viewport(client_id, message, confirm=False)
             
-            await self.manager.send_personal_message({
+            confirmation = {
                 "type": "subscription_confirmed",
                 "events": event_types,
                 "timestamp": datetime.utcnow().isoformat()
-            }, client_id)
+            }
+            if message.get("snapshot"):
+                confirmation["snapshot"] = self.subscription_snapshot(client_id, event_types, message["snapshot"])
+            await self.manager.send_personal_message(confirmation, client_id)
+
+        elif message_type == "set_viewport":
+            await self.update_viewport(client_id, message)
+
+        elif message_type == "sync_state":
+            await self.sync_state(client_id, message)
+
+        elif message_type == "resume":
+            await self.resume(client_id, message)
             
         elif message_type == "unsubscribe":
             event_types = message.get("events", [])
             for event_type in event_types:
                 self.manager.remove_subscription(client_id, event_type)
                 
+        elif message_type == "pong":
+            # Reply to a server heartbeat
+            self.manager.touch(client_id, heartbeat=True)
+
         elif message_type == "ping":
+            self.manager.touch(client_id, heartbeat=True)
             await self.manager.send_personal_message({
                 "type": "pong",
                 "timestamp": datetime.utcnow().isoformat()
@@ -181,28 +901,328 @@ class WebSocketService:
             # Client requesting specific updates
             await self.handle_update_request(client_id, message)
 
-    async def handle_update_request(self, client_id: str, message: Dict[str, Any]):
-        """Handle client request for specific updates"""
-        update_type = message.get("update_type")
-        
-        if update_type == "vehicle_location":
-            vehicle_id = message.get("vehicle_id")
-            # Send current vehicle location (would get from database in real implementation)
+    async def resume(self, client_id: str, message: Dict[str, Any]):
+        """Restore a reconnecting client's subscriptions and replay what it missed.
+
+        The message carries the client's `events`, optional viewport and the
+        `epoch` / `last_seq` of the last event it saw. Subscribing and
+        replaying happen without yielding, so every event up to the replay
+        point comes from the buffer and every later one arrives live: no
+        gaps and no duplicates. If the gap has left the buffer the client
+        gets `resume_failed` followed by a state snapshot.
+        """
+        for event_type in message.get("events", []):
+            self.manager.add_subscription(client_id, event_type)
+        if message.get("bbox") is not None or message.get("districts"):
+            try:
+                self.manager.set_viewport(client_id, message.get("bbox"), message.get("districts"))
+            except ValueError:
+                pass  # replay unfiltered rather than fail the resume
+
+        self.resumes += 1
+        try:
+            last_seq = int(message.get("last_seq"))
+        except (TypeError, ValueError):
+            last_seq = -1
+        replayed = self.manager.replay(client_id, last_seq, message.get("epoch")) if last_seq >= 0 else None
+
+        if replayed is None:
+            self.resume_failures += 1
             await self.manager.send_personal_message({
-                "type": "vehicle_location",
-                "data": {
-                    "vehicle_id": vehicle_id,
-                    "location": {
-                        "coordinates": [40.7589, -73.9851],
-                        "heading": 45,
-                        "speed": 25
-                    }
-                },
+                "type": "resume_failed",
+                "epoch": self.manager.events.epoch,
+                "seq": self.manager.events.seq,
+                "timestamp": datetime.utcnow().isoformat()
+            }, client_id)
+            await self.sync_state(client_id, {})
+            return
+
+        self.events_replayed += replayed
+        await self.manager.send_personal_message({
+            "type": "resumed",
+            "from": last_seq,
+            "seq": self.manager.events.seq,
+            "replayed": replayed,
+            "timestamp": datetime.utcnow().isoformat()
+        }, client_id)
+
+    async def sync_state(self, client_id: str, message: Dict[str, Any]):
+        """Bring a client's fleet/incident state up to date and stream deltas after.
+
+        A client sending the `epoch` and `version` of the state it holds
+        gets only the fields changed since; otherwise (or when its version
+        is too old) it gets a full snapshot.
+        """
+        self.manager.add_subscription(client_id, "state_delta")
+
+        delta = None
+        if message.get("version") is not None:
+            try:
+                delta = state_store.delta_since(int(message["version"]), message.get("epoch"))
+            except (TypeError, ValueError):
+                delta = None
+
+        if delta is not None:
+            self.state_deltas_sent += 1
+            await self.manager.send_personal_message({
+                "type": "state_delta",
+                "data": delta,
+                "timestamp": datetime.utcnow().isoformat()
+            }, client_id)
+        else:
+            self.state_snapshots_sent += 1
+            await self.manager.send_personal_message({
+                "type": "state_snapshot",
+                "data": state_store.snapshot(),
+                "timestamp": datetime.utcnow().isoformat()
+            }, client_id)
+
+    async def update_viewport(self, client_id: str, message: Dict[str, Any], confirm: bool = True):
+        """Apply a client's `bbox` / `districts` viewport (both empty clears it)"""
+        try:
+            self.manager.set_viewport(client_id, message.get("bbox"), message.get("districts"))
+        except ValueError as e:
+            await self.manager.send_personal_message({
+                "type": "error",
+                "message": str(e),
                 "timestamp": datetime.utcnow().isoformat()
             }, client_id)
+            return
+
+        if confirm:
+            await self.manager.send_personal_message({
+                "type": "viewport_updated",
+                "bbox": message.get("bbox"),
+                "districts": message.get("districts") or [],
+                "timestamp": datetime.utcnow().isoformat()
+            }, client_id)
+
+    def subscription_snapshot(self, client_id: str, event_types: List[str], kinds: Any = True) -> Dict[str, Any]:
+        """Current state behind the subscribed event types, for a `subscribe` with `snapshot`.
+
+        `kinds` is true (the kinds behind `event_types`) or a list of
+        entity kinds. Vehicles are limited to the client's viewport. The
+        snapshot carries the state version and event `seq` it was taken at;
+        later changes arrive as events.
+        """
+        if kinds is True:
+            kinds = {kind for event_type in event_types for kind in SNAPSHOT_KINDS.get(event_type, ())}
+        viewport = self.manager.viewports.get(client_id)
+
+        entities: Dict[str, Dict[str, Any]] = {}
+        truncated = False
+        for kind in UPDATE_KINDS.values():
+            if kind not in kinds or kind in entities:
+                continue
+            predicate = (lambda fields: _in_viewport(viewport, fields)) if kind == VEHICLE and viewport else None
+            entities[kind], cut = state_store.query(kind, predicate=predicate, limit=WS_UPDATE_LIMIT)
+            truncated = truncated or cut
+
+        self.subscription_snapshots += 1
+        return {
+            "epoch": state_store.epoch,
+            "version": state_store.version,
+            "seq": self.manager.events.seq,
+            "entities": entities,
+            "truncated": truncated
+        }
+
+    def _update_filter(self, message: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+        """Predicate over entity fields for a request's status/type/priority/bbox/districts filters"""
+        statuses = _as_set(message.get("status"))
+        types = _as_set(message.get("entity_type"))
+        priorities = _as_set(message.get("priority"))
+        viewport = None
+        if message.get("bbox") is not None or message.get("districts"):
+            viewport = ClientViewport(parse_bbox(message.get("bbox")), set(message.get("districts") or ()))
+        if statuses is None and types is None and priorities is None and viewport is None:
+            return None
+
+        def predicate(fields: Dict[str, Any]) -> bool:
+            return (
+                (statuses is None or fields.get("status") in statuses)
+                and (types is None or fields.get("type") in types)
+                and (priorities is None or fields.get("priority") in priorities)
+                and (viewport is None or _in_viewport(viewport, fields))
+            )
+        return predicate
+
+    def _database_filter(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """The type/priority/bbox/districts filters of a request as a Mongo query.
+
+        Coordinates are stored as [lat, lon] rather than GeoJSON order, so
+        the bbox is a range filter on the array positions.
+        """
+        query: Dict[str, Any] = {}
+        types = _as_set(message.get("entity_type"))
+        priorities = _as_set(message.get("priority"))
+        if types is not None:
+            query["type"] = {"$in": sorted(types)}
+        if priorities is not None:
+            query["priority"] = {"$in": sorted(priorities)}
+
+        viewport = []
+        bbox = parse_bbox(message.get("bbox"))
+        if bbox is not None:
+            south, west, north, east = bbox
+            viewport.append({
+                "location.coordinates.0": {"$gte": south, "$lte": north},
+                "location.coordinates.1": {"$gte": west, "$lte": east}
+            })
+        if message.get("districts"):
+            viewport.append({"location.district": {"$in": sorted(message["districts"])}})
+        if len(viewport) == 1:
+            query.update(viewport[0])
+        elif viewport:
+            query["$or"] = viewport
+        return query
+
+    async def _find_in_database(
+        self,
+        kind: str,
+        query: Dict[str, Any],
+        predicate: Optional[Callable[[Dict[str, Any]], bool]],
+        limit: int
+    ) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """Entities outside the live state (closed and archived incidents), newest first.
+
+        `query` should carry the request's filters so the database does the
+        matching; `predicate` only re-checks what comes back. Each cursor
+        reads at most one document past `limit`, enough to tell that the
+        result was cut short.
+        """
+        matches: Dict[str, Dict[str, Any]] = {}
+        if self.db is None:
+            return matches, False
+        self.updates_from_database += 1
+        collections = [self.db.vehicles] if kind == VEHICLE else [self.db.incidents, self.db.incidents_archive]
+        for collection in collections:
+            cursor = collection.find(query, {"_id": 0})
+            if kind == INCIDENT:
+                cursor = cursor.sort([("timestamp", -1), ("id", -1)])
+            cursor = cursor.limit(limit - len(matches) + 1)
+            async for document in cursor:
+                fields = tracked_fields(kind, document)
+                if document["id"] in matches or (predicate is not None and not predicate(fields)):
+                    continue
+                if len(matches) >= limit:
+                    return matches, True
+                matches[document["id"]] = fields
+        return matches, False
+
+    async def query_state(self, kind: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Entities of `kind` matching a request's `ids` and filters.
+
+        Served from the live state store; only incident requests that can
+        match closed incidents (by ID or by status) also read the database.
+        Raises ValueError for malformed filters.
+        """
+        ids = _as_set(message.get("ids"))
+        predicate = self._update_filter(message)
+        try:
+            limit = min(int(message.get("limit") or WS_UPDATE_LIMIT), WS_UPDATE_LIMIT)
+        except (TypeError, ValueError):
+            raise ValueError("limit must be an integer")
+
+        entities, truncated = state_store.query(kind, ids=ids, predicate=predicate, limit=limit)
+        source = "live"
+
+        statuses = _as_set(message.get("status"))
+        missing = ids - set(entities) if ids is not None else set()
+        wants_closed = statuses is not None and not statuses <= set(OPEN_STATUSES)
+        if kind == INCIDENT and not truncated and (missing or (ids is None and wants_closed)):
+            query: Dict[str, Any] = {"id": {"$in": sorted(missing)}} if ids is not None else {
+                "status": {"$in": sorted(statuses - set(OPEN_STATUSES))}
+            }
+            if ids is not None and statuses is not None:
+                query["status"] = {"$in": sorted(statuses)}
+            query.update(self._database_filter(message))
+            stored, truncated = await self._find_in_database(kind, query, predicate, limit - len(entities))
+            if stored:
+                entities.update(stored)
+                source = "live+database"
+
+        return {
+            "kind": kind,
+            "source": source,
+            "epoch": state_store.epoch,
+            "version": state_store.version,
+            "count": len(entities),
+            "truncated": truncated,
+            "entities": entities
+        }
+
+    async def handle_update_request(self, client_id: str, message: Dict[str, Any]):
+        """Answer a `request_update` from live fleet and incident state.
+
+        `update_type` is one of:
+          vehicle_location  - the latest location of `vehicle_id`
+          vehicle/incident  - one entity by `vehicle_id` / `incident_id` / `id`
+          vehicles/incidents - entities matching optional `ids`, `status`,
+                              `entity_type`, `priority`, `bbox`, `districts`
+                              and `limit` filters
+        Replies echo the request's `request_id`.
+        """
+        update_type = message.get("update_type")
+        request_id = message.get("request_id")
+        self.updates_served += 1
+
+        try:
+            if update_type == "vehicle_location":
+                vehicle_id = message.get("vehicle_id")
+                vehicle = state_store.get(VEHICLE, vehicle_id)
+                if vehicle is None:
+                    raise ValueError(f"Vehicle {vehicle_id} not found")
+                reply = {
+                    "type": "vehicle_location",
+                    "data": {
+                        "vehicle_id": vehicle_id,
+                        "location": {**(vehicle.get("location") or {}), "speed": vehicle.get("speed")}
+                    }
+                }
+            elif update_type in ("vehicle", "incident"):
+                kind = UPDATE_KINDS[update_type]
+                entity_id = message.get(f"{kind}_id") or message.get("id")
+                data = await self.query_state(kind, {"ids": [entity_id]})
+                if entity_id not in data["entities"]:
+                    raise ValueError(f"{kind.capitalize()} {entity_id} not found")
+                reply = {"type": "update", "data": {
+                    "kind": kind,
+                    "id": entity_id,
+                    "source": data["source"],
+                    "epoch": data["epoch"],
+                    "version": data["version"],
+                    "entity": data["entities"][entity_id]
+                }}
+            elif update_type in UPDATE_KINDS:
+                reply = {"type": "update", "data": await self.query_state(UPDATE_KINDS[update_type], message)}
+            else:
+                raise ValueError(f"Unknown update_type {update_type}; expected vehicle_location or one of {list(UPDATE_KINDS)}")
+        except ValueError as e:
+            reply = {"type": "error", "message": str(e)}
+
+        await self.manager.send_personal_message({
+            **reply,
+            "update_type": update_type,
+            **({"request_id": request_id} if request_id is not None else {}),
+            "timestamp": datetime.utcnow().isoformat()
+        }, client_id)
 
     async def broadcast_vehicle_update(self, vehicle_id: str, location_data: Dict[str, Any]):
-        """Broadcast vehicle location update"""
+        """Broadcast vehicle location update to the clients viewing its position.
+
+        Once started, updates are only recorded here (latest wins) and go
+        out in the next batched `vehicle_locations` frame, so the outbound
+        message rate is capped by the flush interval rather than the ping
+        rate.
+        """
+        if self.location_flusher is not None:
+            self.location_updates += 1
+            if vehicle_id in self.pending_locations:
+                self.location_updates_superseded += 1
+            self.pending_locations[vehicle_id] = location_data
+            return
+
         message = {
             "type": "vehicle_location",
             "data": {
@@ -211,7 +1231,12 @@ class WebSocketService:
             },
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self.manager.broadcast_message(message)
+        await self.publish({
+            "op": "viewport",
+            "message": message,
+            "coordinates": location_data.get("coordinates"),
+            "district": location_data.get("district")
+        })
 
     async def broadcast_incident_update(self, incident_id: str, status: str, additional_data: Optional[Dict] = None):
         """Broadcast incident status update"""
@@ -227,7 +1252,7 @@ class WebSocketService:
             "data": data,
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self.manager.broadcast_message(message)
+        await self.publish({"op": "subscribed", "message": message})
 
     async def broadcast_route_optimization(self, incident_id: str, vehicle_id: str, optimization_data: Dict[str, Any]):
         """Broadcast route optimization update"""
@@ -240,7 +1265,7 @@ class WebSocketService:
             },
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self.manager.broadcast_message(message)
+        await self.publish({"op": "subscribed", "message": message})
 
     async def broadcast_traffic_update(self, area: str, severity: str, description: str):
         """Broadcast traffic condition update"""
@@ -253,7 +1278,7 @@ class WebSocketService:
             },
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self.manager.broadcast_message(message)
+        await self.publish({"op": "subscribed", "message": message})
 
     async def broadcast_notification(self, notification_data: Dict[str, Any]):
         """Broadcast system notification"""
@@ -262,12 +1287,51 @@ class WebSocketService:
             "data": notification_data,
             "timestamp": datetime.utcnow().isoformat()
         }
-        await self.manager.broadcast_message(message)
+        await self.publish({"op": "subscribed", "message": message})
+
+    async def broadcast_to_all(self, message: Dict[str, Any], exclude_client: Optional[str] = None):
+        """Broadcast a message to every client of every worker"""
+        await self.publish({"op": "all", "message": message, "exclude_client": exclude_client})
 
     def get_stats(self) -> Dict[str, Any]:
         """Get WebSocket service statistics"""
         return {
             "active_connections": self.manager.get_connection_count(),
+            "churn": self.manager.get_churn_stats(),
+            "send_queues": self.manager.get_queue_stats(),
+            "encodings": self.manager.encoding_stats.get_stats(),
+            "topics": self.manager.get_topic_counts(),
+            "viewports": self.manager.viewports.get_stats(),
+            "vehicle_locations": {
+                "flush_interval_ms": int(self.location_flush_interval * 1000),
+                "batching": self.location_flusher is not None,
+                "pending": len(self.pending_locations),
+                "updates": self.location_updates,
+                "superseded": self.location_updates_superseded,
+                "flushes": self.location_flushes,
+                "frames": self.location_frames
+            },
+            "events": {
+                **self.manager.events.get_stats(),
+                "resumes": self.resumes,
+                "resume_failures": self.resume_failures,
+                "replayed": self.events_replayed
+            },
+            "state": {
+                **state_store.get_stats(),
+                "published_version": self.state_published,
+                "snapshots_sent": self.state_snapshots_sent,
+                "catch_up_deltas_sent": self.state_deltas_sent,
+                "subscription_snapshots": self.subscription_snapshots,
+                "updates_served": self.updates_served,
+                "updates_from_database": self.updates_from_database
+            },
+            "bus": {
+                **self.bus.get_stats(),
+                "state_announcements": self.state_announcements,
+                "state_refreshes": self.state_refreshes,
+                "state_gaps": self.state_gaps
+            },
             "connection_details": self.manager.get_connection_info()
         }
 
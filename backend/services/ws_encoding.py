@@ -0,0 +1,119 @@
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # optional: clients fall back to JSON
+    msgpack = None
+
+from models.emergency import EmergencyType, IncidentStatus, Priority, VehicleStatus
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Enum values sent as integer codes in compact frames (code = index)
+ENUM_VALUES: List[str] = list(dict.fromkeys(
+    member.value for enum in (EmergencyType, Priority, IncidentStatus, VehicleStatus) for member in enum
+))
+ENUM_CODES: Dict[str, int] = {value: code for code, value in enumerate(ENUM_VALUES)}
+
+# Keys whose enum values are coded (except the top-level message `type`)
+CODED_KEYS = {"type", "status", "priority"}
+
+# Keys whose ISO-8601 string values are sent as epoch milliseconds
+TIMESTAMP_KEYS = {"timestamp", "last_update", "dispatched_at", "on_scene_at", "resolved_at"}
+
+def available_encodings() -> List[str]:
+    return [JSON, MSGPACK] if msgpack is not None else [JSON]
+
+def negotiate(requested: Optional[str]) -> str:
+    """Encoding to use for a client asking for `requested` (JSON if unsupported)"""
+    return requested if requested in available_encodings() else JSON
+
+def _epoch_ms(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # stored timestamps are naive UTC
+    return int(value.timestamp() * 1000)
+
+def compact(value: Any, key: Optional[str] = None) -> Any:
+    """Message -> compact form: enum values as codes, timestamps as epoch ms"""
+    if isinstance(value, dict):
+        return {item_key: compact(item, item_key) for item_key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [compact(item) for item in value]
+    if hasattr(value, "value"):
+        value = value.value
+    if isinstance(value, datetime):
+        return _epoch_ms(value)
+    if isinstance(value, str):
+        if key in CODED_KEYS and value in ENUM_CODES:
+            return ENUM_CODES[value]
+        if key in TIMESTAMP_KEYS:
+            try:
+                return _epoch_ms(datetime.fromisoformat(value))
+            except ValueError:
+                return value
+    return value
+
+def _compact_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    frame = compact(message)
+    frame["type"] = message["type"]  # message types stay readable
+    return frame
+
+class OutboundFrame:
+    """One outbound message, encoded at most once per encoding.
+
+    Encodings are produced lazily by the first writer that needs them and
+    cached, so a broadcast costs one encode per encoding in use, however
+    many clients receive it.
+    """
+
+    __slots__ = ("message", "_text", "_binary")
+
+    def __init__(self, message: Dict[str, Any]):
+        self.message = message
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.message, default=str)
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = msgpack.packb(_compact_message(self.message), default=str)
+        return self._binary
+
+    def payload(self, encoding: str) -> Union[str, bytes]:
+        return self.binary if encoding == MSGPACK else self.text
+
+class EncodingStats:
+    """Bytes sent per encoding, and bytes saved against sending JSON"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.frames: Dict[str, int] = {encoding: 0 for encoding in (JSON, MSGPACK)}
+        self.bytes: Dict[str, int] = {encoding: 0 for encoding in (JSON, MSGPACK)}
+        self.bytes_saved = 0
+
+    def record(self, frame: OutboundFrame, encoding: str, size: int):
+        self.frames[encoding] += 1
+        self.bytes[encoding] += size
+        if encoding != JSON:
+            # JSON output is ASCII (ensure_ascii), so its length is its size
+            self.bytes_saved += len(frame.text) - size
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "available": available_encodings(),
+            "frames": dict(self.frames),
+            "bytes": dict(self.bytes),
+            "bytes_saved": self.bytes_saved,
+            "bytes_saved_per_second": round(self.bytes_saved / elapsed, 1) if elapsed else 0.0
+        }
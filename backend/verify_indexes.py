@@ -0,0 +1,143 @@
+import asyncio
+import os
+import sys
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmark_reads import make_incident, make_vehicle
+from dependencies import create_indexes
+from models.emergency import EmergencyType, IncidentStatus, Priority, VehicleStatus
+from services.incident_service import (
+    IncidentService, KEYSET_SORT, ACTIVE_INCIDENTS_FILTER, CRITICAL_INCIDENTS_FILTER, encode_cursor
+)
+from services.search import id_prefix_filter
+from services.stats_service import OPEN_STATUSES
+from services.vehicle_service import VehicleService
+
+# Load environment
+load_dotenv()
+
+INCIDENT_COUNT = 5000
+VEHICLE_COUNT = 500
+
+# Plan stages that mean the query is not index-served
+BAD_STAGES = {"COLLSCAN", "SORT"}
+
+# (name, collection, filter, sort, allowed bad stages)
+QueryShape = Tuple[str, str, Dict[str, Any], Optional[List[Any]], set]
+
+def incident_shapes(incident_service: IncidentService) -> List[QueryShape]:
+    """Every incident query shape issued by IncidentService and its helpers"""
+    values = {
+        "status": IncidentStatus.ACTIVE,
+        "type": EmergencyType.FIRE,
+        "priority": Priority.CRITICAL,
+    }
+    cursor = encode_cursor(datetime.utcnow(), "INC-2025-00000800")
+    shapes: List[QueryShape] = []
+
+    for size in range(len(values) + 1):
+        for names in combinations(values, size):
+            criteria = {name: values[name] for name in names}
+            label = "+".join(names) or "all"
+            shapes.append((f"list [{label}]", "incidents", incident_service.build_filter(**criteria), KEYSET_SORT, set()))
+            shapes.append((
+                f"page after cursor [{label}]", "incidents",
+                incident_service.build_filter(cursor=cursor, **criteria), KEYSET_SORT, set()
+            ))
+
+    shapes += [
+        ("get by id", "incidents", {"id": "INC-2025-00000010"}, None, set()),
+        ("active count", "incidents", ACTIVE_INCIDENTS_FILTER, None, set()),
+        ("critical count", "incidents", CRITICAL_INCIDENTS_FILTER, None, set()),
+        ("duplicate index warm-up", "incidents",
+         {"status": {"$in": OPEN_STATUSES}, "timestamp": {"$gte": datetime.utcnow()}}, None, set()),
+        ("archiver batch", "incidents",
+         {"status": {"$in": [IncidentStatus.RESOLVED, IncidentStatus.CANCELLED]}, "last_update": {"$lt": datetime.utcnow()}},
+         [("last_update", 1)], set()),
+        ("search id prefix", "incidents", id_prefix_filter("INC-2025-0000"), [("id", 1)], set()),
+        # Relevance ranking sorts the (limited) text matches by score in memory by design
+        ("search text", "incidents", {"$text": {"$search": "fire smoke"}},
+         [("score", {"$meta": "textScore"}), ("timestamp", -1)], {"SORT"}),
+    ]
+    return shapes
+
+def vehicle_shapes(vehicle_service: VehicleService) -> List[QueryShape]:
+    """Every vehicle query shape issued by VehicleService"""
+    sort = [("call_sign", 1)]
+    return [
+        ("list [all]", "vehicles", vehicle_service.build_filter(), sort, set()),
+        ("list [status]", "vehicles", vehicle_service.build_filter(status=VehicleStatus.DISPATCHED), sort, set()),
+        ("list [type]", "vehicles", vehicle_service.build_filter(type=EmergencyType.FIRE), sort, set()),
+        ("available [type]", "vehicles",
+         vehicle_service.build_filter(status=VehicleStatus.AVAILABLE, type=EmergencyType.FIRE), sort, set()),
+        ("get by id", "vehicles", {"id": "FD-ENGINE-10"}, None, set()),
+        ("get by ids", "vehicles", {"id": {"$in": ["FD-ENGINE-10", "FD-ENGINE-11"]}}, None, set()),
+        ("by incident", "vehicles", {"current_incident": "INC-2025-00000010"}, None, set()),
+        ("needing maintenance", "vehicles", vehicle_service.build_maintenance_filter(), None, set()),
+        ("search id prefix", "vehicles", id_prefix_filter("FD-ENG"), [("id", 1)], set()),
+        ("search text", "vehicles", {"$text": {"$search": "engine"}},
+         [("score", {"$meta": "textScore"}), ("call_sign", 1)], {"SORT"}),
+    ]
+
+def plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """All stage names in an explain() plan tree (classic and SBE layouts)"""
+    stages = []
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for key in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+        if isinstance(plan.get(key), dict):
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+async def explain_shape(db, shape: QueryShape) -> Tuple[List[str], List[str]]:
+    """Return (plan stages, offending stages) for one query shape"""
+    name, collection_name, filter_dict, sort, allowed = shape
+    cursor = db[collection_name].find(filter_dict)
+    if sort:
+        cursor = cursor.sort(sort)
+    explanation = await cursor.limit(100).explain()
+    stages = plan_stages(explanation["queryPlanner"]["winningPlan"])
+    return stages, [stage for stage in stages if stage in BAD_STAGES - allowed]
+
+async def verify_indexes() -> bool:
+    """Seed a scratch database, build the indexes and explain every query shape"""
+    mongo_url = os.environ.get('MONGO_URL')
+    db_name = os.environ.get('DB_NAME', 'emergency_routing') + "_indexcheck"
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+    print(f"Connecting to scratch database: {db_name}")
+
+    try:
+        await client.drop_database(db_name)
+        await db.incidents.insert_many([make_incident(i) for i in range(INCIDENT_COUNT)])
+        await db.vehicles.insert_many([make_vehicle(i) for i in range(VEHICLE_COUNT)])
+        await create_indexes(db)
+
+        shapes = incident_shapes(IncidentService(db)) + vehicle_shapes(VehicleService(db))
+        failures = 0
+        for shape in shapes:
+            stages, offending = await explain_shape(db, shape)
+            marker = "❌" if offending else "✅"
+            print(f"{marker} {shape[1]:<10} {shape[0]:<40} {' <- '.join(stages)}")
+            failures += bool(offending)
+
+        if failures:
+            print(f"❌ {failures} of {len(shapes)} query shapes are not index-served")
+        else:
+            print(f"✅ All {len(shapes)} query shapes are index-served")
+        return failures == 0
+
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(verify_indexes()) else 1)
@@ -1,3 +1,6 @@
+// Event types raised by this service itself rather than sent by the server
+const LOCAL_EVENTS = new Set(['connection', 'message', 'error', 'snapshot']);
+
 class RealWebSocketService {
   constructor() {
     this.ws = null;
@@ -8,6 +11,12 @@ class RealWebSocketService {
     this.isConnected = false;
     this.clientId = null;
     this.subscriptions = new Set();
+    this.viewport = null;
+    this.syncingState = false;
+    this.stateEpoch = null;
+    this.stateVersion = null;
+    this.eventEpoch = null;
+    this.lastSeq = null;
     
     // Get WebSocket URL from environment
     const backendUrl = process.env.REACT_APP_BACKEND_URL;
@@ -34,6 +43,40 @@ class RealWebSocketService {
     console.log('WebSocket connected to backend');
     this.isConnected = true;
     this.reconnectAttempts = 0;
+
+    // The server only routes subscribed event types, so (re)register every
+    // subscription made while disconnected
+    const events = this.getSubscriptions().filter(eventType => !LOCAL_EVENTS.has(eventType));
+    if (this.lastSeq !== null) {
+      // Reconnecting: restore subscriptions and replay the events missed in the gap
+      this.send({
+        type: 'resume',
+        events,
+        epoch: this.eventEpoch,
+        last_seq: this.lastSeq,
+        ...(this.viewport || {})
+      });
+    } else {
+      if (events.length > 0) {
+        // The confirmation carries the current state behind these events,
+        // delivered to 'snapshot' listeners, so no REST reload is needed
+        this.send({
+          type: 'subscribe',
+          events,
+          snapshot: true
+        });
+      }
+
+      if (this.viewport) {
+        this.send({ type: 'set_viewport', ...this.viewport });
+      }
+    }
+
+    // Catch up on the state changes missed while disconnected
+    if (this.syncingState) {
+      this.sendStateSync();
+    }
+
     this.notifyListeners('connection', { status: 'connected' });
   }
 
@@ -42,11 +85,49 @@ class RealWebSocketService {
       const message = JSON.parse(event.data);
       console.log('WebSocket message received from backend:', message);
       
+      // Answer server heartbeats, or the server drops the connection as dead
+      if (message.type === 'ping') {
+        this.send({ type: 'pong' });
+        return;
+      }
+
       // Handle connection confirmation
       if (message.type === 'connection' && message.client_id) {
         this.clientId = message.client_id;
+        if (this.lastSeq === null) {
+          this.eventEpoch = message.epoch;
+          this.lastSeq = message.seq;
+        }
+      } else if (message.type === 'resume_failed') {
+        this.eventEpoch = message.epoch;
+        this.lastSeq = message.seq;
+      } else if (typeof message.seq === 'number' && message.seq > this.lastSeq) {
+        this.lastSeq = message.seq;
       }
       
+      // Track the synced state version so a reconnect only fetches the delta
+      if (message.type === 'state_delta' && this.stateVersion !== null && message.data.from > this.stateVersion) {
+        // A gap: fetch the missing changes before applying anything newer
+        this.sendStateSync();
+        return;
+      }
+      if (message.type === 'state_snapshot' || message.type === 'state_delta') {
+        this.stateEpoch = message.data.epoch;
+        this.stateVersion = message.data.version;
+      } else if (message.type === 'state_resync') {
+        this.stateVersion = null;
+        this.sendStateSync();
+      }
+
+      if (message.type === 'subscription_confirmed' && message.snapshot) {
+        this.notifyListeners('snapshot', message.snapshot);
+      }
+
+      // Location updates arrive batched; listeners still get one call per vehicle
+      if (message.type === 'vehicle_locations') {
+        message.data.vehicles.forEach(vehicle => this.notifyListeners('vehicle_location', vehicle));
+      }
+
       // Notify specific listeners based on message type
       this.notifyListeners(message.type, message.data || message);
       this.notifyListeners('message', message);
@@ -92,11 +173,11 @@ class RealWebSocketService {
     }
     this.listeners.get(eventType).add(callback);
     
-    // Track subscriptions for server-side filtering (future feature)
+    // Track subscriptions for server-side filtering
     this.subscriptions.add(eventType);
     
     // Send subscription message to server
-    if (this.isConnected) {
+    if (this.isConnected && !LOCAL_EVENTS.has(eventType)) {
       this.send({
         type: 'subscribe',
         events: [eventType]
@@ -116,7 +197,7 @@ class RealWebSocketService {
       if (this.listeners.get(eventType).size === 0) {
         this.subscriptions.delete(eventType);
         
-        if (this.isConnected) {
+        if (this.isConnected && !LOCAL_EVENTS.has(eventType)) {
           this.send({
             type: 'unsubscribe',
             events: [eventType]
@@ -153,6 +234,32 @@ class RealWebSocketService {
     }
   }
 
+  // Only receive vehicle locations inside [south, west, north, east] and/or
+  // the given districts; call with no arguments to receive the whole city
+  setViewport(bbox = null, districts = []) {
+    this.viewport = bbox || districts.length > 0 ? { bbox, districts } : null;
+    if (this.isConnected) {
+      this.send({ type: 'set_viewport', bbox, districts });
+    }
+  }
+
+  // Receive a fleet/incident state snapshot (state_snapshot), then
+  // field-level changes (state_delta) as they happen
+  syncState() {
+    this.syncingState = true;
+    if (this.isConnected) {
+      this.sendStateSync();
+    }
+  }
+
+  sendStateSync() {
+    this.send({
+      type: 'sync_state',
+      epoch: this.stateEpoch,
+      version: this.stateVersion
+    });
+  }
+
   // Request specific updates from server
   requestUpdate(updateType, params = {}) {
     if (this.isConnected) {
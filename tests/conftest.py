@@ -0,0 +1,49 @@
+import os
+import sys
+
+import mongomock.collection
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo import ReturnDocument
+
+# The backend is run from its own directory (`services.*`, `models.*` imports)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(autouse=True)
+def return_updated_documents(monkeypatch):
+    """Make mongomock's find_one_and_update(AFTER) behave like MongoDB.
+
+    mongomock re-runs the filter after applying the update, so a
+    conditional update that changes a filtered field (status: available ->
+    dispatched) returns None instead of the updated document.
+    """
+    original = mongomock.collection.Collection.find_one_and_update
+
+    def find_one_and_update(self, filter, update, projection=None, return_document=ReturnDocument.BEFORE, **kwargs):
+        if return_document != ReturnDocument.AFTER:
+            return original(self, filter, update, projection, return_document=return_document, **kwargs)
+        before = original(self, filter, update, {"_id": 1}, return_document=ReturnDocument.BEFORE, **kwargs)
+        if before is None:
+            return self.find_one(filter, projection) if kwargs.get("upsert") else None
+        return self.find_one({"_id": before["_id"]}, projection)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "find_one_and_update", find_one_and_update)
+
+@pytest.fixture
+def mongo_client():
+    return AsyncMongoMockClient()
+
+@pytest.fixture
+def db(mongo_client):
+    """A fresh in-memory database per test"""
+    return mongo_client["emergency_routing_test"]
+
+@pytest.fixture
+def standalone_assignments(monkeypatch):
+    """Assign with compensating writes: mongomock has no sessions or transactions"""
+    import services.assignment_service as assignment_service
+    monkeypatch.setattr(assignment_service, "_transactions_supported", False)
@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from services.assignment_service import (
+    AssignmentError, AssignmentService, INCIDENT_NOT_FOUND, TRANSACTION_ATTEMPTS,
+    VEHICLE_NOT_FOUND, VEHICLE_UNAVAILABLE
+)
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def service(db, standalone_assignments):
+    now = datetime.utcnow()
+    for index, status in enumerate(("active", "active", "closed")):
+        await db.incidents.insert_one({
+            "id": f"INC-{index}", "type": "fire", "priority": "high", "status": status,
+            "location": {"address": "1 Main St", "coordinates": [40.7, -73.9]},
+            "description": "Smoke", "reported_by": "CAD", "assigned_vehicles": [],
+            "timestamp": now, "last_update": now
+        })
+    await db.vehicles.insert_one({
+        "id": "FD-ENGINE-1", "call_sign": "Engine 1", "type": "fire", "status": "available",
+        "location": {"address": "Station", "coordinates": [40.71, -73.9]},
+        "crew": [], "speed": 0, "fuel": 100, "equipment": ["Hose"], "last_update": now
+    })
+    return AssignmentService(db)
+
+async def test_assign_reserves_vehicle_and_attaches_it(service, db):
+    incident, vehicle = await service.assign("INC-0", "FD-ENGINE-1", "4 min")
+
+    assert incident.assigned_vehicles == ["FD-ENGINE-1"]
+    assert incident.dispatched_at is not None
+    assert (vehicle.status.value, vehicle.current_incident, vehicle.eta) == ("dispatched", "INC-0", "4 min")
+
+async def test_second_assign_of_the_same_vehicle_is_refused(service, db):
+    await service.assign("INC-0", "FD-ENGINE-1")
+
+    with pytest.raises(AssignmentError) as refused:
+        await service.assign("INC-1", "FD-ENGINE-1")
+
+    assert refused.value.reason == VEHICLE_UNAVAILABLE
+    stored = await db.incidents.find_one({"id": "INC-1"})
+    assert stored["assigned_vehicles"] == []
+
+async def test_concurrent_assigns_of_one_vehicle_have_one_winner(service, db):
+    results = await asyncio.gather(
+        service.assign("INC-0", "FD-ENGINE-1"),
+        service.assign("INC-1", "FD-ENGINE-1"),
+        return_exceptions=True
+    )
+
+    refused = [result for result in results if isinstance(result, AssignmentError)]
+    assert len(refused) == 1 and refused[0].reason == VEHICLE_UNAVAILABLE
+    vehicle = await db.vehicles.find_one({"id": "FD-ENGINE-1"})
+    assigned = [incident async for incident in db.incidents.find({"assigned_vehicles": "FD-ENGINE-1"})]
+    assert [incident["id"] for incident in assigned] == [vehicle["current_incident"]]
+
+async def test_assign_to_closed_incident_releases_the_vehicle(service, db):
+    with pytest.raises(AssignmentError) as refused:
+        await service.assign("INC-2", "FD-ENGINE-1")
+
+    assert refused.value.reason == INCIDENT_NOT_FOUND
+    vehicle = await db.vehicles.find_one({"id": "FD-ENGINE-1"})
+    assert (vehicle["status"], vehicle["current_incident"], vehicle["eta"]) == ("available", None, None)
+
+    # The released unit can be assigned again
+    incident, _ = await service.assign("INC-0", "FD-ENGINE-1")
+    assert incident.assigned_vehicles == ["FD-ENGINE-1"]
+
+async def test_assign_unknown_vehicle(service):
+    with pytest.raises(AssignmentError) as refused:
+        await service.assign("INC-0", "FD-ENGINE-404")
+
+    assert refused.value.reason == VEHICLE_NOT_FOUND
+
+def write_conflict():
+    return OperationFailure("Write conflict", 112, {"errorLabels": ["TransientTransactionError"]})
+
+async def test_transaction_retries_write_conflicts(service, monkeypatch):
+    attempts = []
+
+    async def conflicting(*args):
+        attempts.append(args)
+        if len(attempts) < 3:
+            raise write_conflict()
+        return {"id": "INC-0"}, {"id": "FD-ENGINE-1"}
+
+    monkeypatch.setattr(service, "_run_transaction", conflicting)
+
+    assert await service._assign_in_transaction("INC-0", "FD-ENGINE-1", None, datetime.utcnow()) == (
+        {"id": "INC-0"}, {"id": "FD-ENGINE-1"}
+    )
+    assert len(attempts) == 3
+
+async def test_transaction_lost_on_every_attempt_is_vehicle_unavailable(service, monkeypatch):
+    attempts = []
+
+    async def conflicting(*args):
+        attempts.append(args)
+        raise write_conflict()
+
+    monkeypatch.setattr(service, "_run_transaction", conflicting)
+
+    with pytest.raises(AssignmentError) as refused:
+        await service._assign_in_transaction("INC-0", "FD-ENGINE-1", None, datetime.utcnow())
+
+    assert refused.value.reason == VEHICLE_UNAVAILABLE
+    assert len(attempts) == TRANSACTION_ATTEMPTS
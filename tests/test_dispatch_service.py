@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.emergency import Incident
+from services.dispatch_service import DispatchMetrics, DispatchService
+from services.fleet_snapshot import fleet_snapshot
+import services.dispatch_service as dispatch_service
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def service(db, monkeypatch, standalone_assignments):
+    monkeypatch.setattr(dispatch_service, "dispatch_metrics", DispatchMetrics())
+    for index in range(2):
+        await db.vehicles.insert_one({
+            "id": f"FD-ENGINE-{index}", "call_sign": f"Engine {index}", "type": "fire", "status": "available",
+            "location": {"address": "Station", "coordinates": [40.7 + index * 0.001, -73.9]},
+            "crew": [], "speed": 0, "fuel": 100, "equipment": ["Hose"], "last_update": datetime.utcnow()
+        })
+    await fleet_snapshot.load(db.vehicles)
+    return DispatchService(db)
+
+async def stored_incident(db, age: timedelta, priority: str = "critical") -> Incident:
+    incident = Incident(
+        id="INC-1", type="fire", priority=priority, description="Smoke", reported_by="CAD",
+        location={"address": "1 Main St", "coordinates": [40.7, -73.9]},
+        timestamp=datetime.utcnow() - age
+    )
+    await db.incidents.insert_one(incident.model_dump())
+    return incident
+
+async def test_new_incident_latency_runs_from_creation(db, service):
+    incident = await stored_incident(db, timedelta(seconds=30))
+
+    assert len(await service.dispatch_incident(incident)) == 2
+
+    latency = dispatch_service.dispatch_metrics.latency_ms.summary()
+    assert latency["count"] == 1 and latency["p50"] >= 30000
+
+async def test_escalation_latency_runs_from_the_escalating_report(db, service):
+    incident = await stored_incident(db, timedelta(hours=2))
+
+    assert len(await service.dispatch_incident(incident, requested_at=datetime.utcnow())) == 2
+
+    latency = dispatch_service.dispatch_metrics.latency_ms.summary()
+    assert latency["count"] == 1 and latency["p50"] < 1000
+    assert dispatch_service.dispatch_metrics.within_target == 1
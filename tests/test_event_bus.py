@@ -0,0 +1,25 @@
+import json
+import time
+
+import pytest
+
+from services.event_bus import EventBus
+
+pytestmark = pytest.mark.anyio
+
+async def deliver(bus: EventBus, age_seconds: float):
+    bus._deliver(json.dumps({"origin": "peer", "sent_at": time.time() - age_seconds}).encode())
+
+@pytest.mark.parametrize("age_seconds", [0.0002, 0.05, 2.5])
+async def test_publish_latency_is_resolved_in_microseconds(age_seconds):
+    async def handler(envelope):
+        pass
+
+    bus = EventBus()
+    bus.start(handler)
+    await deliver(bus, age_seconds)
+
+    latency = bus.get_stats()["publish_latency_us"]
+    assert latency["count"] == 1
+    # Within a bin (plus the time taken to deliver) of the true latency
+    assert latency["p50"] == pytest.approx(age_seconds * 1e6, rel=0.1, abs=500)
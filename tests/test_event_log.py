@@ -0,0 +1,125 @@
+import asyncio
+from collections import deque
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.event_log import EventLog, LoggedEvent
+from services.ws_encoding import OutboundFrame
+
+def log_events(log: EventLog, count: int):
+    for _ in range(count):
+        seq = log.next_seq()
+        log.append(LoggedEvent(seq, "incident_status", OutboundFrame({"type": "incident_status", "seq": seq})))
+
+def test_since_returns_exactly_the_missed_events():
+    log = EventLog(size=8)
+    log_events(log, 5)
+
+    assert [event.seq for event in log.since(2)] == [3, 4, 5]
+    assert [event.seq for event in log.since(0, log.epoch)] == [1, 2, 3, 4, 5]
+    assert log.since(5) == []
+
+def test_since_needs_a_snapshot_once_the_gap_left_the_buffer():
+    log = EventLog(size=3)
+    log_events(log, 5)
+
+    assert [event.seq for event in log.since(2)] == [3, 4, 5]
+    assert log.since(1) is None
+    assert log.get_stats()["oldest_seq"] == 3
+
+def test_since_rejects_other_epochs_and_future_sequences():
+    log = EventLog(size=8)
+    log_events(log, 3)
+
+    assert log.since(1, log.epoch + 1) is None
+    assert log.since(4) is None
+    assert log.since(-1) is None
+
+@pytest.fixture
+def client(db, mongo_client, monkeypatch):
+    import dependencies
+    import server
+    from dependencies import get_db
+
+    async def seed():
+        now = datetime.utcnow()
+        for index in range(3):
+            await db.incidents.insert_one({
+                "id": f"INC-{index}", "type": "fire", "priority": "high", "status": "active",
+                "location": {"address": "1 Main St", "coordinates": [40.7, -73.9]},
+                "description": "Smoke", "reported_by": "CAD", "assigned_vehicles": [],
+                "timestamp": now, "last_update": now
+            })
+
+    async def get_test_db():
+        return db
+
+    asyncio.run(seed())
+    monkeypatch.setattr(dependencies, "client", mongo_client)
+    monkeypatch.setattr(dependencies, "database", db)
+    server.app.dependency_overrides[get_db] = get_test_db
+    with TestClient(server.app) as client:
+        yield client
+    server.app.dependency_overrides.clear()
+
+def receive_until(websocket, message_type: str):
+    messages = []
+    while True:
+        message = websocket.receive_json()
+        messages.append(message)
+        if message["type"] == message_type:
+            return messages
+
+def disconnected_changes(client: TestClient, *incident_ids: str):
+    """Subscribe, disconnect, then change incidents; returns the (epoch, seq) the client last saw"""
+    with client.websocket_connect("/api/ws?client_id=c1") as websocket:
+        connection = websocket.receive_json()
+        websocket.send_json({"type": "subscribe", "events": ["incident_status"]})
+        receive_until(websocket, "subscription_confirmed")
+    for incident_id in incident_ids:
+        assert client.put(f"/api/incidents/{incident_id}/status", params={"status": "on-scene"}).status_code == 200
+    return connection["epoch"], connection["seq"]
+
+def test_resume_replays_missed_events_in_order(client):
+    epoch, seq = disconnected_changes(client, "INC-1", "INC-2")
+
+    with client.websocket_connect("/api/ws?client_id=c1") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "resume", "events": ["incident_status"], "epoch": epoch, "last_seq": seq})
+        messages = receive_until(websocket, "resumed")
+
+    replayed, resumed = messages[:-1], messages[-1]
+    statuses = [message["data"]["incident_id"] for message in replayed if message["type"] == "incident_status"]
+    assert statuses == ["INC-1", "INC-2"]
+    assert [message["seq"] for message in replayed] == sorted(message["seq"] for message in replayed)
+    assert all(message["seq"] > seq for message in replayed)
+    assert (resumed["from"], resumed["replayed"]) == (seq, len(replayed))
+
+def test_resume_after_buffer_overflow_falls_back_to_a_snapshot(client, monkeypatch):
+    from services.websocket_service import websocket_service
+
+    events = websocket_service.manager.events
+    monkeypatch.setattr(events, "entries", deque(events.entries, maxlen=1))
+    epoch, seq = disconnected_changes(client, "INC-1", "INC-2")
+
+    with client.websocket_connect("/api/ws?client_id=c1") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "resume", "events": ["incident_status"], "epoch": epoch, "last_seq": seq})
+        failed = receive_until(websocket, "resume_failed")[-1]
+        snapshot = receive_until(websocket, "state_snapshot")[-1]
+
+    assert failed["seq"] == events.seq
+    assert set(snapshot["data"]["entities"]["incident"]) == {"INC-0", "INC-1", "INC-2"}
+
+def test_resume_from_another_epoch_falls_back_to_a_snapshot(client):
+    epoch, seq = disconnected_changes(client, "INC-1")
+
+    with client.websocket_connect("/api/ws?client_id=c1") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "resume", "events": ["incident_status"], "epoch": epoch + 1, "last_seq": seq})
+        messages = receive_until(websocket, "state_snapshot")
+
+    assert "resume_failed" in [message["type"] for message in messages]
+    assert "resumed" not in [message["type"] for message in messages]
@@ -0,0 +1,93 @@
+import io
+import json
+
+import pytest
+
+from services.import_service import ImportService
+
+pytestmark = pytest.mark.anyio
+
+RECORDS = [
+    {
+        "type": "fire", "priority": "high", "description": f"Call {index}", "reported_by": "CAD",
+        "location": {"address": "1 Main St", "coordinates": [40.7 + index * 0.01, -73.9]},
+        "status": "resolved"
+    }
+    for index in range(3)
+]
+
+CSV = (
+    "type,priority,description,reported_by,address,latitude,longitude\n"
+    "medical,low,Fall,CAD,2 Main St,40.71,-73.91\n"
+    "fire,high,Smoke,CAD,3 Main St,40.72,-73.92\n"
+)
+
+def ndjson(records) -> io.StringIO:
+    return io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+
+@pytest.fixture
+async def service(db):
+    await db.incidents.create_index("id", unique=True)
+    return ImportService(db)
+
+async def test_reimporting_untimed_ndjson_counts_duplicates(service):
+    first = await service.import_stream(ndjson(RECORDS), "ndjson")
+    second = await service.import_stream(ndjson(RECORDS), "ndjson")
+
+    assert first["inserted"] == 3
+    assert (second["inserted"], second["duplicates"], second["conflicts"]) == (0, 3, 0)
+
+async def test_reimporting_untimed_csv_counts_duplicates(service):
+    await service.import_stream(io.StringIO(CSV), "csv")
+    second = await service.import_stream(io.StringIO(CSV), "csv")
+
+    assert (second["inserted"], second["duplicates"], second["conflicts"]) == (0, 2, 0)
+
+async def test_same_id_with_different_call_is_a_conflict(service):
+    original = dict(RECORDS[0], id="INC-1", timestamp="2024-01-01T10:00:00")
+    await service.import_stream(ndjson([original]), "ndjson")
+
+    summary = await service.import_stream(
+        ndjson([dict(original, description="Another call"), dict(original, timestamp="2024-01-02T10:00:00")]),
+        "ndjson"
+    )
+
+    assert (summary["duplicates"], summary["conflicts"]) == (0, 2)
+    assert summary["conflicting_ids"] == ["INC-1", "INC-1"]
+
+async def test_mixed_timestamp_formats_are_stored_as_naive_utc(service, db):
+    record = dict(
+        RECORDS[0], id="INC-2",
+        timestamp="2024-01-01T10:00:00",
+        dispatched_at="2024-01-01T10:01:00Z",
+        resolved_at="2024-01-01T12:30:00+02:00"
+    )
+    # The second record fails validation, forcing the per-record path for the first
+    invalid = dict(RECORDS[1], priority="unknown")
+
+    for records in ([record], [dict(record, id="INC-3"), invalid]):
+        summary = await service.import_stream(ndjson(records), "ndjson")
+        assert summary["inserted"] == 1
+
+    for incident_id in ("INC-2", "INC-3"):
+        stored = await db.incidents.find_one({"id": incident_id})
+        assert stored["dispatched_at"].tzinfo is None
+        assert (stored["resolved_at"] - stored["timestamp"]).total_seconds() == 30 * 60
+        events = await db.response_events.find({"incident_id": incident_id}).to_list(None)
+        assert sorted(event["seconds"] for event in events) == [60, 30 * 60]
+
+async def test_reading_and_validation_run_off_the_event_loop(service, monkeypatch):
+    import threading
+
+    threads = set()
+    validate = ImportService._validate
+
+    def recording_validate(self, chunk, progress):
+        threads.add(threading.get_ident())
+        return validate(self, chunk, progress)
+
+    monkeypatch.setattr(ImportService, "_validate", recording_validate)
+    summary = await service.import_stream(ndjson(RECORDS), "ndjson", chunk_size=2)
+
+    assert summary["inserted"] == 3
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+
+from services.incident_service import IncidentService
+
+pytestmark = pytest.mark.anyio
+
+async def test_lists_and_pages_agree_on_equal_timestamps(db):
+    timestamp = datetime(2024, 1, 1)
+    for suffix in ("B", "D", "A", "C"):
+        await db.incidents.insert_one({
+            "id": f"INC-{suffix}", "type": "fire", "priority": "high", "status": "active",
+            "location": {"address": "1 Main St", "coordinates": [40.7, -73.9]},
+            "description": "Smoke", "reported_by": "CAD", "timestamp": timestamp, "last_update": timestamp
+        })
+    service = IncidentService(db)
+
+    listed = [incident.id for incident in await service.get_incidents(limit=10)]
+    page = await service.get_incidents_page(limit=10)
+
+    assert listed == ["INC-D", "INC-C", "INC-B", "INC-A"]
+    assert [incident.id for incident in page["items"]] == listed
+
+async def test_sparse_pages_omit_the_keyset_timestamp(db):
+    timestamp = datetime(2024, 1, 1)
+    for index in range(3):
+        await db.incidents.insert_one({
+            "id": f"INC-{index}", "type": "fire", "priority": "high", "status": "active",
+            "location": {"address": "1 Main St", "coordinates": [40.7, -73.9]},
+            "description": "Smoke", "reported_by": "CAD", "timestamp": timestamp, "last_update": timestamp
+        })
+    service = IncidentService(db)
+
+    page = await service.get_incidents_page(limit=2, fields=["status"])
+
+    assert page["next_cursor"]
+    assert all("timestamp" not in item.model_dump(exclude_unset=True) for item in page["items"])
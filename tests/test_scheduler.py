@@ -0,0 +1,105 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from models.emergency import Priority
+from services.scheduler import Job, PriorityScheduler, SchedulerOverloaded, PRIORITY_WEIGHTS
+
+pytestmark = pytest.mark.anyio
+
+async def noop(*args):
+    return args
+
+async def blocked_scheduler(max_queued: int) -> PriorityScheduler:
+    """One worker, held busy by a blocking job until `release` is set"""
+    scheduler = PriorityScheduler(concurrency=1, max_queued=max_queued)
+    scheduler.start()
+    scheduler.release = asyncio.Event()
+    scheduler.submit(Priority.CRITICAL, scheduler.release.wait)
+    await asyncio.sleep(0)  # let the worker pick up the blocker
+    assert scheduler.running == 1
+    return scheduler
+
+@pytest.fixture
+async def scheduler():
+    scheduler = await blocked_scheduler(max_queued=3)
+    yield scheduler
+    scheduler.release.set()
+    await scheduler.stop()
+
+def fill(scheduler: PriorityScheduler, jobs_per_priority: int):
+    for priority in scheduler.queues:
+        for _ in range(jobs_per_priority):
+            scheduler.queues[priority].append(Job(priority, noop, (), {}))
+
+async def test_weighted_round_robin_shares_dequeues_by_weight():
+    scheduler = PriorityScheduler()
+    fill(scheduler, 15)
+
+    picks = [scheduler._next_job().priority for _ in range(15)]
+
+    assert Counter(picks) == {Priority.CRITICAL: 8, Priority.HIGH: 4, Priority.MEDIUM: 2, Priority.LOW: 1}
+    # Smooth: critical never takes more than two turns in a row
+    assert picks[0] == Priority.CRITICAL
+    assert all(picks[i:i + 3] != [Priority.CRITICAL] * 3 for i in range(len(picks) - 2))
+
+async def test_idle_queues_do_not_bank_credit():
+    scheduler = PriorityScheduler()
+    for _ in range(10):
+        scheduler.queues[Priority.CRITICAL].append(Job(Priority.CRITICAL, noop, (), {}))
+    for _ in range(5):
+        scheduler._next_job()
+    scheduler.queues[Priority.LOW].append(Job(Priority.LOW, noop, (), {}))
+
+    # A queue that was empty starts from zero rather than jumping ahead
+    assert scheduler.credits[Priority.LOW] == 0
+    picks = [scheduler._next_job().priority for _ in range(6)]
+    assert picks.count(Priority.LOW) == 1 and picks[0] == Priority.CRITICAL
+
+async def test_low_priority_work_runs_before_a_critical_backlog_drains():
+    scheduler = await blocked_scheduler(max_queued=100)
+    order = []
+
+    async def record(priority):
+        order.append(priority)
+
+    futures = [scheduler.submit(Priority.LOW, record, Priority.LOW)]
+    futures += [scheduler.submit(Priority.CRITICAL, record, Priority.CRITICAL) for _ in range(20)]
+    scheduler.release.set()
+    await asyncio.gather(*futures)
+    await scheduler.stop()
+
+    # One low job per round of (8 critical + 1 low) dequeues, interleaved
+    assert order.index(Priority.LOW) <= PRIORITY_WEIGHTS[Priority.CRITICAL]
+    assert scheduler.get_stats()["priorities"]["low"]["completed"] == 1
+
+async def test_full_queue_evicts_newest_lower_priority_job(scheduler):
+    older_low = scheduler.submit(Priority.LOW, noop, "older")
+    newer_low = scheduler.submit(Priority.LOW, noop, "newer")
+    medium = scheduler.submit(Priority.MEDIUM, noop, "medium")
+
+    high = scheduler.submit(Priority.HIGH, noop, "high")
+
+    with pytest.raises(SchedulerOverloaded, match="Preempted by high"):
+        await newer_low
+    assert not older_low.done() and not medium.done()
+    assert [len(scheduler.queues[priority]) for priority in (Priority.HIGH, Priority.MEDIUM, Priority.LOW)] == [1, 1, 1]
+    assert scheduler.stats[Priority.LOW].evicted == 1
+
+    scheduler.release.set()
+    assert await high == ("high",)
+    assert await older_low == ("older",)
+
+async def test_full_queue_rejects_work_with_nothing_less_urgent_to_evict(scheduler):
+    queued = [scheduler.submit(Priority.HIGH, noop) for _ in range(3)]
+
+    for priority in (Priority.HIGH, Priority.MEDIUM):
+        with pytest.raises(SchedulerOverloaded, match="Work queue full"):
+            await scheduler.submit(priority, noop)
+
+    assert scheduler.stats[Priority.HIGH].rejected == 1
+    assert scheduler.stats[Priority.MEDIUM].rejected == 1
+    assert scheduler.queued() == 3
+    scheduler.release.set()
+    await asyncio.gather(*queued)
@@ -0,0 +1,39 @@
+import io
+import json
+
+import pytest
+
+from models.emergency import VehicleCreate
+from services.import_service import ImportService
+from services.search import id_prefix_filter, normalize_id
+from services.vehicle_service import VehicleService
+
+pytestmark = pytest.mark.anyio
+
+def test_id_prefix_filter_rejects_free_text():
+    assert id_prefix_filter("smoke on 5th") is None
+    assert id_prefix_filter(" inc-2025 ") == {"id": {"$regex": "^INC\\-2025"}}
+
+def test_normalize_id():
+    assert normalize_id(" fd-Engine-54 ") == "FD-ENGINE-54"
+
+async def test_prefix_search_finds_imported_lower_case_ids(db):
+    record = {
+        "id": "cad-2024-0001", "type": "fire", "priority": "high", "description": "Smoke", "reported_by": "CAD",
+        "location": {"address": "1 Main St", "coordinates": [40.7, -73.9]}
+    }
+    await ImportService(db).import_stream(io.StringIO(json.dumps(record) + "\n"), "ndjson")
+
+    found = await db.incidents.find(id_prefix_filter("Cad-2024")).to_list(None)
+
+    assert [incident["id"] for incident in found] == ["CAD-2024-0001"]
+
+async def test_prefix_search_finds_created_lower_case_vehicle_ids(db):
+    vehicle = await VehicleService(db).create_vehicle(
+        VehicleCreate(id="fd-engine-7", call_sign="Engine 7", type="fire", crew=[])
+    )
+
+    found = await db.vehicles.find(id_prefix_filter("fd-eng")).to_list(None)
+
+    assert vehicle.id == "FD-ENGINE-7"
+    assert [document["id"] for document in found] == ["FD-ENGINE-7"]
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+
+from services.stats_service import StatsService, INCIDENT_COUNTERS
+
+pytestmark = pytest.mark.anyio
+
+def incident(index: int):
+    return {
+        "id": f"INC-{index}", "type": "fire", "priority": "high", "status": "active",
+        "location": {"address": "1 Main St", "coordinates": [40.7, -73.9]},
+        "description": "Smoke", "reported_by": "CAD", "timestamp": datetime(2024, 1, 1)
+    }
+
+async def create(db, stats: StatsService, index: int):
+    document = incident(index)
+    await db.incidents.insert_one(dict(document))
+    await stats.incident_created(document)
+
+def interleave_creation(db, stats: StatsService, monkeypatch, index: int):
+    """Create an incident right after the first counts are computed (before reconcile corrects)"""
+    compute = stats.compute_counters
+    created = []
+
+    async def compute_then_create():
+        computed = await compute()
+        if not created:
+            created.append(index)
+            await create(db, stats, index)
+        return computed
+
+    monkeypatch.setattr(stats, "compute_counters", compute_then_create)
+
+async def test_reconcile_keeps_an_increment_made_while_counting(db, monkeypatch):
+    stats = StatsService(db)
+    for index in range(2):
+        await create(db, stats, index)
+    interleave_creation(db, stats, monkeypatch, 2)
+
+    assert await stats.reconcile() is False
+
+    counters = (await stats.get_counters())[INCIDENT_COUNTERS]
+    assert counters["total"] == 3
+    assert counters["status"]["active"] == 3
+
+async def test_reconcile_corrects_drift_despite_a_concurrent_increment(db, monkeypatch):
+    stats = StatsService(db)
+    for index in range(2):
+        await create(db, stats, index)
+    await db.stats_counters.update_one({"_id": INCIDENT_COUNTERS}, {"$inc": {"total": 5, "status.closed": 1}})
+    interleave_creation(db, stats, monkeypatch, 2)
+
+    assert await stats.reconcile() is True
+
+    counters = (await stats.get_counters())[INCIDENT_COUNTERS]
+    assert counters["total"] == 3
+    assert counters["status"] == {"active": 3, "closed": 0}
+    assert await stats.reconcile() is False
+
+async def test_reconcile_stamps_unversioned_counters(db):
+    stats = StatsService(db)
+    await db.incidents.insert_one(incident(0))
+    await db.stats_counters.insert_one({"_id": INCIDENT_COUNTERS, "total": 4})
+
+    assert await stats.reconcile() is True
+
+    counters = (await stats.get_counters())[INCIDENT_COUNTERS]
+    assert counters["total"] == 1
+    assert counters["version"] == 1
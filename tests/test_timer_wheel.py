@@ -0,0 +1,79 @@
+import pytest
+
+from services.timer_wheel import TimerWheel
+
+@pytest.fixture
+def wheel():
+    return TimerWheel(tick_seconds=1.0, slots=8)
+
+@pytest.fixture
+def start(wheel):
+    """Beginning of the wheel's current tick"""
+    return wheel.current_tick * wheel.tick_seconds
+
+def test_key_expires_at_its_slot_boundary(wheel, start):
+    wheel.schedule("a", 3, now=start)
+
+    assert wheel.advance(start + 2.999) == []
+    assert wheel.advance(start + 3) == ["a"]
+    assert len(wheel) == 0
+
+def test_sub_tick_delay_waits_for_the_next_tick(wheel, start):
+    wheel.schedule("a", 0.1, now=start + 0.5)
+
+    assert wheel.advance(start + 0.9) == []
+    assert wheel.advance(start + 1) == ["a"]
+
+def test_delay_longer_than_the_wheel_waits_extra_turns(wheel, start):
+    wheel.schedule("a", 20, now=start)
+
+    assert wheel.advance(start + 4) == []
+    assert wheel.advance(start + 12) == []  # passes the slot once without firing
+    assert wheel.advance(start + 20) == ["a"]
+
+def test_stall_longer_than_a_turn_fires_everything_due_once(wheel, start):
+    for key, delay in (("a", 1), ("b", 7), ("c", 30), ("d", 100)):
+        wheel.schedule(key, delay, now=start)
+
+    assert sorted(wheel.advance(start + 50)) == ["a", "b", "c"]
+    assert wheel.advance(start + 60) == []
+    assert wheel.advance(start + 100) == ["d"]
+
+def test_rescheduling_replaces_the_deadline(wheel, start):
+    wheel.schedule("a", 2, now=start)
+    wheel.schedule("a", 5, now=start)
+
+    assert len(wheel) == 1
+    assert wheel.advance(start + 2) == []
+    assert wheel.advance(start + 5) == ["a"]
+
+def test_rescheduling_earlier_fires_earlier(wheel, start):
+    wheel.schedule("a", 6, now=start)
+    wheel.schedule("a", 1, now=start)
+
+    assert wheel.advance(start + 1) == ["a"]
+    assert wheel.advance(start + 6) == []
+
+def test_fired_key_can_be_rearmed(wheel, start):
+    wheel.schedule("a", 1, now=start)
+    assert wheel.advance(start + 1) == ["a"]
+
+    wheel.schedule("a", 2, now=start + 1)
+    assert wheel.advance(start + 2) == []
+    assert wheel.advance(start + 3) == ["a"]
+
+def test_cancelled_key_never_fires(wheel, start):
+    wheel.schedule("a", 1, now=start)
+    wheel.schedule("b", 1, now=start)
+    wheel.cancel("a")
+    wheel.cancel("missing")
+
+    assert wheel.advance(start + 1) == ["b"]
+    assert len(wheel) == 0
+
+def test_clock_going_backwards_fires_nothing(wheel, start):
+    wheel.schedule("a", 2, now=start)
+    wheel.advance(start + 1)
+
+    assert wheel.advance(start) == []
+    assert wheel.advance(start + 2) == ["a"]